@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+OpenAI 호출 동시성 자동 조절 (AIMD)
+지연시간과 오류가 정상이면 동시 호출 수를 조금씩 늘리고 (additive increase),
+429/과부하 오류나 지연시간 상승, x-ratelimit-remaining-* 헤더 소진이 보이면 절반으로 줄임 (multiplicative decrease)
+"""
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from model_policy import percentile
+
+# 과부하로 보고 동시성을 줄이는 상태코드
+BACKOFF_STATUS = {429, 500, 502, 503, 504}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_reset(value: Any) -> Optional[float]:
+    """x-ratelimit-reset-* / Retry-After 값을 초로 ("1s", "6m0s", "20ms", "2")"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(text)
+    if not parts:
+        return None
+    return sum(float(number) * _DURATION_SECONDS[unit] for number, unit in parts)
+
+
+def response_headers(obj: Any) -> Dict[str, str]:
+    """응답/오류 객체의 HTTP 헤더 (소문자 키, 없으면 빈 dict)"""
+    headers = getattr(obj, "headers", None)
+    if headers is None:
+        headers = getattr(getattr(obj, "response", None), "headers", None)
+    return {str(k).lower(): v for k, v in (headers or {}).items()}
+
+
+def error_status(error: BaseException) -> Optional[int]:
+    """openai.APIStatusError / MockAPIError 의 상태코드"""
+    status = getattr(error, "status_code", None)
+    return int(status) if status is not None else None
+
+
+class AdaptiveConcurrencyLimiter:
+    def __init__(self, initial: int = 4, min_limit: int = 1, max_limit: int = 32,
+                 backoff: float = 0.5, latency_tolerance: float = 2.0, window: int = 100,
+                 cooldown: float = 1.0):
+        """
+        initial: 시작 동시 호출 수
+        backoff: 감소 시 곱하는 비율
+        latency_tolerance: 최근 지연시간이 기준(하위 10%)의 이 배수를 넘으면 감소
+        window: 지연시간 기준 계산에 쓰는 최근 호출 수
+        cooldown: 연속된 오류로 한꺼번에 여러 번 줄지 않도록 감소 사이 최소 간격(초)
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.latencies = deque(maxlen=window)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.last_decrease = float("-inf")
+        self.stats = {"calls": 0, "increases": 0, "decreases": 0, "rate_limited": 0, "peak_in_flight": 0}
+        self.condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "AdaptiveConcurrencyLimiter":
+        """config.json 의 llm_concurrency ({"initial": 4, "max": 32, ...})"""
+        options = config.get('llm_concurrency') or {}
+        return cls(initial=int(options.get('initial', 4)), min_limit=int(options.get('min', 1)),
+                   max_limit=int(options.get('max', 32)), backoff=float(options.get('backoff', 0.5)),
+                   latency_tolerance=float(options.get('latency_tolerance', 2.0)),
+                   cooldown=float(options.get('cooldown', 1.0)))
+
+    @property
+    def current_limit(self) -> int:
+        return max(self.min_limit, int(self.limit))
+
+    def acquire(self):
+        """빈 자리가 날 때까지(그리고 제한 해제 시각까지) 대기"""
+        with self.condition:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait <= 0 and self.in_flight < self.current_limit:
+                    break
+                self.condition.wait(timeout=wait if wait > 0 else None)
+            self.in_flight += 1
+            self.stats["calls"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], self.in_flight)
+
+    def release(self, latency: Optional[float] = None, status: Optional[int] = None,
+                headers: Optional[Dict[str, str]] = None):
+        """
+        호출 1회 결과 반영
+        latency: 성공한 호출의 지연시간(초), status: 실패한 호출의 상태코드, headers: 응답 헤더
+        """
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            headers = headers or {}
+            if status in BACKOFF_STATUS:
+                if status == 429:
+                    self.stats["rate_limited"] += 1
+                retry_after = parse_reset(headers.get("retry-after"))
+                if retry_after is None and status == 429:
+                    retry_after = self.cooldown
+                if retry_after:
+                    self.blocked_until = max(self.blocked_until, now + retry_after)
+                self._decrease(now)
+            elif latency is not None:
+                self._observe(latency, headers, now)
+            self.condition.notify_all()
+
+    def _observe(self, latency: float, headers: Dict[str, str], now: float):
+        baseline = percentile(self.latencies, 0.1) if len(self.latencies) >= 10 else None
+        self.latencies.append(latency)
+
+        remaining = self._remaining(headers)
+        if remaining is not None and remaining <= self.in_flight:
+            # 남은 한도로는 현재 동시 호출도 감당 못 함 -> 초기화 시각까지 멈추고 줄임
+            reset = min(filter(None, (parse_reset(headers.get("x-ratelimit-reset-requests")),
+                                      parse_reset(headers.get("x-ratelimit-reset-tokens")))), default=None)
+            if remaining <= 0 and reset:
+                self.blocked_until = max(self.blocked_until, now + reset)
+            self._decrease(now)
+            return
+        if baseline and latency > baseline * self.latency_tolerance:
+            self._decrease(now)
+            return
+        # 한도에 여유가 있을 때만 증가 (남은 요청 수보다 크게 올리지 않음)
+        if self.in_flight + 1 >= self.current_limit and self.limit < self.max_limit:
+            ceiling = self.max_limit if remaining is None else min(self.max_limit, self.in_flight + remaining)
+            new_limit = min(float(ceiling), self.limit + 1.0 / self.limit)
+            if int(new_limit) > int(self.limit):
+                self.stats["increases"] += 1
+            self.limit = max(self.limit, new_limit)
+
+    @staticmethod
+    def _remaining(headers: Dict[str, str]) -> Optional[int]:
+        """x-ratelimit-remaining-requests / -tokens 중 더 빠듯한 쪽 (토큰은 호출 1회당 1000 토큰으로 환산)"""
+        values = []
+        for key, per_call in (("x-ratelimit-remaining-requests", 1), ("x-ratelimit-remaining-tokens", 1000)):
+            value = headers.get(key)
+            if value is not None:
+                try:
+                    values.append(int(float(value)) // per_call)
+                except ValueError:
+                    pass
+        return min(values) if values else None
+
+    def _decrease(self, now: float):
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.limit = max(float(self.min_limit), self.limit * self.backoff)
+        self.stats["decreases"] += 1
+
+    @contextmanager
+    def slot(self):
+        """
+        with limiter.slot() as slot:
+            response = ...
+            slot["headers"] = 응답 헤더
+        예외가 나면 그 상태코드/헤더로 감소 여부 판단
+        """
+        self.acquire()
+        started = time.perf_counter()
+        outcome: Dict[str, Any] = {"headers": None}
+        try:
+            yield outcome
+        except BaseException as e:
+            self.release(status=error_status(e), headers=response_headers(e))
+            raise
+        self.release(latency=time.perf_counter() - started, headers=outcome["headers"])
+
+    def summary(self) -> Dict[str, Any]:
+        with self.condition:
+            return dict(self.stats, limit=self.current_limit)
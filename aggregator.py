@@ -1,16 +1,36 @@
 # -*- coding: utf-8 -*-
 import json
 import os
-from typing import Dict, List, Any, Optional
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+from collections import defaultdict, deque
 from excel_parser import ExcelParser
 from gpt_matcher import GPTMatcher
+from jsonl_store import is_jsonl_path, JsonlWriter, iter_jsonl, iter_records, find_existing
+from slack_records import SlackThread
+from run_deadline import RunDeadline
 
 class DataAggregator:
-    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None):
-        """데이터 집계 클래스 초기화"""
+    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None,
+                 client: Optional[Any] = None, deadline: Optional[RunDeadline] = None):
+        """
+        데이터 집계 클래스 초기화
+        client: GPTMatcher 에 주입할 OpenAI 호환 클라이언트
+        deadline: 실행 마감 (시간이 부족하면 로컬 매칭 전용 모드로 전환)
+        """
         self.excel_parser = ExcelParser()
-        self.gpt_matcher = GPTMatcher(config_path, api_keys)
+        self.gpt_matcher = GPTMatcher(config_path, api_keys, client=client)
+        self.deadline = deadline
+        self.gpt_matcher.deadline = deadline
+        # 이 점수(코사인 유사도) 이상이면 Excel 행을 GPT 없이 로컬 매칭 결과로 확정
+        self.local_match_threshold = float(self.gpt_matcher.config.get('local_match_threshold', 0.8))
+        # 동시에 처리할 스레드 수 (LLM 동시 호출 수는 gpt_matcher.concurrency 가 따로 조절)
+        self.workers = max(1, int(self.gpt_matcher.config.get('aggregate_workers', 1)))
+    
+    def set_deadline(self, deadline: Optional[RunDeadline]):
+        """다음 집계 실행의 마감 지정 (집계기를 여러 번 재사용하는 GUI 등에서 실행마다 호출)"""
+        self.deadline = deadline
+        self.gpt_matcher.deadline = deadline
         
     def process_excel_files(self, downloaded_files: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -28,10 +48,32 @@ class DataAggregator:
             # Excel 파일 파싱
             products = self.excel_parser.parse_excel_file(filepath)
             
-            for product in products:
-                # 품목코드 매칭
-                match_result = self.gpt_matcher.match_product_to_code(product["product_name"])
-                if match_result:
+            # 시트 전체를 한 번에 로컬 TF-IDF 매칭 (행마다 감지된 브랜드 안에서만)
+            names = [product["product_name"] for product in products]
+            brands = [self.gpt_matcher.brand_detector.detect(name) for name in names]
+            candidates = self.gpt_matcher.local_matcher.match_batch(names, top_k=3, brands=brands)
+            local_count = 0
+            
+            # 시트에 브랜드가 하나만 나오면 브랜드가 없는 행의 힌트로 사용
+            sheet_brands = {brand for brand in brands if brand}
+            brand_hint = sheet_brands.pop() if len(sheet_brands) == 1 else None
+            
+            for product, product_candidates in zip(products, candidates):
+                # 품목코드 매칭 (로컬 점수가 낮은 행만 GPT 사용)
+                best = product_candidates[0] if product_candidates else None
+                if best and best["score"] >= self.local_match_threshold:
+                    match_result = {
+                        "품목코드": best["품목코드"],
+                        "제품명": best["제품명"],
+                        "브랜드": best["브랜드"],
+                        "confidence": round(best["score"] * 100)
+                    }
+                    local_count += 1
+                else:
+                    match_result = self.gpt_matcher.match_product_to_code(product["product_name"], brand_hint)
+                if not match_result:
+                    self.gpt_matcher.flag_unresolved(product, "no_match", product["source_file"])
+                else:
                     excel_products.append({
                         "product_name": product["product_name"],
                         "quantity": product["quantity"],
@@ -41,43 +83,136 @@ class DataAggregator:
                         "confidence": match_result["confidence"],
                         "source": "excel_file",
                         "source_file": product["source_file"],
-                        "row_index": product["row_index"]
+                        "row_index": product["row_index"],
+                        **({"needs_review": True} if match_result.get("needs_review") else {})
                     })
+            
+            print(f"로컬 매칭: {local_count}/{len(products)}행")
         
         return excel_products
     
-    def aggregate_products(self, processed_messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def process_thread(self, message_data: Any, thread_index: int = 0) -> tuple:
+        """
+        스레드 1개(원본 메시지 + 댓글 + 첨부 Excel)에서 제품 정보 추출
+        message_data: SlackThread 또는 저장된 dict
+        반환: (제품 목록, 스레드 요약 또는 None)
+        """
+        thread_products = []
+        thread = SlackThread.coerce(message_data)
+        
+        # 텍스트 메시지에서 제품 추출
+        text_products = self.gpt_matcher.process_message_thread(thread)
+        thread_products.extend(text_products)
+        
+        # Excel 파일에서 제품 추출
+        downloaded_files = thread.downloaded_files
+        if downloaded_files:
+            excel_products = self.process_excel_files(downloaded_files)
+            thread_products.extend(excel_products)
+        
+        # 채널 출처 표시
+        for product in thread_products:
+            product["channel"] = thread.channel
+        
+        # 스레드 요약 생성
+        thread_summary = None
+        if text_products or downloaded_files:
+            summary = self.gpt_matcher.generate_summary(thread.text, text_products)
+            thread_summary = {
+                "thread_index": thread_index,
+                "summary": summary,
+                "product_count": len(text_products) + len(downloaded_files)
+            }
+        
+        return thread_products, thread_summary
+    
+    def process_threads(self, processed_messages: Iterable[Any], total: str = "") -> Iterator[tuple]:
+        """
+        스레드별 process_thread 결과를 입력 순서대로 반환
+        aggregate_workers 가 2 이상이면 스레드 풀에서 동시에 처리 (미리 읽는 양은 workers * 2 로 제한)
+        """
+        if self.workers == 1:
+            for i, message_data in enumerate(processed_messages):
+                print(f"메시지 처리 중: {i+1}{total}")
+                yield self.process_thread(message_data, i)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            pending = deque()
+            for i, message_data in enumerate(processed_messages):
+                print(f"메시지 처리 중: {i+1}{total}")
+                pending.append(executor.submit(self.process_thread, message_data, i))
+                if len(pending) >= self.workers * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    def aggregate_products(self, processed_messages: Iterable[Any]) -> Dict[str, Any]:
         """
         모든 메시지에서 제품 정보를 집계
+        (리스트 외에 jsonl_store.iter_records 같은 지연 로드 이터레이터도 가능)
         """
         print("제품 정보 집계 시작...")
         
         all_products = []
         thread_summaries = []
+        thread_count = len(processed_messages) if hasattr(processed_messages, "__len__") else None
+        total = f"/{thread_count}" if thread_count is not None else ""
+        self.gpt_matcher.unresolved = []
+        # 이전 실행에서 마감 때문에 전환된 로컬 매칭 전용 모드는 새 실행에 이어지지 않음
+        self.gpt_matcher.local_only = False
+        if self.deadline:
+            self.deadline.start_stage("aggregate")
+            if self.deadline.should_degrade("aggregate"):
+                self.gpt_matcher.degrade("수집 단계가 마감을 넘김")
         
-        for i, message_data in enumerate(processed_messages):
-            print(f"메시지 처리 중: {i+1}/{len(processed_messages)}")
-            
-            # 텍스트 메시지에서 제품 추출
-            text_products = self.gpt_matcher.process_message_thread(message_data)
-            all_products.extend(text_products)
-            
-            # Excel 파일에서 제품 추출
-            downloaded_files = message_data.get("downloaded_files", [])
-            if downloaded_files:
-                excel_products = self.process_excel_files(downloaded_files)
-                all_products.extend(excel_products)
-            
-            # 스레드 요약 생성
-            if text_products or downloaded_files:
-                original_text = message_data.get("original_message", {}).get("text", "")
-                thread_summary = self.gpt_matcher.generate_summary(original_text, text_products)
-                thread_summaries.append({
-                    "thread_index": i,
-                    "summary": thread_summary,
-                    "product_count": len(text_products) + len(downloaded_files)
-                })
+        for done, (thread_products, thread_summary) in enumerate(self.process_threads(processed_messages, total), 1):
+            all_products.extend(thread_products)
+            if thread_summary:
+                thread_summaries.append(thread_summary)
+            # 남은 스레드를 이 속도로는 마감 전에 못 끝내면 로컬 매칭 전용으로 전환
+            if (self.deadline and not self.gpt_matcher.local_only and
+                    self.deadline.should_degrade("aggregate", done, thread_count)):
+                self.gpt_matcher.degrade(f"집계 마감까지 {self.deadline.remaining('aggregate'):.0f}초 "
+                                         f"({done}{total} 처리)")
         
+        # 분류기 판별 근거별 건수 (임계값 조정용)
+        classifier = self.gpt_matcher.order_classifier
+        if classifier:
+            if classifier.decisions:
+                print(f"메시지 분류 결과: {dict(classifier.decisions)}")
+            classifier.close()  # 판별 로그(.gz 등) 완결
+        self.gpt_matcher.hedger.close()  # 중복 요청용 스레드 풀 정리 (늦은 쪽 요청은 끝나는 대로 종료)
+        if self.gpt_matcher.llm_stats:
+            print(f"LLM 호출 통계: {dict(self.gpt_matcher.llm_stats)}")
+            print(f"프롬프트 캐시 적중률: {self.gpt_matcher.cache_hit_ratio():.1%}")
+            print(f"모델 등급별 통계: {self.gpt_matcher.model_policy.metrics.summary()}")
+            print(f"동시 호출 조절: {self.gpt_matcher.concurrency.summary()}")
+            print(f"회로 차단기: {self.gpt_matcher.breaker.summary()}")
+            if self.workers > 1:
+                print(f"동시 요청 합치기: {self.gpt_matcher.inflight.summary()}")
+            if len(self.gpt_matcher.key_pool.keys) > 1:
+                print(f"API 키별 통계: {self.gpt_matcher.key_pool.summary()}")
+            if self.gpt_matcher.hedger.enabled:
+                print(f"헤징 통계: {self.gpt_matcher.hedger.summary()}")
+        
+        # 카탈로그에 없는 문자열 캐시 저장 (다음 실행에서 바로 거절)
+        negative_cache = self.gpt_matcher.negative_cache
+        if negative_cache:
+            negative_cache.save()
+            if negative_cache.entries:
+                print(f"미매칭 캐시: {negative_cache.summary()}")
+        
+        return self.build_aggregated_result(all_products, thread_summaries)
+    
+    def build_aggregated_result(self, all_products: List[Dict[str, Any]],
+                                thread_summaries: List[Dict[str, Any]],
+                                unresolved: Optional[List[Dict[str, Any]]] = None,
+                                degraded: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        추출된 제품 목록으로 집계 결과 구성
+        unresolved/degraded: 지정하지 않으면 이번 집계 실행의 값 (실시간 집계는 날짜별 값을 넘김)
+        """
         # 브랜드별, 제품별 수량 집계
         aggregated_by_brand = self.aggregate_by_brand_and_product(all_products)
         
@@ -92,7 +227,11 @@ class DataAggregator:
             "thread_summaries": thread_summaries,
             "total_products": len(all_products),
             "unique_products": sum(len(products) for products in aggregated_by_brand.values()),
-            "brands": list(aggregated_by_brand.keys())
+            "brands": list(aggregated_by_brand.keys()),
+            "unresolved_items": list(self.gpt_matcher.unresolved if unresolved is None else unresolved),
+            "degraded": self.gpt_matcher.local_only if degraded is None else degraded,
+            # 자주 매칭에 실패한 문자열 (카탈로그/무시 목록 추가 후보)
+            "frequent_misses": self.gpt_matcher.negative_cache.report() if self.gpt_matcher.negative_cache else []
         }
     
     def aggregate_by_brand_and_product(self, products: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
@@ -136,6 +275,7 @@ class DataAggregator:
                     "신뢰도": best_match.get("confidence", 0),
                     "출처_수": len(product_list),
                     "출처_목록": list(set(sources)),
+                    "검토_필요": any(p.get("needs_review") for p in product_list),
                     "상세_정보": product_list
                 })
             
@@ -184,12 +324,49 @@ class DataAggregator:
     
     def save_aggregated_data(self, aggregated_data: Dict[str, Any], filename: str = "aggregated_data.json"):
         """
-        집계된 데이터를 JSON 파일로 저장
+        집계된 데이터를 파일로 저장
+        - .jsonl / .jsonl.gz / .jsonl.zst: 첫 줄은 메타 정보, 이후 제품 하나당 한 줄
+        - 그 외: 기존 JSON 문서
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(aggregated_data, f, ensure_ascii=False, indent=2)
+        if is_jsonl_path(filename):
+            meta = {k: v for k, v in aggregated_data.items()
+                    if k not in ("aggregated_by_brand", "aggregated_products")}
+            with JsonlWriter(filename) as writer:
+                writer.write({"type": "meta", **meta})
+                for brand_name, products in aggregated_data.get("aggregated_by_brand", {}).items():
+                    for product in products:
+                        writer.write({"type": "product", "브랜드": brand_name, **product})
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(aggregated_data, f, ensure_ascii=False, indent=2)
         print(f"집계 데이터 저장: {filename}")
     
+    @staticmethod
+    def iter_aggregated_products(filename: str):
+        """JSONL 로 저장된 집계 데이터에서 제품 레코드만 지연 로드"""
+        for record in iter_jsonl(filename):
+            if record.get("type") == "product":
+                yield record
+    
+    def load_aggregated_data(self, filename: str) -> Dict[str, Any]:
+        """save_aggregated_data 로 저장한 파일을 집계 결과 형태로 복원"""
+        if not is_jsonl_path(filename):
+            with open(filename, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        aggregated_data = {}
+        aggregated_by_brand = defaultdict(list)
+        for record in iter_jsonl(filename):
+            record_type = record.pop("type", None)
+            if record_type == "meta":
+                aggregated_data.update(record)
+            elif record_type == "product":
+                aggregated_by_brand[record.pop("브랜드")].append(record)
+        
+        aggregated_data["aggregated_by_brand"] = dict(aggregated_by_brand)
+        aggregated_data["aggregated_products"] = [p for products in aggregated_by_brand.values() for p in products]
+        return aggregated_data
+    
     def get_summary_report(self, aggregated_data: Dict[str, Any]) -> str:
         """
         집계 결과 요약 리포트 생성
@@ -217,6 +394,17 @@ class DataAggregator:
         for i, product in enumerate(products[:10], 1):
             report += f"{i}. {product['제품명']} (코드: {product['품목코드']}) - {product['총_수량']}개\n"
         
+        review_count = len([p for p in products if p.get("검토_필요")])
+        unresolved = aggregated_data.get("unresolved_items", [])
+        if aggregated_data.get("degraded") or review_count or unresolved:
+            report += f"\n확인 필요\n- 로컬 매칭(검토 필요): {review_count}개\n- 미확인 항목: {len(unresolved)}개\n"
+        
+        frequent_misses = aggregated_data.get("frequent_misses", [])
+        if frequent_misses:
+            report += "\n자주 매칭 실패한 문자열 (카탈로그/무시 목록 추가 후보)\n"
+            for miss in frequent_misses[:10]:
+                report += f"- {miss['product_name']}: {miss['count']}회\n"
+        
         if validation['validation_passed']:
             report += "\n검증 통과: 데이터 품질이 양호합니다."
         else:
@@ -228,15 +416,14 @@ if __name__ == "__main__":
     # 테스트 실행
     aggregator = DataAggregator()
     
-    # 테스트용 데이터가 있다면
-    test_file = "processed_slack_data.json"
-    if os.path.exists(test_file):
-        with open(test_file, 'r', encoding='utf-8') as f:
-            processed_messages = json.load(f)
+    # 테스트용 데이터가 있다면 (스레드 단위로 지연 로드)
+    test_file = find_existing("processed_slack_data.jsonl.gz", "processed_slack_data.jsonl", "processed_slack_data.json")
+    if test_file:
+        processed_messages = iter_records(test_file)
         
         aggregated_data = aggregator.aggregate_products(processed_messages)
         print(aggregator.get_summary_report(aggregated_data))
         
-        aggregator.save_aggregated_data(aggregated_data)
+        aggregator.save_aggregated_data(aggregated_data, "aggregated_data.jsonl.gz")
     else:
         print("테스트 데이터가 없습니다.")
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+과거 데이터 백필 (OpenAI Batch API)
+카탈로그 개편 등으로 한 달치 이력을 다시 처리할 때 실시간 호출 대신 배치 작업으로 보내
+비용을 줄이고 주간 실시간 트래픽과 한도를 나눠 쓰지 않음
+
+집계 파이프라인을 여러 번 돌리며 단계별로 요청을 모음:
+1. 수집: 결과가 없는 LLM 요청은 배치 입력에 넣고 BatchPendingError (GPTMatcher 는 오류 기록/로컬 대체 없이 빈 결과 반환, 결과는 버림)
+2. 제출/대기: 입력 JSONL 업로드 -> 배치 생성 -> 완료까지 폴링 -> 출력 파일을 custom_id 로 병합
+3. 추출 결과가 생기면 매칭 요청이 새로 생기므로 새 요청이 없을 때까지 1~2 반복
+4. 마지막으로 모든 응답이 준비된 상태에서 DataAggregator.aggregate_products 실행
+응답은 작업 폴더의 responses.jsonl 에 쌓이므로 중단 후 다시 실행하면 이어서 처리
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Any, Iterable, Optional
+
+from adaptive_concurrency import BACKOFF_STATUS
+from aggregator import DataAggregator
+from gpt_matcher import BatchPendingError
+from jsonl_store import iter_jsonl, iter_records
+from mock_openai import to_namespace
+from traffic_recorder import request_key
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# 이 오류로 처리되지 못한 요청은 실패로 기록하지 않고 다음 배치에 다시 넣음
+RETRY_ERROR_CODES = {"batch_expired", "batch_cancelled"}
+
+
+class BatchRequestError(Exception):
+    """배치에서 실패한 요청 (openai.APIStatusError 와 같은 status_code 속성 제공)"""
+
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def batch_request_id(task: str, body: Dict[str, Any]) -> str:
+    """요청 본문으로 결정적인 custom_id (같은 요청은 한 번만 보냄)"""
+    return f"{task}-{request_key('openai-batch', body)[:24]}"
+
+
+class BatchBackfill:
+    def __init__(self, aggregator: DataAggregator, work_dir: str = "batch_backfill",
+                 poll_interval: float = 60.0, max_rounds: int = 8, max_requests: int = 50000,
+                 completion_window: str = "24h"):
+        """
+        work_dir: 배치 입력 파일, 배치 목록(batches.jsonl), 응답(responses.jsonl) 저장 폴더
+        poll_interval: 배치 상태 조회 간격(초)
+        max_rounds: 수집/제출 반복 상한 (남은 요청은 마지막 집계에서 평소처럼 로컬 대체)
+        max_requests: 배치 1개에 넣는 요청 수 상한 (Batch API 한도 50,000)
+        """
+        self.aggregator = aggregator
+        self.matcher = aggregator.gpt_matcher
+        self.work_dir = work_dir
+        self.poll_interval = poll_interval
+        self.max_rounds = max_rounds
+        self.max_requests = max_requests
+        self.completion_window = completion_window
+        self.responses: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.stats = {"rounds": 0, "batches": 0, "requests": 0, "failed_requests": 0, "reused": 0}
+        os.makedirs(work_dir, exist_ok=True)
+        self.responses_path = os.path.join(work_dir, "responses.jsonl")
+        self.batches_path = os.path.join(work_dir, "batches.jsonl")
+        if os.path.exists(self.responses_path):
+            for record in iter_jsonl(self.responses_path):
+                self.responses[record["custom_id"]] = record
+            self.stats["reused"] = len(self.responses)
+            print(f"이전 배치 응답 {len(self.responses)}건 재사용")
+
+    @classmethod
+    def from_config(cls, aggregator: DataAggregator) -> "BatchBackfill":
+        """config.json 의 batch_backfill ({"work_dir": "batch_backfill", "poll_interval": 60, "max_rounds": 8})"""
+        options = aggregator.gpt_matcher.config.get('batch_backfill') or {}
+        return cls(aggregator, work_dir=options.get('work_dir', 'batch_backfill'),
+                   poll_interval=float(options.get('poll_interval', 60)),
+                   max_rounds=int(options.get('max_rounds', 8)),
+                   max_requests=int(options.get('max_requests', 50000)))
+
+    @property
+    def client(self) -> Any:
+        return self.matcher.client
+
+    def respond(self, task: str, model: str, kwargs: Dict[str, Any]) -> Any:
+        """
+        GPTMatcher._complete 대신 응답 반환 (배치 모드에서만 호출됨)
+        결과가 없으면 요청을 다음 배치에 넣고 BatchPendingError
+        """
+        body = {"model": model, **{k: v for k, v in kwargs.items() if k != "timeout"}}
+        custom_id = batch_request_id(task, body)
+        with self.lock:
+            result = self.responses.get(custom_id)
+            if result is None:
+                self.pending.setdefault(custom_id, {"custom_id": custom_id, "method": "POST",
+                                                    "url": BATCH_ENDPOINT, "body": body})
+                raise BatchPendingError("배치 응답 대기")
+        if result.get("error"):
+            raise BatchRequestError(result.get("status_code"), result["error"])
+        return to_namespace(result["body"])
+
+    def collect(self, messages: List[Any]) -> int:
+        """파이프라인을 한 번 돌려 아직 결과가 없는 요청을 모으고 그 수를 반환 (집계 결과는 버림)"""
+        for _ in self.aggregator.process_threads(messages, f"/{len(messages)}"):
+            pass
+        return len(self.pending)
+
+    def submit(self) -> List[str]:
+        """모은 요청을 max_requests 단위의 입력 파일로 나눠 업로드하고 배치 생성"""
+        with self.lock:
+            requests = list(self.pending.values())
+            self.pending = {}
+        batch_ids = []
+        for start in range(0, len(requests), self.max_requests):
+            chunk = requests[start:start + self.max_requests]
+            path = os.path.join(self.work_dir, f"round{self.stats['rounds']}_{start // self.max_requests}.jsonl")
+            with open(path, 'w', encoding='utf-8') as f:
+                for request in chunk:
+                    f.write(json.dumps(request, ensure_ascii=False) + "\n")
+            with open(path, 'rb') as f:
+                input_file = self.client.files.create(file=f, purpose="batch")
+            batch = self.client.batches.create(input_file_id=input_file.id, endpoint=BATCH_ENDPOINT,
+                                               completion_window=self.completion_window,
+                                               metadata={"purpose": "backfill"})
+            self.record_batch({"batch_id": batch.id, "input_file": path, "requests": len(chunk)})
+            print(f"배치 제출: {batch.id} ({len(chunk)}건)")
+            batch_ids.append(batch.id)
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(chunk)
+        return batch_ids
+
+    def record_batch(self, entry: Dict[str, Any]):
+        with open(self.batches_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def unfinished_batches(self) -> List[str]:
+        """이전 실행에서 제출했지만 병합하지 못한 배치"""
+        if not os.path.exists(self.batches_path):
+            return []
+        submitted, finished = [], set()
+        for entry in iter_jsonl(self.batches_path):
+            if entry.get("status"):
+                finished.add(entry["batch_id"])
+            else:
+                submitted.append(entry["batch_id"])
+        return [batch_id for batch_id in submitted if batch_id not in finished]
+
+    def wait(self, batch_ids: List[str]):
+        """배치가 모두 끝날 때까지 폴링하고, 끝난 배치부터 결과 병합"""
+        remaining = list(batch_ids)
+        while remaining:
+            for batch_id in list(remaining):
+                batch = self.client.batches.retrieve(batch_id)
+                if batch.status not in FINAL_STATUSES:
+                    continue
+                counts = getattr(batch, "request_counts", None)
+                print(f"배치 {batch_id} {batch.status}: "
+                      f"완료 {getattr(counts, 'completed', '?')}건, 실패 {getattr(counts, 'failed', '?')}건")
+                for file_id in (batch.output_file_id, batch.error_file_id):
+                    if file_id:
+                        self.merge(self.client.files.content(file_id).text)
+                self.record_batch({"batch_id": batch_id, "status": batch.status})
+                remaining.remove(batch_id)
+            if remaining:
+                time.sleep(self.poll_interval)
+
+    def merge(self, text: str):
+        """
+        배치 출력/오류 파일을 custom_id 별 응답으로 저장
+        만료·취소·429/5xx 로 처리되지 못한 요청은 저장하지 않아 다음 배치에 다시 들어감
+        """
+        with open(self.responses_path, 'a', encoding='utf-8') as out:
+            for line in text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                error = record.get("error") or {}
+                status = response.get("status_code")
+                if status == 200:
+                    result = {"custom_id": record["custom_id"], "body": response["body"]}
+                else:
+                    if error.get("code") in RETRY_ERROR_CODES or status in BACKOFF_STATUS:
+                        continue
+                    message = (error.get("message") or
+                               ((response.get("body") or {}).get("error") or {}).get("message") or "배치 요청 실패")
+                    result = {"custom_id": record["custom_id"], "status_code": status, "error": message}
+                    self.stats["failed_requests"] += 1
+                with self.lock:
+                    self.responses[result["custom_id"]] = result
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+    def run(self, processed_messages: Iterable[Any]) -> Dict[str, Any]:
+        """백필 실행 후 aggregate_products 와 같은 집계 결과 반환"""
+        messages = list(processed_messages)
+        self.matcher.batch = self
+        try:
+            resumed = self.unfinished_batches()
+            if resumed:
+                print(f"이전 실행의 배치 {len(resumed)}개 대기")
+                self.wait(resumed)
+            while self.stats["rounds"] < self.max_rounds:
+                self.stats["rounds"] += 1
+                print(f"=== 배치 백필 {self.stats['rounds']}회차: 요청 수집 ===")
+                if not self.collect(messages):
+                    break
+                self.wait(self.submit())
+            else:
+                print(f"반복 상한({self.max_rounds}회) 도달 - 남은 요청은 로컬 매칭으로 처리")
+
+            # 수집 회차의 통계/분류 기록은 버리고 마지막 집계만 남김
+            self.matcher.llm_stats.clear()
+            if self.matcher.order_classifier:
+                self.matcher.order_classifier.decisions.clear()
+            print("=== 배치 백필: 최종 집계 ===")
+            aggregated_data = self.aggregator.aggregate_products(messages)
+        finally:
+            self.matcher.batch = None
+        print(f"배치 백필 통계: {self.stats}")
+        return aggregated_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="과거 데이터 배치 백필 (OpenAI Batch API)")
+    parser.add_argument("data", help="processed_slack_data.jsonl.gz / .json 경로")
+    parser.add_argument("--config", default="config.json", help="설정 파일")
+    parser.add_argument("--output", default="aggregated_backfill.jsonl.gz", help="집계 결과 저장 경로")
+    args = parser.parse_args()
+
+    aggregator = DataAggregator(args.config)
+    aggregated_data = BatchBackfill.from_config(aggregator).run(iter_records(args.data))
+    print(aggregator.get_summary_report(aggregated_data))
+    aggregator.save_aggregated_data(aggregated_data, args.output)
+
+
+if __name__ == "__main__":
+    main()
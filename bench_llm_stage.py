@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 단계 벤치마크
+MockOpenAIClient 로 실제 API 없이 집계 파이프라인의 지연시간/호출수/토큰을 측정
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from typing import Dict, List, Any
+
+from aggregator import DataAggregator
+from mock_openai import MockOpenAIClient
+from jsonl_store import iter_records
+from slack_records import SlackThread, SlackReply
+
+
+def build_synthetic_messages(products_db: Dict[str, Dict[str, str]], count: int, seed: int = 0) -> List[SlackThread]:
+    """카탈로그 제품명으로 재현 가능한 가상 주문 메시지 생성"""
+    rng = random.Random(seed)
+    names = [name for brand_products in products_db.values() for name in brand_products.values()]
+    messages = []
+    for i in range(count):
+        picked = rng.sample(names, min(len(names), rng.randint(1, 3)))
+        text = ", ".join(f"{name} {rng.randint(1, 30)}개" for name in picked)
+        replies = []
+        if rng.random() < 0.3:
+            replies.append(SlackReply(ts=f"{1700000000 + i}.000100", user="U_BENCH", text="확인했습니다"))
+        messages.append(SlackThread(ts=f"{1700000000 + i}.000000", user="U_BENCH", text=text, replies=replies))
+    return messages
+
+
+def run_benchmark(products_db_path: str, data_path: str = None, count: int = 50,
+                  latency: Dict[str, Any] = None, error_rates: Dict[int, float] = None,
+                  seed: int = 0, matcher_config: Dict[str, Any] = None,
+                  rate_limits: Dict[str, int] = None) -> Dict[str, Any]:
+    """
+    집계 1회를 실행하고 측정값 반환
+    matcher_config: config.json 에 해당하는 추가 설정 (예: {"match_mode": "combined"})
+    rate_limits: 모의 계정 한도 (예: {"requests": 500, "tokens": 30000}, 60초 창)
+    """
+    with open(products_db_path, 'r', encoding='utf-8') as f:
+        products_db = json.load(f)
+
+    if data_path:
+        processed_messages = list(iter_records(data_path))
+    else:
+        processed_messages = build_synthetic_messages(products_db, count, seed)
+
+    client = MockOpenAIClient(products_db, latency=latency, error_rates=error_rates, seed=seed,
+                              rate_limits=rate_limits)
+    aggregator = DataAggregator(api_keys={"products_db": products_db_path, **(matcher_config or {})},
+                                client=client)
+
+    started = time.perf_counter()
+    aggregated_data = aggregator.aggregate_products(processed_messages)
+    elapsed = time.perf_counter() - started
+
+    stats = client.get_stats()
+    return {
+        "threads": len(processed_messages),
+        "elapsed_sec": round(elapsed, 3),
+        "llm_calls": stats["calls"],
+        "llm_errors": stats["errors"],
+        "rate_limited": stats["rate_limited"],
+        "peak_concurrency": stats["peak_concurrency"],
+        "concurrency": aggregator.gpt_matcher.concurrency.summary(),
+        "hedging": aggregator.gpt_matcher.hedger.summary(),
+        "prompt_tokens": stats["prompt_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "completion_tokens": stats["completion_tokens"],
+        "model_tiers": aggregator.gpt_matcher.model_policy.metrics.summary(),
+        "unique_products": aggregated_data["unique_products"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM 단계 오프라인 벤치마크")
+    parser.add_argument("--products", default="products2_map__combined.json", help="제품 데이터베이스 경로")
+    parser.add_argument("--data", help="processed_slack_data.jsonl.gz / .json 경로 (없으면 가상 메시지 생성)")
+    parser.add_argument("--count", type=int, default=50, help="가상 메시지 수")
+    parser.add_argument("--latency", default='{"kind": "lognormal", "median": 0.05, "sigma": 0.5}',
+                        help="지연 분포 JSON")
+    parser.add_argument("--errors", default="{}", help='상태코드별 오류 확률 JSON (예: {"429": 0.02})')
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--config", default="{}", help='추가 설정 JSON (예: {"match_mode": "combined"})')
+    parser.add_argument("--rate-limits", default="{}", help='모의 계정 한도 JSON (예: {"requests": 500})')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.products):
+        print(f"제품 데이터베이스가 없습니다: {args.products}")
+        return
+
+    error_rates = {int(k): float(v) for k, v in json.loads(args.errors).items()}
+    result = run_benchmark(args.products, args.data, args.count,
+                           json.loads(args.latency), error_rates, args.seed, json.loads(args.config),
+                           json.loads(args.rate_limits))
+
+    print("=== LLM 단계 벤치마크 결과 ===")
+    for key, value in result.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
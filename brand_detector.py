@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+메시지/제품명에서 브랜드 감지
+띄어쓰기, 대소문자, 한글/영문 표기 차이를 별칭으로 흡수하여
+매칭 전에 후보를 한 브랜드의 제품으로 좁히는 데 사용
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional
+
+from tfidf_matcher import normalize_name
+
+_PAREN = re.compile(r"[(\[]([^)\]]+)[)\]]")
+_TOKEN = re.compile(r"[0-9a-z가-힣]+")
+# 브랜드명 바로 뒤에 붙어도 같은 단어로 보는 조사 ("탐뷰티에서", "바루랩은")
+_PARTICLES = ("으로", "에서", "이랑", "랑", "를", "을", "은", "는", "이", "가", "도", "로", "와", "과", "의")
+
+
+def brand_variants(brand_name: str) -> List[str]:
+    """
+    브랜드명 자체에서 얻을 수 있는 표기 변형
+    예: "탐뷰티(TAMBEAUTY)" -> ["탐뷰티tambeauty", "탐뷰티", "tambeauty"]
+        "바루랩 / BARULAB"  -> ["바루랩barulab", "바루랩", "barulab"]
+    """
+    variants = [brand_name, _PAREN.sub("", brand_name)]
+    variants.extend(_PAREN.findall(brand_name))
+    variants.extend(re.split(r"[/|,]", _PAREN.sub("", brand_name)))
+    return list(dict.fromkeys(normalize_name(v) for v in variants if normalize_name(v)))
+
+
+class BrandDetector:
+    def __init__(self, brands: Iterable[str], aliases: Optional[Dict[str, List[str]]] = None,
+                 min_alias_length: int = 2):
+        """
+        brands: 제품 데이터베이스의 브랜드명 목록
+        aliases: {브랜드명: [별칭, ...]} (config.json 의 brand_aliases, 예: {"탐뷰티": ["TAM BEAUTY", "탐"]})
+        min_alias_length: 이보다 짧은 별칭은 오탐이 많아 무시
+        """
+        self.alias_map: Dict[str, str] = {}
+        for brand_name in brands:
+            for variant in brand_variants(brand_name):
+                self._add(variant, brand_name, min_alias_length)
+        for brand_name, brand_aliases in (aliases or {}).items():
+            for alias in brand_aliases:
+                self._add(normalize_name(alias), brand_name, min_alias_length)
+        # 긴 별칭부터 검사하여 "바루랩프로" 와 "바루랩" 같은 경우 더 구체적인 쪽 우선
+        self.ordered_aliases = sorted(self.alias_map, key=len, reverse=True)
+
+    def _add(self, alias: str, brand_name: str, min_alias_length: int):
+        if len(alias) >= min_alias_length:
+            self.alias_map.setdefault(alias, brand_name)
+
+    def detect_all(self, text: str) -> List[str]:
+        """
+        텍스트에 등장하는 브랜드를 등장 순서대로 반환 (중복 제거)
+        별칭은 단어 경계에서만 인정: 단어 시작에서 시작하고, 단어 끝이나 조사 앞에서 끝나야 함
+        (띄어 쓴 별칭 "탐 뷰티" 는 여러 단어에 걸쳐도 됨, "탐색" 안의 "탐" 같은 부분 일치는 제외)
+        """
+        tokens = _TOKEN.findall(str(text).lower())
+        normalized = "".join(tokens)
+        if not normalized:
+            return []
+        token_starts = set()
+        token_end = []  # 글자 위치 -> 그 글자가 속한 단어의 끝 위치
+        for token in tokens:
+            token_starts.add(len(token_end))
+            token_end.extend([len(token_end) + len(token)] * len(token))
+        found = []
+        taken = [False] * len(normalized)
+        for alias in self.ordered_aliases:
+            start = normalized.find(alias)
+            while start != -1:
+                end = start + len(alias)
+                rest = normalized[end:token_end[end - 1]]
+                on_boundary = start in token_starts and (not rest or rest in _PARTICLES)
+                # 더 긴 별칭이 이미 차지한 위치는 건너뜀
+                if on_boundary and not any(taken[start:end]):
+                    for i in range(start, end):
+                        taken[i] = True
+                    found.append((start, self.alias_map[alias]))
+                start = normalized.find(alias, start + 1)
+        return list(dict.fromkeys(brand for _, brand in sorted(found)))
+
+    def detect(self, text: str) -> Optional[str]:
+        """텍스트에서 처음 등장하는 브랜드 (없으면 None)"""
+        brands = self.detect_all(text)
+        return brands[0] if brands else None
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+카탈로그 인덱스 (카탈로그 로드 시 한 번 생성)
+- 품목코드 -> (제품명, 브랜드): 메시지에 붙여넣은 품목코드("100002 x 10")를 바로 확정
+- 변형 묶음: 기본 제품명이 같고 호수/용량/색상만 다른 제품들
+  "더 클라우드 컨실러 4홋수 각 10개씩" 같은 주문을 개별 품목으로 바로 전개
+"""
+
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+from rule_extractor import (NUMBER_PATTERN, QUANTITY_WITH_UNIT, SEPARATORS, UNIT_PATTERN, clean_slack_text,
+                            normalize_unit, parse_korean_number, split_segments)
+from tfidf_matcher import normalize_name
+
+_CODE_TOKEN = re.compile(r"(?<![0-9A-Za-z])[0-9A-Za-z][0-9A-Za-z\-_]*[0-9A-Za-z](?![0-9A-Za-z])")
+
+# 변형 속성: 호수/번호, 용량, 색상
+SHADE = re.compile(r"(?<![0-9])(\d{1,3})\s*(?:호|번)(?![가-힣])|#\s*(\d{1,3})")
+SIZE = re.compile(r"(?<![0-9.])(\d+(?:\.\d+)?)\s*(ml|mL|ML|g|G|l|L|oz)(?![A-Za-z])")
+COLORS = {
+    "레드", "핑크", "코랄", "로즈", "누드", "베이지", "브라운", "오렌지", "퍼플", "블랙", "화이트",
+    "그레이", "네이비", "블루", "그린", "옐로우", "골드", "실버", "클리어", "라이트", "미디엄", "다크",
+    "red", "pink", "coral", "rose", "nude", "beige", "brown", "orange", "purple", "black", "white",
+    "gray", "grey", "navy", "blue", "green", "yellow", "gold", "silver", "clear", "light", "medium", "dark"
+}
+_COLOR_TOKEN = re.compile(r"(?<![0-9A-Za-z가-힣])(" + "|".join(sorted(COLORS, key=len, reverse=True)) +
+                          r")(?![0-9A-Za-z가-힣])", re.IGNORECASE)
+
+# "각 10개씩", "각각 3세트"
+EACH_CLAUSE = re.compile(r"(?<![가-힣])각(?:각)?\s*(?P<qty>" + NUMBER_PATTERN + r")\s*(?P<unit>" + UNIT_PATTERN +
+                         r")?\s*씩?", re.IGNORECASE)
+# "4홋수", "3가지", "2색상" (변형 개수)
+VARIANT_COUNT = re.compile(r"(\d{1,2})\s*(?:홋수|호수|가지|종류?|색상?|컬러|사이즈)")
+# "전 호수", "모든 색상", "전체 사이즈" (묶음 전체)
+ALL_VARIANTS = re.compile(r"(?:전|전체|모든)\s*(?:홋수|호수|색상?|컬러|사이즈|종류|옵션)")
+
+
+def variant_attributes(name: str) -> List[Tuple[str, str, Tuple[int, int]]]:
+    """제품명의 변형 속성 [(종류, 정규화된 값, 위치)] (호수 01 -> "1", 용량 50ML -> "50ml")"""
+    found = []
+    for m in SHADE.finditer(name):
+        found.append(("shade", str(int(m.group(1) or m.group(2))), m.span()))
+    for m in SIZE.finditer(name):
+        found.append(("size", f"{float(m.group(1)):g}{m.group(2).lower()}", m.span()))
+    for m in _COLOR_TOKEN.finditer(name):
+        found.append(("color", m.group(1).lower(), m.span()))
+    return sorted(found, key=lambda attr: attr[2])
+
+
+def strip_spans(text: str, spans: List[Tuple[int, int]]) -> str:
+    """지정 구간을 공백으로 바꾼 문자열"""
+    for start, end in sorted(spans, reverse=True):
+        text = text[:start] + " " + text[end:]
+    return text
+
+
+class CatalogIndex:
+    def __init__(self, products_db: Dict[str, Dict[str, str]], min_code_length: int = 4):
+        """
+        products_db: {브랜드: {품목코드: 제품명}}
+        min_code_length: 이보다 짧은 코드는 수량/호수와 혼동되므로 코드로 인식하지 않음
+        """
+        self.min_code_length = min_code_length
+        self.by_code: Dict[str, Tuple[str, str, str]] = {}
+        for brand_name, brand_products in products_db.items():
+            for product_code, product_name in brand_products.items():
+                code = str(product_code)
+                self.by_code.setdefault(code.upper(), (code, product_name, brand_name))
+        self._build_families(products_db)
+
+    def _build_families(self, products_db: Dict[str, Dict[str, str]]):
+        """(브랜드, 변형 속성을 뺀 기본 제품명) 별로 제품 묶기 (2개 이상인 묶음만 유지)"""
+        families: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for brand_name, brand_products in products_db.items():
+            for product_code, product_name in brand_products.items():
+                attrs = variant_attributes(product_name)
+                if not attrs:
+                    continue
+                base = normalize_name(strip_spans(product_name, [span for _, _, span in attrs]))
+                if len(base) < 2:
+                    continue
+                families.setdefault((brand_name, base), []).append({
+                    "품목코드": str(product_code),
+                    "제품명": product_name,
+                    "브랜드": brand_name,
+                    "attrs": {(kind, value) for kind, value, _ in attrs}
+                })
+        self.families = {key: members for key, members in families.items() if len(members) >= 2}
+
+    def lookup(self, token: str) -> Optional[Dict[str, Any]]:
+        """품목코드 1개를 매칭 결과 형태로 반환 (없으면 None)"""
+        token = str(token).strip()
+        if len(token) < self.min_code_length:
+            return None
+        entry = self.by_code.get(token.upper())
+        if not entry:
+            return None
+        code, name, brand = entry
+        return {"품목코드": code, "제품명": name, "브랜드": brand, "confidence": 100}
+
+    def find_codes(self, text: str) -> List[Tuple[re.Match, Dict[str, Any]]]:
+        """텍스트에 등장하는 카탈로그 품목코드 (등장 순서)"""
+        found = []
+        for token in _CODE_TOKEN.finditer(text):
+            match = self.lookup(token.group())
+            if match:
+                found.append((token, match))
+        return found
+
+    def segment_quantity(self, segment: str, code_token: re.Match) -> Optional[Tuple[int, str]]:
+        """품목코드가 있는 구간의 수량/단위 ("100002 x 10", "100002 10개", "쇼핑백(100002) 2ea")"""
+        rest = segment[:code_token.start()] + " " + segment[code_token.end():]
+        with_unit = QUANTITY_WITH_UNIT.search(rest)
+        if with_unit:
+            quantity = parse_korean_number(with_unit.group("qty"))
+            if quantity:
+                return quantity, normalize_unit(with_unit.group("unit"))
+        # 단위가 없으면 코드 바로 뒤의 숫자만 수량으로 인정
+        bare = re.match(r"\s*[)\]]?\s*(?:[xX×*:=\-]\s*)?(\d{1,6})\s*씩?\s*$", segment[code_token.end():])
+        if bare:
+            return int(bare.group(1)), "개"
+        return None
+
+    def extract_code_items(self, text: str) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], List[str]]:
+        """
+        품목코드와 수량이 함께 있는 구간을 바로 확정
+        반환: ([(추출 제품, 매칭 결과)], 코드로 설명하지 못한 나머지 구간)
+        """
+        items = []
+        remaining = []
+        for segment in split_segments(text):
+            codes = self.find_codes(segment)
+            quantity = self.segment_quantity(segment, codes[0][0]) if len(codes) == 1 else None
+            if not quantity:
+                remaining.append(segment)
+                continue
+            code_token, match = codes[0]
+            name = (segment[:code_token.start()].strip(" ([:-") or match["제품명"])
+            items.append(({
+                "product_name": name,
+                "quantity": quantity[0],
+                "unit": quantity[1],
+                "extraction_method": "code"
+            }, match))
+        return items, remaining
+
+
+    def find_family(self, text: str, brand_hint: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """텍스트에 기본 제품명이 들어 있는 변형 묶음 (가장 긴 기본명 우선, 브랜드 힌트 우선)"""
+        normalized = normalize_name(strip_spans(text, [span for _, _, span in variant_attributes(text)]))
+        if not normalized:
+            return None
+        candidates = [key for key in self.families if key[1] in normalized]
+        if not candidates:
+            # "컨실러 01호, 02호" 처럼 기본명 일부만 적은 경우 (유일할 때만)
+            candidates = [key for key in self.families if len(normalized) >= 3 and normalized in key[1]]
+            if len({key[1] for key in candidates}) != 1:
+                return None
+        if brand_hint and any(key[0] == brand_hint for key in candidates):
+            candidates = [key for key in candidates if key[0] == brand_hint]
+        candidates.sort(key=lambda key: len(key[1]), reverse=True)
+        if len(candidates) > 1 and len(candidates[0][1]) == len(candidates[1][1]):
+            return None
+        return self.families[candidates[0]]
+
+    def expand_family_order(self, clause: str, brand_hint: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        "컨실러 01호, 02호" / "컨실러 4홋수" / "컨실러 전 호수" 를 묶음의 구체적인 품목 목록으로 전개
+        지정한 호수가 묶음에 없거나 개수가 맞지 않으면 None (GPT 로 넘김)
+        호수/용량/색상 없이 "컨실러 각 10개" 처럼 기본명만 적은 경우는 개수나 "전 호수" 가 있어야 전체로 전개
+        """
+        # "전 호수", "4홋수", 끝에 남은 "각" 은 기본명 찾기에서 제외
+        clause = re.sub(r"(?<![가-힣])각(?:각)?\s*$", "", clause.strip())
+        family = self.find_family(VARIANT_COUNT.sub(" ", ALL_VARIANTS.sub(" ", clause)), brand_hint)
+        if not family:
+            return None
+
+        wanted = {(kind, value) for kind, value, _ in variant_attributes(clause)}
+        if wanted:
+            members = [m for m in family if m["attrs"] & wanted]
+            covered = set().union(*(m["attrs"] for m in members)) if members else set()
+            if not wanted <= covered:
+                return None
+        else:
+            members = list(family)
+
+        count = VARIANT_COUNT.search(clause)
+        if count and int(count.group(1)) != len(members):
+            return None
+        if not wanted and not count and not ALL_VARIANTS.search(clause):
+            return None
+        confidence = 100 if wanted else 90
+        return [{"품목코드": m["품목코드"], "제품명": m["제품명"], "브랜드": m["브랜드"], "confidence": confidence}
+                for m in members]
+
+    def expand_variant_orders(self, text: str, brand_hint: Optional[str] = None
+                              ) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], str]:
+        """
+        "각 N개씩" 주문을 줄 단위로 찾아 변형 묶음으로 전개
+        반환: ([(추출 제품, 매칭 결과)], 전개하지 못한 나머지 텍스트)
+        """
+        pairs = []
+        remaining = []
+        for line in clean_slack_text(text).split("\n"):
+            each = EACH_CLAUSE.search(line)
+            quantity = parse_korean_number(each.group("qty")) if each else None
+            if not quantity:
+                remaining.append(line)
+                continue
+
+            # "시그니처 세트 1ea, 컨실러 01호, 02호 각 10개" -> 수량이 없는 뒤쪽 구간만 변형 목록
+            segments = SEPARATORS.split(line[:each.start()])
+            split_at = len(segments) - 1
+            while split_at > 0 and not QUANTITY_WITH_UNIT.search(segments[split_at - 1]):
+                split_at -= 1
+            clause = " ".join(segments[split_at:])
+
+            matches = self.expand_family_order(clause, brand_hint)
+            if not matches:
+                remaining.append(line)
+                continue
+            unit = normalize_unit(each.group("unit"))
+            pairs.extend(({"product_name": m["제품명"], "quantity": quantity, "unit": unit,
+                           "extraction_method": "variant"}, m) for m in matches)
+            remaining.append(", ".join(segments[:split_at] + [line[each.end():]]))
+        return pairs, "\n".join(remaining)
@@ -49,16 +49,15 @@ def check_messages():
         
         for i, processed in enumerate(processed_messages, 1):
             print(f"\n--- 처리된 메시지 {i} ---")
-            print(f"원본 텍스트: {processed.get('text', 'N/A')}")
-            print(f"스레드 댓글 수: {len(processed.get('replies', []))}")
-            print(f"첨부파일 수: {len(processed.get('files', []))}")
+            print(f"원본 텍스트: {processed.text or 'N/A'}")
+            print(f"스레드 댓글 수: {len(processed.replies)}")
+            print(f"첨부파일 수: {len(processed.files)}")
             
             # 댓글 내용
-            replies = processed.get('replies', [])
-            if replies:
+            if processed.replies:
                 print("댓글 내용:")
-                for j, reply in enumerate(replies, 1):
-                    print(f"  댓글 {j}: {reply.get('text', 'N/A')}")
+                for j, reply in enumerate(processed.replies, 1):
+                    print(f"  댓글 {j}: {reply.text or 'N/A'}")
         
         return True
         
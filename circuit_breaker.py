@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+OpenAI 장애 시 회로 차단기
+연속 실패(오류/timeout) 또는 연속으로 느린 호출이 기준을 넘으면 열림(open) 상태가 되어 LLM 호출을 바로 거절하고,
+호출한 쪽은 로컬 매칭으로 대신 처리 (검토 필요 표시)
+reset_timeout 이 지나면 반열림(half-open) 상태에서 시험 호출을 보내 성공하면 다시 닫힘
+"""
+
+import threading
+import time
+from typing import Dict, Any
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """회로가 열려 있어 LLM 호출을 보내지 않음"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, slow_call_seconds: float = 20.0,
+                 reset_timeout: float = 30.0, half_open_probes: int = 1):
+        """
+        failure_threshold: 이 횟수만큼 연속 실패(느린 호출 포함)하면 열림
+        slow_call_seconds: 이보다 오래 걸린 호출은 성공해도 실패로 셈
+        reset_timeout: 열린 뒤 시험 호출까지 기다리는 시간(초)
+        half_open_probes: 반열림 상태에서 동시에 허용하는 시험 호출 수
+        """
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probes_in_flight = 0
+        self.stats = {"trips": 0, "rejected": 0, "probes": 0, "slow_calls": 0}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "CircuitBreaker":
+        """config.json 의 circuit_breaker ({"failure_threshold": 5, "slow_call_seconds": 20, "reset_timeout": 30})"""
+        options = config.get('circuit_breaker') or {}
+        return cls(failure_threshold=int(options.get('failure_threshold', 5)),
+                   slow_call_seconds=float(options.get('slow_call_seconds', 20)),
+                   reset_timeout=float(options.get('reset_timeout', 30)))
+
+    def allow(self) -> bool:
+        """이번 호출을 보내도 되는지 (열려 있으면 False, 반열림이면 시험 호출 수만큼만 True)"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probes_in_flight = 0
+                print("회로 차단기 반열림: 시험 호출")
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and self.probes_in_flight < self.half_open_probes:
+                self.probes_in_flight += 1
+                self.stats["probes"] += 1
+                return True
+            self.stats["rejected"] += 1
+            return False
+
+    def record_success(self, latency: float):
+        if latency >= self.slow_call_seconds:
+            with self.lock:
+                self.stats["slow_calls"] += 1
+            self.record_failure()
+            return
+        with self.lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self.state = CLOSED
+                print("회로 차단기 닫힘: LLM 호출 재개")
+
+    def record_failure(self):
+        with self.lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and
+                                           self.consecutive_failures >= self.failure_threshold):
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self.stats["trips"] += 1
+                print(f"회로 차단기 열림: 연속 실패 {self.consecutive_failures}회 - "
+                      f"{self.reset_timeout:.0f}초 동안 로컬 매칭으로 처리")
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.stats, state=self.state)
@@ -33,7 +33,7 @@ def debug_gpt_matching():
         
         for i, message in enumerate(processed_messages, 1):
             print(f"\n--- 메시지 {i} GPT 매칭 테스트 ---")
-            text = message.get("text", "")
+            text = message.text
             print(f"원본 텍스트: {text}")
             
             if text:
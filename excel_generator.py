@@ -64,11 +64,28 @@ class ExcelGenerator:
                 # 요약 시트 추가
                 self.create_summary_sheet(wb, aggregated_data, brand_name)
                 
+                # 로컬 매칭으로 확정한 품목이 있으면 확인 필요 시트 추가
+                review_products = [p for p in products if p.get("검토_필요")]
+                if review_products:
+                    self.create_review_sheet(wb, review_products, [])
+                
                 # 파일 저장
                 wb.save(filepath)
                 created_files.append(filepath)
                 print(f"Excel 파일 생성 완료: {filename}")
             
+            # 브랜드를 알 수 없는 미확인 항목은 별도 파일로
+            unresolved = aggregated_data.get("unresolved_items", [])
+            if unresolved:
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                filepath = os.path.join(output_dir, f"미확인_항목_{timestamp}.xlsx")
+                wb = openpyxl.Workbook()
+                wb.remove(wb.active)
+                self.create_review_sheet(wb, [], unresolved)
+                wb.save(filepath)
+                created_files.append(filepath)
+                print(f"미확인 항목 {len(unresolved)}개: {os.path.basename(filepath)}")
+            
             return created_files
             
         except Exception as e:
@@ -171,13 +188,16 @@ class ExcelGenerator:
         for col, width in column_widths.items():
             ws.column_dimensions[col].width = width
     
-    def create_summary_sheet(self, wb, aggregated_data: Dict[str, Any], brand_name: str):
-        """요약 시트 생성 (브랜드별)"""
+    def create_summary_sheet(self, wb, aggregated_data: Dict[str, Any], brand_name: Optional[str] = None):
+        """요약 시트 생성 (브랜드별, brand_name 이 없으면 전체)"""
         summary_ws = wb.create_sheet("요약")
         
         # 브랜드별 요약 정보
         aggregated_by_brand = aggregated_data.get("aggregated_by_brand", {})
-        products = aggregated_by_brand.get(brand_name, [])
+        if brand_name:
+            products = aggregated_by_brand.get(brand_name, [])
+        else:
+            products = aggregated_data.get("aggregated_products", [])
         
         if products:
             # 신뢰도를 정수로 변환하여 평균 계산
@@ -198,7 +218,7 @@ class ExcelGenerator:
         
         summary_data = [
             ["항목", "값"],
-            ["브랜드", brand_name],
+            ["브랜드", brand_name or "전체"],
             ["총 제품 종류", len(products)],
             ["총 수량", total_quantity],
             ["평균 신뢰도", f"{avg_confidence:.1f}%"],
@@ -227,6 +247,29 @@ class ExcelGenerator:
         summary_ws.column_dimensions['A'].width = 15
         summary_ws.column_dimensions['B'].width = 20
     
+    def create_review_sheet(self, wb, review_products: List[Dict[str, Any]],
+                            unresolved: List[Dict[str, Any]]):
+        """
+        확인 필요 시트 (로컬 매칭으로 확정한 품목 + 매칭하지 못한 항목)
+        마감에 맞추려고 LLM 없이 처리한 결과를 업로드 전에 사람이 확인할 수 있도록 별도 시트로 분리
+        """
+        ws = wb.create_sheet("확인필요")
+        rows = [["구분", "품목코드", "제품명/원문", "수량", "사유"]]
+        for product in review_products:
+            rows.append(["로컬 매칭", product["품목코드"], product["제품명"], product["총_수량"],
+                         f"신뢰도 {product.get('신뢰도', 0)}%"])
+        for item in unresolved:
+            rows.append(["미확인", "", item.get("product_name", ""), item.get("quantity") or "",
+                         f"{item.get('reason', '')}: {item.get('message_text', '')}"])
+        
+        for i, row_data in enumerate(rows, start=1):
+            for j, value in enumerate(row_data, start=1):
+                cell = ws.cell(row=i, column=j, value=value)
+                if i == 1:
+                    cell.font = Font(bold=True)
+        for col, width in {'A': 12, 'B': 12, 'C': 40, 'D': 8, 'E': 60}.items():
+            ws.column_dimensions[col].width = width
+    
     def validate_data(self, aggregated_data: Dict[str, Any]) -> Dict[str, Any]:
         """데이터 검증"""
         products = aggregated_data.get("aggregated_products", [])
@@ -268,6 +311,12 @@ class ExcelGenerator:
             # 요약 시트 추가
             self.create_summary_sheet(wb, aggregated_data)
             
+            # 확인 필요 시트 (로컬 매칭 품목 / 미확인 항목이 있을 때만)
+            review_products = [p for p in products if p.get("검토_필요")]
+            unresolved = aggregated_data.get("unresolved_items", [])
+            if review_products or unresolved:
+                self.create_review_sheet(wb, review_products, unresolved)
+            
             # 파일 저장
             wb.save(output_path)
             print(f"Excel 파일 생성 완료 (요약 포함): {output_path}")
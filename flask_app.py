@@ -13,6 +13,11 @@ from aggregator import DataAggregator
 from excel_generator import ExcelGenerator
 import tempfile
 import threading
+import hashlib
+import hmac
+import time
+from live_aggregator import LiveAggregator
+from run_deadline import RunDeadline
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # 실제 사용시 변경 필요
@@ -25,6 +30,78 @@ app_data = {
     'status_message': '대기 중...'
 }
 
+# 실시간 이벤트 모드 집계기 (서버 시작 시 백그라운드에서 생성, 생성 전에 받은 이벤트는 pending 에 보관)
+live_state = {
+    'aggregator': None,
+    'pending': [],
+    'starting': False,
+    'lock': threading.Lock(),
+    'build_lock': threading.Lock()
+}
+
+def load_config():
+    """config.json 읽기"""
+    with open("config.json", 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def get_live_aggregator():
+    """실시간 집계기 가져오기 (없으면 생성하고, 생성 전에 받은 이벤트 전달)"""
+    with live_state['build_lock']:
+        if live_state['aggregator'] is None:
+            config = load_config()
+            channel_ids = config.get('channel_ids') or [config['channel_id']]
+            aggregator = LiveAggregator(DataAggregator(), SlackFetcher(), channel_ids)
+            with live_state['lock']:
+                live_state['aggregator'] = aggregator
+                pending, live_state['pending'] = live_state['pending'], []
+            for event in pending:
+                aggregator.handle_event(event)
+        return live_state['aggregator']
+
+def start_live_aggregator():
+    """실시간 집계기를 백그라운드에서 생성 (카탈로그 로드/클라이언트 준비를 Slack 요청 안에서 하지 않음)"""
+    with live_state['lock']:
+        if live_state['aggregator'] is not None or live_state['starting']:
+            return
+        live_state['starting'] = True
+    
+    def build():
+        try:
+            get_live_aggregator()
+        except Exception as e:
+            # 다음 이벤트에서 다시 시도 (받은 이벤트는 pending 에 남아 있음)
+            print(f"실시간 집계기 생성 오류: {e}")
+            with live_state['lock']:
+                live_state['starting'] = False
+    
+    thread = threading.Thread(target=build)
+    thread.daemon = True
+    thread.start()
+
+def dispatch_live_event(event):
+    """이벤트를 실시간 집계로 전달 (집계기가 아직 준비 중이면 대기열에 두고 바로 반환)"""
+    with live_state['lock']:
+        aggregator = live_state['aggregator']
+        if aggregator is None:
+            live_state['pending'].append(event)
+    if aggregator is None:
+        start_live_aggregator()
+    else:
+        aggregator.handle_event(event)
+
+def verify_slack_signature(signing_secret, timestamp, body, signature):
+    """Slack 요청 서명 검증 (v0 HMAC-SHA256, 5분 이내 요청만 허용)"""
+    if not timestamp or not signature:
+        return False
+    try:
+        if abs(time.time() - int(timestamp)) > 60 * 5:
+            return False
+    except ValueError:
+        return False
+    basestring = f"v0:{timestamp}:".encode('utf-8') + body
+    expected = "v0=" + hmac.new(signing_secret.encode('utf-8'), basestring, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
 def check_dependencies():
     """필수 파일 및 의존성 확인"""
     required_files = [
@@ -70,14 +147,15 @@ def process_data_thread(start_date, end_date):
         app_data['progress'] = 0
         app_data['status_message'] = 'Slack 메시지 수집 중...'
         
-        # 모듈 초기화
+        # 모듈 초기화 (실행 마감은 config.json 의 run_deadline / run_budget_minutes)
         slack_fetcher = SlackFetcher()
-        aggregator = DataAggregator()
+        deadline = RunDeadline.from_config(slack_fetcher.config)
+        slack_fetcher.deadline = deadline
+        aggregator = DataAggregator(deadline=deadline)
         
         # 1단계: Slack 데이터 수집
         app_data['progress'] = 20
-        messages = slack_fetcher.fetch_messages(start_date, end_date)
-        processed_messages = slack_fetcher.process_messages_with_threads(messages)
+        processed_messages = slack_fetcher.fetch_all_channels(start_date, end_date)
         
         # 2단계: 데이터 집계
         app_data['status_message'] = '데이터 집계 중...'
@@ -131,6 +209,57 @@ def get_status():
     """처리 상태 확인 API"""
     return jsonify(app_data)
 
+@app.route('/slack/events', methods=['POST'])
+def slack_events():
+    """Slack Events API 수신기 (message 이벤트를 실시간 집계로 전달)"""
+    config = load_config()
+    signing_secret = config.get('slack_signing_secret')
+    # 서명 키가 없으면 누구나 이벤트를 넣을 수 있으므로 수신 자체를 거부
+    if not signing_secret:
+        return jsonify({'error': 'slack_signing_secret 이 설정되지 않아 이벤트 수신이 비활성화되어 있습니다'}), 403
+    if not verify_slack_signature(
+            signing_secret,
+            request.headers.get('X-Slack-Request-Timestamp'),
+            request.get_data(),
+            request.headers.get('X-Slack-Signature')):
+        return jsonify({'error': '서명 검증 실패'}), 401
+    
+    payload = request.get_json(silent=True) or {}
+    
+    # 이벤트 URL 등록 확인
+    if payload.get('type') == 'url_verification':
+        return jsonify({'challenge': payload.get('challenge')})
+    
+    if payload.get('type') == 'event_callback':
+        event = payload.get('event', {})
+        if event.get('type') == 'message':
+            dispatch_live_event(event)
+    
+    # Slack 은 3초 안에 응답을 받아야 하므로 처리는 워커에서 수행
+    return '', 200
+
+@app.route('/api/live/status')
+def live_status():
+    """실시간 집계 상태 확인 API"""
+    if live_state['aggregator'] is None:
+        return jsonify({'enabled': False})
+    return jsonify({'enabled': True, **live_state['aggregator'].get_status()})
+
+@app.route('/api/live/render', methods=['POST'])
+def live_render():
+    """미리 계산된 실시간 집계를 다운로드용 결과로 설정"""
+    if live_state['aggregator'] is None:
+        return jsonify({'error': '실시간 집계 데이터가 없습니다'}), 400
+    
+    data = request.get_json(silent=True) or {}
+    aggregated_data = live_state['aggregator'].snapshot(data.get('date'))
+    app_data['aggregated_data'] = aggregated_data
+    app_data['processing_status'] = 'completed'
+    app_data['status_message'] = '실시간 집계 결과 준비 완료'
+    app_data['progress'] = 100
+    
+    return jsonify({'status': 'ready', 'unique_products': aggregated_data['unique_products']})
+
 @app.route('/api/download/excel')
 def download_excel():
     """Excel 파일 다운로드"""
@@ -186,9 +315,33 @@ def download_json():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def start_socket_mode():
+    """config.json 에 slack_app_token 이 있으면 소켓 모드 수신기를 백그라운드로 시작"""
+    try:
+        config = load_config()
+    except Exception:
+        return
+    if not config.get('slack_app_token'):
+        return
+    
+    from slack_socket_mode import SocketModeRunner
+    runner = SocketModeRunner(config['slack_app_token'], get_live_aggregator())
+    thread = threading.Thread(target=runner.run)
+    thread.daemon = True
+    thread.start()
+
 if __name__ == '__main__':
     # 템플릿 폴더 생성
     if not os.path.exists('templates'):
         os.makedirs('templates')
     
+    # debug 리로더의 감시 프로세스에서는 수신기를 시작하지 않음
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        try:
+            if load_config().get('slack_signing_secret'):
+                start_live_aggregator()
+        except Exception:
+            pass
+        start_socket_mode()
+    
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -1,30 +1,128 @@
 # -*- coding: utf-8 -*-
 import openai
 import json
-from typing import Dict, List, Any, Optional
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Any, Optional
 import re
 import os
+from slack_records import SlackThread
+from tfidf_matcher import TfidfCatalogMatcher
+from brand_detector import BrandDetector
+from rule_extractor import RuleBasedExtractor, split_segments
+from message_classifier import OrderMessageClassifier
+from catalog_index import CatalogIndex
+from prompt_builder import PromptBuilder
+from model_policy import ModelPolicy
+from hedging import HedgeCancelled, RequestHedger
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+from singleflight import SingleFlight
+from negative_cache import NegativeCache
+from key_pool import KeyPool, PooledKey, estimate_request_tokens
+from adaptive_concurrency import AdaptiveConcurrencyLimiter, BACKOFF_STATUS, error_status, response_headers
+from llm_schemas import SCHEMAS, SchemaValidationError, parse_response, response_format
+
+class BatchPendingError(Exception):
+    """배치 백필 수집 회차에서 결과가 아직 없는 요청 (다음 배치에 포함됨, 오류/로컬 대체로 처리하지 않음)"""
+
+
+def lowest_confidence(items: Optional[List[Any]]) -> Optional[float]:
+    """추출 항목들 중 가장 낮은 신뢰도 (신뢰도가 없으면 None)"""
+    values = [item.confidence for item in items or [] if item.confidence is not None]
+    return min(values) if values else None
+
 
 class GPTMatcher:
-    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None):
-        """GPT 매칭 클래스 초기화"""
+    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None,
+                 client: Optional[Any] = None):
+        """
+        GPT 매칭 클래스 초기화
+        client: openai.OpenAI 호환 클라이언트 주입 (예: mock_openai.MockOpenAIClient)
+        """
         if api_keys:
             # API 키가 직접 제공된 경우
             config = api_keys
-            products_db_path = "products2_map__combined.json"  # 기본값
         else:
             # config.json 파일에서 읽기
             with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
-            products_db_path = config.get('products_db', 'products2_map__combined.json')
+        products_db_path = config.get('products_db', 'products2_map__combined.json')
+        self.config = config
         
-        # OpenAI API 설정
-        openai.api_key = config['openai_api_key']
-        self.client = openai.OpenAI(api_key=config['openai_api_key'])
+        # 요청당 timeout(초) - 실행 마감(deadline)이 있으면 남은 집계 시간으로 더 줄임
+        self.llm_timeout = float(config.get('llm_timeout', 60))
+        self.deadline = None
+        
+        # OpenAI API 설정 (주입된 클라이언트가 있으면 그대로 사용)
+        # openai_api_keys 에 여러 키/프로젝트를 지정하면 키별 요청/토큰 한도 안에서 나눠 호출
+        if client is None and config.get('openai_api_key'):
+            openai.api_key = config['openai_api_key']
+        self.key_pool = KeyPool.from_config(config, self.make_client, client)
         
         # 제품 데이터베이스 로드
         self.products_db = self.load_products_db(products_db_path)
         
+        # 프롬프트 구성 (고정 지침/카탈로그를 앞에, 질의를 뒤에 두어 프리픽스 캐시 적중)
+        self.prompts = PromptBuilder(self.products_db)
+        
+        # 품목코드 인덱스 (메시지에 적힌 코드를 O(1) 로 확정)
+        self.catalog_index = CatalogIndex(self.products_db)
+        
+        # 카탈로그에 없는 제품명 캐시 (GPT 매칭 실패를 TTL 동안 기억, 카탈로그가 바뀌면 무효화)
+        self.negative_cache = NegativeCache.from_config(config, self.prompts.catalog_hash)
+        
+        # 로컬 TF-IDF 매처 (카탈로그 행렬은 한 번만 생성)
+        self.local_matcher = TfidfCatalogMatcher(self.products_db)
+        
+        # 브랜드 감지기 (config.json 의 brand_aliases 로 별칭 추가)
+        self.brand_detector = BrandDetector(self.products_db.keys(), config.get('brand_aliases'))
+        
+        # LLM 작업별 호출/검증 실패/재시도 횟수 (동시 처리 시 stats_lock 으로 보호)
+        self.llm_stats = Counter()
+        self.stats_lock = threading.Lock()
+        
+        # 동시 호출 수 자동 조절 (429/지연 상승 시 감소, 여유가 있으면 증가)
+        self.concurrency = AdaptiveConcurrencyLimiter.from_config(config)
+        self.rate_limit_retries = int(config.get('llm_rate_limit_retries', 2))
+        
+        # 꼬리 지연 완화 (config.json 의 hedging.enabled, 기본 꺼짐)
+        self.hedger = RequestHedger.from_config(config)
+        
+        # OpenAI 장애 시 회로 차단 (열려 있는 동안 로컬 매칭으로 대체)
+        self.breaker = CircuitBreaker.from_config(config)
+        
+        # 동시에 들어온 같은 추출/매칭 요청은 한 번만 처리 (config.json 의 llm_singleflight)
+        self.inflight = SingleFlight.from_config(config)
+        
+        # 작업별 모델 등급 (작은 모델 우선, 신뢰도 낮음/검증 실패 시 큰 모델)
+        self.model_policy = ModelPolicy.from_config(config)
+        
+        # 매칭 방식: "separate" (추출 1회 + 제품별 매칭) / "combined" (후보 목록을 주고 메시지당 1회)
+        self.match_mode = config.get('match_mode', 'separate')
+        self.shortlist_size = int(config.get('shortlist_size', 5))
+        # 추출 범위: "message" (원본/댓글 각각) / "thread" (스레드 전체를 한 번에, 정정 댓글 반영)
+        self.extraction_scope = config.get('extraction_scope', 'message')
+        
+        # 규칙 기반 추출기 (config.json 의 rule_extraction: false 로 끌 수 있음)
+        self.rule_extractor = RuleBasedExtractor() if config.get('rule_extraction', True) else None
+        
+        # 주문 메시지 분류기 (확인 답글, 이모지, 채널 참여 등은 추출 생략)
+        self.order_classifier = None
+        if config.get('order_classifier', True):
+            self.order_classifier = OrderMessageClassifier(self.products_db,
+                                                           log_path=config.get('classifier_log_path'))
+        
+        # 로컬 매칭 전용(degraded) 모드: LLM 호출/적요 생성 없이 TF-IDF 1순위를 검토 필요로 표시
+        self.local_only = False
+        self.degraded_min_score = float(config.get('degraded_min_score', 0.5))
+        # 매칭하지 못한 추출 항목 (시트의 확인 필요 목록)
+        self.unresolved: List[Dict[str, Any]] = []
+        # 실시간 모드: 스레드(작업 스레드)별로 미확인 항목을 따로 받을 목록 (unresolved_sink.items)
+        self.unresolved_sink = threading.local()
+        # 배치 백필 실행 중이면 batch_backfill.BatchBackfill (LLM 응답을 배치 결과에서 가져옴)
+        self.batch = None
+        
     def load_products_db(self, db_path: str) -> Dict[str, Dict[str, str]]:
         """제품 데이터베이스 로드 (브랜드별 구조)"""
         try:
@@ -41,261 +139,616 @@ class GPTMatcher:
     def extract_products_from_text(self, text: str) -> List[Dict[str, Any]]:
         """
         텍스트에서 제품명과 수량 추출
+        (여러 스레드에서 같은 텍스트를 동시에 요청하면 한 번만 처리하고 결과 공유)
         """
         if not text or not text.strip():
             return []
+        return self.inflight.do(("extract", text), lambda: self._extract_products_from_text(text))
+    
+    def _extract_products_from_text(self, text: str) -> List[Dict[str, Any]]:
+        if self.local_only:
+            return self.local_extract(text)
+        
+        # 흔한 형식은 규칙으로 먼저 해석하고, 메시지 전체를 설명한 경우에만 GPT 생략
+        if self.rule_extractor:
+            rule_result = self.rule_extractor.extract(text)
+            if rule_result.complete:
+                print(f"규칙 추출: {len(rule_result.items)}개 제품 (GPT 생략)")
+                return rule_result.items
         
-        prompt = f"""
-다음 텍스트에서 제품명과 수량을 추출해주세요. JSON 형태로 응답해주세요.
-
-텍스트: "{text}"
-
-응답 형식:
-[
-  {{
-    "product_name": "정확한 제품명",
-    "quantity": 수량,
-    "unit": "단위 (개, 세트, 박스 등)"
-  }}
-]
-
-규칙:
-1. 제품명은 정확하고 완전한 이름으로 추출
-2. 수량은 숫자만 (예: "10개" -> 10)
-3. 단위는 개, 세트, 박스, ea 등
-4. 제품이 없으면 빈 배열 [] 반환
-5. JSON만 응답하고 다른 설명은 하지 마세요
-"""
-
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "당신은 제품명과 수량을 정확히 추출하는 전문가입니다."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=1000
-            )
-            
-            content = response.choices[0].message.content.strip()
-            
-            # JSON 파싱
-            try:
-                # JSON 부분만 추출 (```json ... ``` 형태일 수 있음)
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].strip()
-                
-                products = json.loads(content)
-                
-                # 유효성 검증
-                if isinstance(products, list):
-                    valid_products = []
-                    for product in products:
-                        if isinstance(product, dict) and "product_name" in product and "quantity" in product:
-                            valid_products.append(product)
-                    return valid_products
-                else:
-                    return []
-                    
-            except json.JSONDecodeError as e:
-                print(f"JSON 파싱 오류: {e}")
-                print(f"응답 내용: {content}")
-                return []
-                
+            items = self._chat("extract", self.prompts.extract(text), max_tokens=1000)
+        except BatchPendingError:
+            return []
+        except CircuitOpenError:
+            return self.local_extract(text)
         except Exception as e:
             print(f"GPT API 오류: {e}")
             return []
+        return [item.to_product() for item in items or []]
     
-    def match_product_to_code(self, product_name: str) -> Optional[Dict[str, Any]]:
+    def _chat(self, task: str, messages: List[Dict[str, str]], max_tokens: int,
+              confidence: Optional[Callable[[Any], Optional[float]]] = None) -> Any:
+        """
+        LLM 호출 공통 경로
+        - 작업별 기본 등급 모델로 호출 (model_policy)
+        - 스키마가 있는 작업은 response_format(json_schema) 으로 형태를 고정하고 타입 객체로 검증
+        - 검증에 실패하면 해당 요청만 오류 내용을 덧붙여 큰 모델로 1회 재시도 (그래도 실패하면 None)
+        - confidence(결과) 가 기준 미만이면 큰 모델로 한 번 더 처리 (큰 모델 호출/검증이 실패하면 기존 결과 유지)
+        - 스키마가 없는 작업(summary)은 응답 문자열 그대로 반환
+        API 오류는 호출한 쪽에서 처리
+        """
+        tier = self.model_policy.tier_for(task)
+        kwargs = {"messages": messages, "temperature": 0.1, "max_tokens": max_tokens}
+        self.count(f"{task}_calls")
+        if task not in SCHEMAS:
+            response = self._complete(task, tier, kwargs)
+            return (response.choices[0].message.content or "").strip()
+        
+        kwargs["response_format"] = response_format(task)
+        result = None
+        escalated = False
+        for attempt in range(2):
+            response = self._complete(task, tier, kwargs, escalated)
+            content = response.choices[0].message.content
+            try:
+                result = parse_response(task, content)
+                break
+            except SchemaValidationError as e:
+                self.count(f"{task}_invalid")
+                if attempt:
+                    print(f"{task} 응답 검증 실패 (재시도 후): {e}")
+                    return None
+                print(f"{task} 응답 검증 실패, 해당 요청만 재시도: {e}")
+                self.count(f"{task}_retries")
+                if self.model_policy.can_escalate(tier):
+                    tier, escalated = "large", True
+                kwargs["messages"] = messages + [
+                    {"role": "assistant", "content": content or ""},
+                    {"role": "user", "content": f"응답이 스키마와 맞지 않습니다 ({e}). 스키마에 맞는 JSON만 다시 응답하세요."}
+                ]
+        
+        if confidence and self.model_policy.should_escalate(tier, confidence(result)):
+            print(f"{task} 응답 신뢰도 낮음, 큰 모델로 재처리")
+            self.count(f"{task}_escalations")
+            kwargs["messages"] = messages
+            try:
+                response = self._complete(task, "large", kwargs, escalated=True)
+                result = parse_response(task, response.choices[0].message.content)
+            except SchemaValidationError as e:
+                # 큰 모델 응답이 깨지면 작은 모델 결과 유지
+                self.count(f"{task}_invalid")
+                print(f"{task} 승격 응답 검증 실패, 기존 결과 사용: {e}")
+            except Exception as e:
+                # 배치 백필 중이면 승격 요청도 배치에 넣어야 하므로 그대로 전달
+                if self.batch is not None:
+                    raise
+                # 큰 모델 호출이 실패해도 이미 검증된 작은 모델 결과 유지
+                self.count(f"{task}_escalation_errors")
+                print(f"{task} 승격 호출 실패, 기존 결과 사용: {e}")
+        return result
+    
+    def _complete(self, task: str, tier: str, kwargs: Dict[str, Any], escalated: bool = False) -> Any:
+        """
+        등급에 맞는 모델로 실제 API 호출 (지연시간/토큰을 등급별로 기록)
+        p95 를 넘긴 호출은 헤징(중복 요청)하고, 429/과부하 오류는 제한기가 물러난 뒤 재시도
+        배치 백필 중이면 실시간 호출 대신 배치 결과 사용 (없으면 다음 배치에 넣고 BatchPendingError)
+        """
+        if self.batch is not None:
+            response = self.batch.respond(task, self.model_policy.model_for(tier), kwargs)
+            self.record_usage(response)
+            return response
+        if not self.breaker.allow():
+            self.count(f"{task}_circuit_open")
+            raise CircuitOpenError("회로 차단기 열림")
+        model = self.model_policy.model_for(tier)
+        call_started = time.perf_counter()
+        for attempt in range(self.rate_limit_retries + 1):
+            try:
+                started = time.perf_counter()
+                response = self.hedger.run(task, lambda sent: self._send(model, kwargs, sent))
+                break
+            except Exception as e:
+                if error_status(e) not in BACKOFF_STATUS or attempt == self.rate_limit_retries:
+                    self.breaker.record_failure()
+                    raise
+                self.count("rate_limit_retries")
+                print(f"OpenAI API 제한/과부하 ({error_status(e)}) - 동시 호출 {self.concurrency.current_limit}개로 줄여 재시도")
+        self.breaker.record_success(time.perf_counter() - call_started)
+        self.model_policy.metrics.record(tier, time.perf_counter() - started,
+                                         getattr(response, "usage", None), escalated)
+        self.record_usage(response)
+        return response
+    
+    def _send(self, model: str, kwargs: Dict[str, Any], sent: Optional[Callable[[], None]] = None) -> Any:
+        """
+        키 풀에서 여유 있는 키를 고르고 동시성 제한기 자리를 얻어 요청 1건 전송
+        (헤징 시 중복 요청도 각자 키/자리를 얻음)
+        sent: 자리를 얻은 직후 호출 (헤징 타이머/지연시간 표본의 시작점)
+        """
+        estimated = estimate_request_tokens(kwargs["messages"], kwargs.get("max_tokens") or 0)
+        key = self.key_pool.acquire(estimated)
+        completions = key.client.chat.completions
+        raw = getattr(completions, "with_raw_response", None)
+        try:
+            with self.concurrency.slot() as slot:
+                if sent is not None:
+                    sent()
+                kwargs = dict(kwargs, timeout=self.request_timeout())
+                if raw is None:
+                    response = completions.create(model=model, **kwargs)
+                else:
+                    # 원본 응답으로 받아 x-ratelimit-* 헤더를 제한기에 전달
+                    raw_response = raw.create(model=model, **kwargs)
+                    slot["headers"] = response_headers(raw_response)
+                    response = raw_response.parse()
+        except HedgeCancelled:
+            # 전송하지 않은 중복 요청: 키 실패로 세지 않고 예약한 토큰 반환
+            self.key_pool.release(key, estimated, used_tokens=0)
+            raise
+        except Exception as e:
+            self.key_pool.release(key, estimated, status=error_status(e) or 0, headers=response_headers(e))
+            raise
+        usage = getattr(response, "usage", None)
+        self.key_pool.release(key, estimated, used_tokens=getattr(usage, "total_tokens", None) if usage else None)
+        return response
+    
+    def make_client(self, entry: Dict[str, Any]) -> Any:
+        """
+        키 풀 항목 1개의 OpenAI 클라이언트
+        SDK 자체 재시도는 끔 (429/5xx/timeout 을 제한기/회로 차단기/키 상태가 바로 보고 _complete 만 재시도)
+        """
+        options = {name: entry[name] for name in ("organization", "project") if entry.get(name)}
+        return openai.OpenAI(api_key=entry["api_key"], timeout=self.llm_timeout, max_retries=0, **options)
+    
+    @property
+    def client(self) -> Any:
+        """첫 번째 키의 클라이언트 (단일 키 구성과의 호환용)"""
+        return self.key_pool.keys[0].client
+    
+    @client.setter
+    def client(self, client: Any):
+        """클라이언트를 직접 바꾸면 그 클라이언트 1개로 된 풀로 교체 (traffic_recorder.attach 등)"""
+        self.key_pool = KeyPool([PooledKey("injected", client)])
+    
+    def request_timeout(self) -> float:
+        """이번 LLM 요청에 줄 timeout(초)"""
+        if self.deadline is None:
+            return self.llm_timeout
+        return self.deadline.timeout(self.llm_timeout, "aggregate")
+    
+    def degrade(self, reason: str):
+        """로컬 매칭 전용 모드로 전환 (이후 LLM 호출 없음)"""
+        if not self.local_only:
+            print(f"로컬 매칭 전용 모드로 전환: {reason}")
+        self.local_only = True
+    
+    def local_extract(self, text: str) -> List[Dict[str, Any]]:
+        """LLM 없이 추출: 규칙으로 해석한 구간만 사용하고 나머지는 확인 필요로 기록"""
+        rule_result = (self.rule_extractor or RuleBasedExtractor()).extract(text)
+        for segment in rule_result.unexplained:
+            self.flag_unresolved({"product_name": segment, "quantity": None}, "not_extracted", text)
+        return rule_result.items
+    
+    def local_match(self, product_name: str, brand_hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """LLM 없이 매칭: 품목코드/정확한 이름, 아니면 TF-IDF 1순위 (검토 필요 표시)"""
+        exact = self.exact_match(product_name, brand_hint)
+        if exact:
+            return exact
+        best = None
+        for scoped_db in self.match_scopes(product_name, brand_hint):
+            brand = next(iter(scoped_db)) if len(scoped_db) == 1 else None
+            candidates = self.local_matcher.match_batch([product_name], top_k=1, brands=[brand])[0]
+            if candidates and candidates[0]["score"] >= self.degraded_min_score:
+                best = candidates[0]
+                break
+        if best is None:
+            return None
+        return {"품목코드": best["품목코드"], "제품명": best["제품명"], "브랜드": best["브랜드"],
+                "confidence": round(best["score"] * 100), "needs_review": True}
+    
+    def flag_unresolved(self, product: Dict[str, Any], reason: str, message_text: str = ""):
+        """
+        매칭하지 못한 항목을 확인 필요 목록에 기록
+        현재 작업 스레드에 unresolved_sink.items 가 있으면 공유 목록 대신 그 목록에 기록
+        """
+        entry = {
+            "product_name": product.get("product_name", ""),
+            "quantity": product.get("quantity"),
+            "reason": reason,
+            "message_text": (message_text or "")[:100]
+        }
+        sink = getattr(self.unresolved_sink, "items", None)
+        if sink is not None:
+            sink.append(entry)
+            return
+        with self.stats_lock:
+            self.unresolved.append(entry)
+    
+    def count(self, key: str, amount: int = 1):
+        """llm_stats 증가 (여러 스레드에서 호출 가능)"""
+        with self.stats_lock:
+            self.llm_stats[key] += amount
+    
+    def record_usage(self, response: Any):
+        """응답의 토큰 사용량 누적 (프리픽스 캐시 적중분은 usage.prompt_tokens_details.cached_tokens)"""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        self.count("prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+        self.count("completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+        self.count("cached_tokens", (getattr(details, "cached_tokens", 0) or 0) if details else 0)
+    
+    def cache_hit_ratio(self) -> float:
+        """입력 토큰 중 프리픽스 캐시로 처리된 비율"""
+        prompt_tokens = self.llm_stats["prompt_tokens"]
+        return self.llm_stats["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0
+    
+    def scope_products_db(self, product_name: str, brand_hint: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+        """
+        제품명(없으면 brand_hint)에서 감지한 브랜드의 제품만 남긴 데이터베이스
+        브랜드를 알 수 없으면 전체 데이터베이스
+        """
+        brand = self.brand_detector.detect(product_name) or brand_hint
+        if brand and brand in self.products_db:
+            return {brand: self.products_db[brand]}
+        return self.products_db
+    
+    def match_scopes(self, product_name: str, brand_hint: Optional[str] = None) -> List[Dict[str, Dict[str, str]]]:
+        """
+        매칭을 시도할 카탈로그 범위 (앞에서부터)
+        브랜드 범위에서 실패하면 전체 카탈로그로 재시도 (브랜드 오감지나 다른 브랜드로 등록된 제품 대비)
+        """
+        scoped_db = self.scope_products_db(product_name, brand_hint)
+        if scoped_db is self.products_db:
+            return [scoped_db]
+        return [scoped_db, self.products_db]
+    
+    def message_brand(self, text: str) -> Optional[str]:
+        """메시지에 브랜드가 하나만 나올 때만 그 브랜드 (여러 브랜드가 섞이면 힌트로 쓰지 않음)"""
+        brands = self.brand_detector.detect_all(text)
+        return brands[0] if len(brands) == 1 else None
+    
+    def exact_match(self, product_name: str, brand_hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """GPT 없이 확정할 수 있는 매칭 (제품명 자리의 품목코드, 또는 제품명 완전 일치)"""
+        code_match = self.catalog_index.lookup(product_name)
+        if code_match:
+            return code_match
+        
+        for scoped_db in self.match_scopes(product_name, brand_hint):
+            for brand_name, brand_products in scoped_db.items():
+                for product_code, product_full_name in brand_products.items():
+                    if product_full_name.strip().lower() == product_name.strip().lower():
+                        return {
+                            "품목코드": product_code,
+                            "제품명": product_full_name,
+                            "브랜드": brand_name,
+                            "confidence": 100
+                        }
+        return None
+    
+    def match_product_to_code(self, product_name: str, brand_hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         제품명을 품목코드와 매칭 (브랜드별)
+        brand_hint: 메시지 전체에서 감지한 브랜드 (제품명에 브랜드가 없을 때 사용)
+        (여러 스레드에서 같은 제품명을 동시에 요청하면 한 번만 매칭하고 결과 공유)
         """
         if not self.products_db:
             return None
+        return self.inflight.do(("match", product_name, brand_hint),
+                                lambda: self._match_product_to_code(product_name, brand_hint))
+    
+    def _match_product_to_code(self, product_name: str, brand_hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        if self.local_only:
+            return self.local_match(product_name, brand_hint)
         
-        # 먼저 정확한 매칭 시도
-        for brand_name, brand_products in self.products_db.items():
-            for product_code, product_full_name in brand_products.items():
-                if product_full_name.strip().lower() == product_name.strip().lower():
-                    return {
-                        "품목코드": product_code,
-                        "제품명": product_full_name,
-                        "브랜드": brand_name,
-                        "confidence": 100
-                    }
+        # 먼저 품목코드/정확한 매칭 시도
+        exact = self.exact_match(product_name, brand_hint)
+        if exact:
+            return exact
         
-        # GPT를 사용한 유사 매칭
-        prompt = f"""
-다음 제품명과 가장 유사한 제품을 찾아주세요.
-
-찾을 제품명: "{product_name}"
-
-제품 데이터베이스 (브랜드별):
-{json.dumps(self.products_db, ensure_ascii=False, indent=2)}
-
-응답 형식:
-{{
-  "품목코드": "매칭된 품목코드",
-  "제품명": "매칭된 제품명",
-  "브랜드": "브랜드명",
-  "confidence": "매칭 신뢰도 (0-100)"
-}}
-
-규칙:
-1. 정확히 일치하는 제품이 있으면 그것을 선택
-2. 유사한 제품이 있으면 가장 유사한 것을 선택
-3. 신뢰도가 50 미만이면 null 반환
-4. JSON만 응답하고 다른 설명은 하지 마세요
-"""
-
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "당신은 제품명 매칭 전문가입니다. 정확한 매칭을 우선시하세요."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
+        # 브랜드를 알 수 있으면 해당 브랜드 제품만 후보로 사용 (힌트로 좁힌 범위에서 실패하면 전체 카탈로그)
+        for scoped_db in self.match_scopes(product_name, brand_hint):
+            # 최근 같은 범위에서 매칭에 실패한 문자열이면 GPT 없이 바로 거절
+            scope = next(iter(scoped_db)) if len(scoped_db) == 1 else "*"
+            if self.negative_cache:
+                self.negative_cache.check_catalog(self.prompts.catalog_hash)
+                if self.negative_cache.contains(product_name, scope):
+                    self.count("match_negative_hits")
+                    continue
             
-            content = response.choices[0].message.content.strip()
-            
-            # JSON 파싱
+            # GPT를 사용한 유사 매칭 (카탈로그 블록은 브랜드 범위별로 한 번만 직렬화되어 프롬프트 앞쪽에 고정)
+            # code 가 null 인 응답의 confidence 는 "카탈로그에 없음" 판단의 신뢰도 - 확신하면 승격하지 않음
             try:
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].strip()
-                
-                result = json.loads(content)
-                
-                # null 체크
-                if result is None or result.get("품목코드") is None:
-                    return None
-                
-                # 신뢰도 체크
-                confidence = result.get("confidence", 0)
-                if isinstance(confidence, str):
-                    try:
-                        confidence = float(confidence)
-                    except ValueError:
-                        confidence = 0
-                if confidence < 50:
-                    return None
-                
-                return result
-                
-            except json.JSONDecodeError as e:
-                print(f"매칭 결과 JSON 파싱 오류: {e}")
-                print(f"응답 내용: {content}")
+                choice = self._chat("match", self.prompts.match(product_name, scoped_db), max_tokens=100,
+                                    confidence=lambda c: c.confidence if c is not None else None)
+            except BatchPendingError:
+                # 배치 수집 회차: 요청은 다음 배치에 들어갔으므로 오류 기록/로컬 매칭 없이 결과만 비움
                 return None
-                
-        except Exception as e:
-            print(f"제품 매칭 API 오류: {e}")
-            return None
+            except CircuitOpenError:
+                return self.local_match(product_name, brand_hint)
+            except Exception as e:
+                # 항목을 버리지 않고 로컬 매칭 결과를 검토 필요로 남김
+                print(f"제품 매칭 API 오류: {e} - 로컬 매칭으로 대체")
+                return self.local_match(product_name, brand_hint)
+            
+            if choice is None:
+                continue
+            brand_name = next((name for name, brand_products in scoped_db.items()
+                               if choice.code in brand_products), None) if choice.code is not None else None
+            if brand_name is not None:
+                if choice.confidence >= 50:
+                    return {
+                        "품목코드": choice.code,
+                        "제품명": scoped_db[brand_name][choice.code],
+                        "브랜드": brand_name,
+                        "confidence": choice.confidence
+                    }
+                # 실제 품목코드를 낮은 신뢰도로 고른 경우는 카탈로그에 없다는 뜻이 아니므로 캐시하지 않음
+                continue
+            if choice.code is not None:
+                print(f"카탈로그에 없는 품목코드 응답: {choice.code}")
+            # "카탈로그에 없음" 응답과 카탈로그 밖 코드 응답만 미매칭으로 기억
+            if self.negative_cache:
+                self.negative_cache.add(product_name, scope)
+        return None
     
     def generate_summary(self, message_text: str, products: List[Dict[str, Any]]) -> str:
         """
         메시지 내용을 바탕으로 적요 생성
         """
-        if not message_text:
+        if not message_text or self.local_only:
             return "출고 처리"
         
-        prompt = f"""
-다음 메시지 내용을 바탕으로 간단한 적요를 생성해주세요.
-
-메시지: "{message_text[:200]}"
-추출된 제품: {len(products)}개
-
-규칙:
-1. 10자 이내로 간단하게
-2. 출고 관련 내용이면 "출고" 포함
-3. 특별한 내용이 없으면 "출고 처리"
-4. 텍스트만 응답하고 다른 설명은 하지 마세요
-"""
-
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "당신은 간단한 요약문을 생성하는 전문가입니다."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.1,
-                max_tokens=50
-            )
-            
-            summary = response.choices[0].message.content.strip()
+            summary = self._chat("summary", self.prompts.summary(message_text, len(products)), max_tokens=50)
             return summary[:10]  # 10자 제한
             
+        except BatchPendingError:
+            return "출고 처리"
         except Exception as e:
             print(f"적요 생성 오류: {e}")
             return "출고 처리"
     
-    def process_message_thread(self, message_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def extract_matched_products(self, text: str, brand_hint: Optional[str] = None) -> List[tuple]:
+        """
+        메시지 1개에서 (추출 제품, 매칭 결과) 목록 생성
+        "각 N개씩" 변형 주문과 품목코드를 직접 적은 구간은 인덱스로 바로 확정하고, 나머지 구간만 추출/매칭
+        """
+        pairs, text = self.catalog_index.expand_variant_orders(text, brand_hint)
+        if pairs:
+            print(f"변형 묶음 전개: {len(pairs)}개 품목 (추출/매칭 생략)")
+        
+        code_pairs, remaining = self.catalog_index.extract_code_items(text)
+        if code_pairs:
+            print(f"품목코드 직접 인식: {len(code_pairs)}개 (추출/매칭 생략)")
+            pairs.extend(code_pairs)
+            text = "\n".join(remaining)
+        
+        if not text.strip():
+            return pairs
+        if self.match_mode == "combined" and not self.local_only:
+            pairs.extend(self.extract_and_match_combined(text, brand_hint))
+            return pairs
+        for product in self.extract_products_from_text(text):
+            pairs.append((product, self.match_product_to_code(product["product_name"], brand_hint)))
+        return pairs
+    
+    def shortlist_candidates(self, text: str, brand_hint: Optional[str] = None) -> List[Dict[str, Any]]:
+        """메시지 구간별 로컬 TF-IDF 상위 후보를 합친 목록 (구간에서 감지한 브랜드 우선)"""
+        segments = split_segments(text) or [text]
+        brands = [self.brand_detector.detect(segment) or brand_hint for segment in segments]
+        candidates = {}
+        for row in self.local_matcher.match_batch(segments, top_k=self.shortlist_size, brands=brands):
+            for candidate in row:
+                candidates.setdefault(candidate["품목코드"], candidate)
+        return list(candidates.values())
+    
+    def extract_and_match_combined(self, text: str, brand_hint: Optional[str] = None) -> List[tuple]:
+        """
+        추출과 매칭을 한 번의 호출로 처리 (combined 모드)
+        로컬 후보 목록 안에서만 품목코드를 고르게 하여 프롬프트에 전체 카탈로그를 넣지 않음
+        """
+        # 규칙으로 모두 추출되고 전부 정확히 일치하면 호출 없음
+        if self.rule_extractor:
+            rule_result = self.rule_extractor.extract(text)
+            if rule_result.complete:
+                exact = [(item, self.exact_match(item["product_name"], brand_hint)) for item in rule_result.items]
+                if all(match for _, match in exact):
+                    return exact
+        
+        shortlist = self.shortlist_candidates(text, brand_hint)
+        if not shortlist:
+            return [(product, self.match_product_to_code(product["product_name"], brand_hint))
+                    for product in self.extract_products_from_text(text)]
+        by_code = {candidate["품목코드"]: candidate for candidate in shortlist}
+        
+        try:
+            items = self._chat("combined", self.prompts.combined(text, shortlist), max_tokens=1000,
+                               confidence=lowest_confidence)
+        except BatchPendingError:
+            return []
+        except CircuitOpenError:
+            return [(product, self.local_match(product["product_name"], brand_hint))
+                    for product in self.local_extract(text)]
+        except Exception as e:
+            print(f"통합 추출/매칭 오류: {e}")
+            return []
+        
+        pairs = []
+        for item in items or []:
+            product = dict(item.to_product(), extraction_method="combined")
+            candidate = by_code.get(item.code)
+            if candidate:
+                confidence = item.confidence if item.confidence is not None else 80
+                match = {"품목코드": candidate["품목코드"], "제품명": candidate["제품명"],
+                         "브랜드": candidate["브랜드"], "confidence": confidence}
+                pairs.append((product, match if confidence >= 50 else None))
+            else:
+                # 후보 밖의 제품만 기존 방식으로 매칭
+                pairs.append((product, self.match_product_to_code(product["product_name"], brand_hint)))
+        return pairs
+    
+    def is_order_message(self, text: str, subtype: Optional[str] = None) -> bool:
+        """분류기가 켜져 있으면 주문 메시지인지 판별 (꺼져 있으면 항상 True)"""
+        if not self.order_classifier:
+            return True
+        return self.order_classifier.should_extract(text, subtype)
+    
+    def process_message_thread(self, message_data: Any) -> List[Dict[str, Any]]:
         """
-        메시지 스레드 전체를 처리하여 제품 정보 추출
+        메시지 스레드 전체를 처리하여 제품 정보 추출 (SlackThread 또는 저장된 dict)
         """
+        thread = SlackThread.coerce(message_data)
+        
+        message_text = thread.text
+        # 제품명에 브랜드가 빠진 경우를 위해 스레드 단위로 브랜드 감지 (브랜드가 하나일 때만 힌트)
+        thread_brand = self.message_brand(message_text)
+        
+        if self.extraction_scope == "thread" and thread.replies and not self.local_only:
+            results = self.extract_thread_products(thread, thread_brand)
+        else:
+            results = self.extract_message_products(thread, thread_brand)
+        
+        # 적요 생성
+        if results:
+            all_text = message_text + " " + " ".join([reply.text for reply in thread.replies])
+            summary = self.generate_summary(all_text, results)
+            for result in results:
+                result["적요"] = summary
+        
+        return results
+    
+    @staticmethod
+    def build_result(product: Dict[str, Any], match_result: Dict[str, Any], source: str,
+                     message_text: str) -> Dict[str, Any]:
+        """추출 제품 + 매칭 결과를 집계용 레코드로 변환"""
+        result = {
+            "product_name": product["product_name"],
+            "quantity": product["quantity"],
+            "unit": product.get("unit", "개"),
+            "품목코드": match_result["품목코드"],
+            "매칭된_제품명": match_result["제품명"],
+            "브랜드": match_result["브랜드"],
+            "confidence": match_result["confidence"],
+            "source": source,
+            "message_text": message_text[:100]
+        }
+        if match_result.get("needs_review"):
+            result["needs_review"] = True
+        return result
+    
+    def extract_message_products(self, thread: SlackThread, thread_brand: Optional[str]) -> List[Dict[str, Any]]:
+        """원본 메시지와 댓글을 각각 따로 추출/매칭 (message 모드)"""
         results = []
         
         # 원본 메시지 처리
-        original_message = message_data.get("original_message", {})
-        message_text = original_message.get("text", "")
-        
-        if message_text:
+        message_text = thread.text
+        if message_text and self.is_order_message(message_text, thread.subtype):
             print(f"원본 메시지 처리: {message_text[:50]}...")
-            products = self.extract_products_from_text(message_text)
-            
-            for product in products:
-                # 품목코드 매칭
-                match_result = self.match_product_to_code(product["product_name"])
+            for product, match_result in self.extract_matched_products(message_text, thread_brand):
                 if match_result:
-                    results.append({
-                        "product_name": product["product_name"],
-                        "quantity": product["quantity"],
-                        "unit": product.get("unit", "개"),
-                        "품목코드": match_result["품목코드"],
-                        "매칭된_제품명": match_result["제품명"],
-                        "브랜드": match_result["브랜드"],
-                        "confidence": match_result["confidence"],
-                        "source": "original_message",
-                        "message_text": message_text[:100]
-                    })
+                    results.append(self.build_result(product, match_result, "original_message", message_text))
+                else:
+                    self.flag_unresolved(product, "no_match", message_text)
         
         # 스레드 댓글 처리
-        replies = message_data.get("thread_replies", [])
-        for reply in replies:
-            reply_text = reply.get("text", "")
-            if reply_text:
+        for reply in thread.replies:
+            reply_text = reply.text
+            if reply_text and self.is_order_message(reply_text, reply.subtype):
                 print(f"댓글 처리: {reply_text[:50]}...")
-                products = self.extract_products_from_text(reply_text)
+                reply_brand = self.message_brand(reply_text) or thread_brand
                 
-                for product in products:
-                    match_result = self.match_product_to_code(product["product_name"])
+                for product, match_result in self.extract_matched_products(reply_text, reply_brand):
                     if match_result:
-                        results.append({
-                            "product_name": product["product_name"],
-                            "quantity": product["quantity"],
-                            "unit": product.get("unit", "개"),
-                            "품목코드": match_result["품목코드"],
-                            "매칭된_제품명": match_result["제품명"],
-                            "브랜드": match_result["브랜드"],
-                            "confidence": match_result["confidence"],
-                            "source": "reply",
-                            "message_text": reply_text[:100]
-                        })
+                        results.append(self.build_result(product, match_result, "reply", reply_text))
+                    else:
+                        self.flag_unresolved(product, "no_match", reply_text)
         
-        # 적요 생성
-        if results:
-            all_text = message_text + " " + " ".join([reply.get("text", "") for reply in replies])
-            summary = self.generate_summary(all_text, results)
-            for result in results:
-                result["적요"] = summary
+        return results
+    
+    def extract_thread_products(self, thread: SlackThread, thread_brand: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        스레드 전체를 한 번에 보내 정정/취소 댓글까지 반영한 최종 제품 목록 추출 (thread 모드)
+        각 제품은 최종 확정된 메시지의 ts(source_ts)로 출처를 표시
+        """
+        # 확인 답글/이모지/봇 메시지만 빼고 시간순으로 (정정 댓글은 수량이 없어도 유지)
+        messages = [(thread.ts, thread.user, thread.text, thread.subtype, "원본 메시지")]
+        messages.extend((reply.ts, reply.user, reply.text, reply.subtype, "댓글") for reply in thread.replies)
+        kept = []
+        has_order = False
+        for ts, user, text, subtype, role in messages:
+            if not text:
+                continue
+            if self.order_classifier:
+                decision = self.order_classifier.decide(text, subtype)
+                if not decision.is_order and decision.reason != "no_quantity_or_keyword":
+                    continue
+                has_order = has_order or decision.is_order
+            else:
+                has_order = True
+            kept.append((ts, user, text, role))
+        if not has_order:
+            print(f"비주문 스레드 건너뜀: {thread.text[:30]}")
+            return []
+        
+        by_ts = {ts: text for ts, _, text, _ in kept}
+        transcript = "\n".join(f'[{i + 1}] ts={ts}, 작성자={user or "unknown"} ({role}): "{text}"'
+                                for i, (ts, user, text, role) in enumerate(kept))
+        
+        # combined 모드면 후보 목록도 함께 보내 매칭까지 한 번에 처리
+        shortlist = []
+        if self.match_mode == "combined":
+            shortlist = self.shortlist_candidates("\n".join(by_ts.values()), thread_brand)
+        by_code = {candidate["품목코드"]: candidate for candidate in shortlist}
+        
+        print(f"스레드 전체 처리: 메시지 {len(kept)}개")
+        try:
+            items = self._chat("thread", self.prompts.thread(transcript, shortlist), max_tokens=1500)
+        except BatchPendingError:
+            # 메시지별 대체 요청까지 배치에 넣지 않도록 스레드 요청만 남김
+            return []
+        except CircuitOpenError:
+            # 메시지별 로컬 추출/매칭으로 대체 (정정 댓글은 반영되지 않음)
+            return self.extract_message_products(thread, thread_brand)
+        except Exception as e:
+            # 스레드 주문을 버리지 않고 메시지별 처리로 대체 (정정 댓글은 반영되지 않음)
+            print(f"스레드 추출 오류: {e} - 메시지별 처리로 대체")
+            return self.extract_message_products(thread, thread_brand)
         
+        results = []
+        for item in items or []:
+            source_ts = item.source_ts if item.source_ts in by_ts else thread.ts
+            product = item.to_product()
+            
+            source_text = by_ts.get(source_ts, thread.text)
+            brand = self.message_brand(source_text) or thread_brand
+            
+            candidate = by_code.get(item.code)
+            if candidate:
+                # combined 모드와 같은 기준 (신뢰도 50 미만은 미확인)
+                confidence = item.confidence if item.confidence is not None else 80
+                matches = [{"품목코드": candidate["품목코드"], "제품명": candidate["제품명"],
+                            "브랜드": candidate["브랜드"], "confidence": confidence}] if confidence >= 50 else [None]
+            else:
+                # "컨실러 전 호수 각 2개" 같은 변형 묶음은 message 모드처럼 구체적인 품목으로 전개
+                members = self.catalog_index.expand_family_order(product["product_name"], brand) or []
+                if len(members) > 1:
+                    print(f"변형 묶음 전개: {len(members)}개 품목 (매칭 생략)")
+                    matches = members
+                else:
+                    matches = [self.match_product_to_code(product["product_name"], brand)]
+            
+            source = "original_message" if source_ts == thread.ts else "reply"
+            for match_result in matches:
+                if match_result:
+                    member = product if len(matches) == 1 else dict(product, product_name=match_result["제품명"])
+                    result = self.build_result(member, match_result, source, source_text)
+                    result["source_ts"] = source_ts
+                    results.append(result)
+                else:
+                    self.flag_unresolved(product, "no_match", source_text)
         return results
 
 if __name__ == "__main__":
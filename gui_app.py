@@ -8,6 +8,7 @@ import os
 from slack_fetcher import SlackFetcher
 from aggregator import DataAggregator
 from excel_generator import ExcelGenerator
+from run_deadline import RunDeadline
 
 class SlackOrderProcessorGUI:
     def __init__(self):
@@ -200,12 +201,16 @@ class SlackOrderProcessorGUI:
                 messagebox.showerror("오류", "날짜를 입력해주세요.")
                 return
             
+            # 실행 마감 (config.json 의 run_deadline / run_budget_minutes, 수집 시작 시점부터 계산)
+            deadline = RunDeadline.from_config(self.slack_fetcher.config)
+            self.slack_fetcher.deadline = deadline
+            self.aggregator.set_deadline(deadline)
+            
             # 1단계: Slack 데이터 수집
             self.root.after(0, lambda: self.status_var.set("Slack 메시지 수집 중..."))
             self.root.after(0, lambda: self.progress_var.set(20))
             
-            messages = self.slack_fetcher.fetch_messages(start_date, end_date)
-            processed_messages = self.slack_fetcher.process_messages_with_threads(messages)
+            processed_messages = self.slack_fetcher.fetch_all_channels(start_date, end_date)
             
             # 2단계: 데이터 집계
             self.root.after(0, lambda: self.status_var.set("데이터 집계 중..."))
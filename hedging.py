@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 호출 헤징 (꼬리 지연 완화)
+작업별 최근 지연시간 p95 를 넘긴 호출은 같은 요청을 한 번 더 보내고 먼저 끝난 응답을 사용
+중복 요청 비율은 max_rate 로 제한하고 통계로 노출
+지연시간과 헤징 타이머는 요청이 실제로 전송된 시점부터 (키/동시성 자리 대기는 서버 지연이 아니므로 제외)
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, Optional
+
+from model_policy import percentile
+
+
+class HedgeCancelled(Exception):
+    """다른 쪽 호출이 먼저 끝나 전송 전에 포기한 요청"""
+
+
+class SendClock:
+    """호출 1건이 실제로 전송된 시각 (mark() 를 부르지 않으면 호출 시작 시각)"""
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self.sent_at: Optional[float] = None
+        self.event = threading.Event()
+        self.cancelled = False
+
+    def mark(self):
+        """전송 직전 호출 (이미 승부가 났으면 HedgeCancelled 로 전송 포기)"""
+        if self.cancelled:
+            raise HedgeCancelled("다른 호출이 먼저 끝나 전송 생략")
+        if self.sent_at is None:
+            self.sent_at = time.perf_counter()
+        self.event.set()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - (self.sent_at if self.sent_at is not None else self.created)
+
+
+class RequestHedger:
+    def __init__(self, enabled: bool = False, max_rate: float = 0.05, min_samples: int = 20,
+                 window: int = 200, quantile: float = 0.95, max_workers: int = 32):
+        """
+        max_rate: 전체 호출 대비 중복 요청 비율 상한
+        min_samples: 작업별 지연시간이 이만큼 쌓이기 전에는 헤징하지 않음
+        window: 작업별로 기억하는 최근 지연시간 수
+        """
+        self.enabled = enabled
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.quantile = quantile
+        self.max_workers = max_workers
+        self.latencies: Dict[str, deque] = {}
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0}
+        self.lock = threading.Lock()
+        self._executor = None
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "RequestHedger":
+        """config.json 의 hedging ({"enabled": true, "max_rate": 0.05, "min_samples": 20})"""
+        options = config.get('hedging') or {}
+        return cls(enabled=bool(options.get('enabled', False)), max_rate=float(options.get('max_rate', 0.05)),
+                   min_samples=int(options.get('min_samples', 20)))
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self.lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="hedge")
+            return self._executor
+
+    def close(self):
+        """중복 요청용 스레드 풀 종료 (대기 중인 요청은 취소, 다음 헤징 때 새로 생성)"""
+        with self.lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def hedge_delay(self, task: str) -> Optional[float]:
+        """이 시간(초)이 지나도 끝나지 않으면 중복 요청 (표본이 부족하면 None)"""
+        with self.lock:
+            samples = list(self.latencies.get(task, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return percentile(samples, self.quantile)
+
+    def record(self, task: str, latency: float):
+        with self.lock:
+            self.latencies.setdefault(task, deque(maxlen=self.window)).append(latency)
+
+    def _take_budget(self) -> bool:
+        """중복 요청 비율 상한 안이면 1회분 차감"""
+        with self.lock:
+            if (self.stats["hedged"] + 1) > self.max_rate * self.stats["calls"]:
+                return False
+            self.stats["hedged"] += 1
+            return True
+
+    def run(self, task: str, call: Callable[[Callable[[], None]], Any]) -> Any:
+        """
+        call(sent) 을 실행하고 결과 반환
+        call 은 키/동시성 자리를 얻어 요청을 보내기 직전에 sent() 를 호출 (그 전의 대기는 타이머에서 제외)
+        전송 후 p95 를 넘기면 call 을 한 번 더 실행해 먼저 성공한 쪽을 사용 (늦은 쪽 응답은 버림)
+        늦은 쪽이 아직 전송 전이면 취소되어 키/동시성 자리를 바로 반환하고,
+        이미 전송됐으면 동기 HTTP 요청은 중간에 끊을 수 없으므로 끝날 때까지 자리를 유지
+        (실제로 진행 중인 요청이라 제한기와 키별 토큰 정산에 그대로 반영되어야 함)
+        """
+        with self.lock:
+            self.stats["calls"] += 1
+        clock = SendClock()
+        delay = self.hedge_delay(task) if self.enabled else None
+        if delay is None:
+            result = call(clock.mark)
+            self.record(task, clock.elapsed())
+            return result
+
+        primary = self.executor.submit(call, clock.mark)
+        # 전송될 때까지(또는 전송 전에 끝날 때까지) 기다린 뒤 헤징 타이머 시작
+        primary.add_done_callback(lambda _: clock.event.set())
+        clock.event.wait()
+        done, _ = wait([primary], timeout=delay)
+        if done or not self._take_budget():
+            result = primary.result()
+            self.record(task, clock.elapsed())
+            return result
+
+        print(f"{task} 호출이 p95({delay:.2f}초)를 넘어 중복 요청")
+        hedge_clock = SendClock()
+        hedge = self.executor.submit(call, hedge_clock.mark)
+        clocks = {primary: clock, hedge: hedge_clock}
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self.lock:
+                            self.stats["hedge_wins"] += 1
+                    for loser in pending:
+                        clocks[loser].cancelled = True
+                        loser.cancel()
+                    # 지연시간은 이긴 호출 자신의 전송 시각부터
+                    self.record(task, clocks[future].elapsed())
+                    return future.result()
+                if error is None or future is primary:
+                    error = future.exception()
+        raise error
+
+    def summary(self) -> Dict[str, Any]:
+        """호출 수, 중복 요청 수/비율, 중복 요청이 먼저 끝난 횟수, 작업별 현재 p95"""
+        with self.lock:
+            calls = self.stats["calls"]
+            p95 = {task: round(percentile(list(samples), self.quantile), 3)
+                   for task, samples in self.latencies.items()}
+            return dict(self.stats, hedge_rate=round(self.stats["hedged"] / calls, 4) if calls else 0.0, p95=p95)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+JSONL 스트리밍 저장/로드
+레코드(스레드) 하나당 한 줄, 확장자에 따라 gzip(.gz) / zstd(.zst) 압축
+"""
+
+import gzip
+import io
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, Any, Optional
+
+JSONL_SUFFIXES = (".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def is_jsonl_path(path: str) -> bool:
+    """JSONL 저장 경로인지 확인"""
+    return path.endswith(JSONL_SUFFIXES)
+
+
+def open_text(path: str, mode: str = "r"):
+    """
+    압축 형식을 확장자로 판별하여 텍스트 스트림 열기
+    mode: "r", "w" 또는 "a" (압축 파일에 이어 쓰면 새 압축 단위가 뒤에 붙고, 읽을 때 이어서 읽음)
+    """
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding='utf-8')
+
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd 압축에는 zstandard 패키지가 필요합니다: pip install zstandard")
+        raw = open(path, mode + "b")
+        if mode in ("w", "a"):
+            stream = zstandard.ZstdCompressor(level=10).stream_writer(raw, closefd=True)
+        else:
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True, read_across_frames=True)
+        return io.TextIOWrapper(stream, encoding='utf-8')
+
+    return open(path, mode, encoding='utf-8')
+
+
+class JsonlWriter:
+    """레코드를 생성되는 즉시 한 줄씩 기록 (여러 스레드에서 동시에 써도 안전)"""
+
+    def __init__(self, path: str, append: bool = False):
+        """append: 기존 파일 뒤에 이어서 기록 (기본은 새로 씀)"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.stream = open_text(path, "a" if append else "w")
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str) + "\n"
+        with self.lock:
+            self.stream.write(line)
+            self.count += 1
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_jsonl(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """레코드 전체를 JSONL 로 저장하고 건수 반환"""
+    with JsonlWriter(path) as writer:
+        for record in records:
+            writer.write(record)
+        return writer.count
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """JSONL 파일을 한 줄씩 지연 로드"""
+    with open_text(path, "r") as stream:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def iter_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    저장된 레코드 순회
+    - JSONL: 한 줄씩 지연 로드
+    - 기존 JSON 배열: 한 번에 읽은 뒤 순회 (하위 호환)
+    """
+    if is_jsonl_path(path):
+        yield from iter_jsonl(path)
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    yield from data if isinstance(data, list) else [data]
+
+
+def find_existing(*paths: str) -> Optional[str]:
+    """후보 경로 중 처음 존재하는 파일 반환"""
+    for path in paths:
+        if os.path.exists(path):
+            return path
+    return None
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+OpenAI API 키(조직/프로젝트) 풀
+키마다 분당 요청 수/토큰 수 버킷과 상태(연속 실패, 일시 제외, 인증 실패로 사용 중지)를 두고
+여유가 있는 건강한 키로 요청을 나눠 보냄
+"""
+
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+from rate_limit import TokenBucket
+from adaptive_concurrency import parse_reset
+
+# 이 상태코드는 키 자체가 잘못된 것이므로 풀에서 제외
+AUTH_ERROR_STATUS = {401, 403}
+
+
+def estimate_request_tokens(messages: List[Dict[str, str]], max_tokens: int) -> int:
+    """요청 토큰 수 상한 추정 (한글은 글자당 약 1토큰, 영문/숫자는 약 4글자당 1토큰 + 최대 응답 토큰)"""
+    total = 0
+    for message in messages:
+        text = message.get("content") or ""
+        wide = sum(1 for ch in text if ord(ch) > 0x7f)
+        total += wide + (len(text) - wide) // 4 + 1
+    return total + max_tokens
+
+
+def mask_key(api_key: str) -> str:
+    return f"{api_key[:3]}...{api_key[-4:]}" if api_key and len(api_key) > 8 else "key"
+
+
+class PooledKey:
+    """풀 안의 키 1개 (클라이언트 + 버킷 + 상태)"""
+
+    def __init__(self, name: str, client: Any, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None):
+        self.name = name
+        self.client = client
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, burst=tokens_per_minute / 6.0) if tokens_per_minute else None
+        self.in_flight = 0
+        self.failures = 0
+        self.cooldown_until = 0.0
+        self.disabled = False
+        self.stats = {"requests": 0, "tokens": 0, "errors": 0, "rate_limited": 0}
+
+    def available(self, now: float) -> bool:
+        return not self.disabled and now >= self.cooldown_until
+
+    def try_reserve(self, estimated_tokens: int) -> float:
+        """요청 1건 + 예상 토큰을 차감 (반환: 0 이면 성공, 아니면 기다려야 할 시간)"""
+        if self.requests:
+            wait = self.requests.try_acquire(1)
+            if wait > 0:
+                return wait
+        if self.tokens:
+            wait = self.tokens.try_acquire(estimated_tokens)
+            if wait > 0:
+                if self.requests:
+                    self.requests.refund(1)
+                return wait
+        return 0.0
+
+
+class KeyPool:
+    def __init__(self, keys: List[PooledKey], unhealthy_after: int = 3, unhealthy_cooldown: float = 60.0):
+        """
+        unhealthy_after: 연속 실패가 이 횟수가 되면 unhealthy_cooldown 초 동안 제외
+        """
+        if not keys:
+            raise ValueError("API 키가 없습니다")
+        self.keys = keys
+        self.unhealthy_after = unhealthy_after
+        self.unhealthy_cooldown = unhealthy_cooldown
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], client_factory, client: Optional[Any] = None) -> "KeyPool":
+        """
+        config.json 의 openai_api_keys (없으면 openai_api_key 1개)
+        항목: "sk-..." 또는 {"api_key", "organization", "project", "requests_per_minute", "tokens_per_minute"}
+        client_factory(항목 dict) -> OpenAI 클라이언트, client 를 주면 그 클라이언트 1개로 구성
+        """
+        if client is not None:
+            return cls([PooledKey("injected", client)])
+        entries = config.get('openai_api_keys') or [{
+            "api_key": config['openai_api_key'],
+            "requests_per_minute": config.get('openai_requests_per_minute'),
+            "tokens_per_minute": config.get('openai_tokens_per_minute')
+        }]
+        keys = []
+        for i, entry in enumerate(entries, 1):
+            if isinstance(entry, str):
+                entry = {"api_key": entry}
+            name = f"key{i}({mask_key(entry['api_key'])}" + (f"/{entry['project']})" if entry.get("project") else ")")
+            keys.append(PooledKey(name, client_factory(entry), entry.get("requests_per_minute"),
+                                  entry.get("tokens_per_minute")))
+        return cls(keys, int(config.get('key_unhealthy_after', 3)), float(config.get('key_unhealthy_cooldown', 60)))
+
+    def acquire(self, estimated_tokens: int) -> PooledKey:
+        """
+        여유가 있는 건강한 키 선택 (진행 중 요청이 적은 키, 그다음 덜 쓴 키 우선)
+        모두 한도에 걸려 있으면 가장 빨리 풀리는 만큼 대기
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                candidates = [key for key in self.keys if key.available(now)]
+                if not candidates:
+                    if all(key.disabled for key in self.keys):
+                        raise RuntimeError("사용 가능한 API 키가 없습니다 (모두 인증 실패)")
+                    wait = min(key.cooldown_until for key in self.keys if not key.disabled) - now
+                else:
+                    candidates.sort(key=lambda key: (key.in_flight, key.stats["requests"]))
+                    waits = []
+                    for key in candidates:
+                        wait = key.try_reserve(estimated_tokens)
+                        if wait <= 0:
+                            key.in_flight += 1
+                            key.stats["requests"] += 1
+                            return key
+                        waits.append(wait)
+                    wait = min(waits)
+            time.sleep(min(max(wait, 0.01), 5.0))
+
+    def release(self, key: PooledKey, estimated_tokens: int, used_tokens: Optional[int] = None,
+                status: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        """
+        요청 결과 반영
+        성공(status None): 실제 토큰 사용량으로 토큰 버킷 정산, 연속 실패 초기화
+        429: retry-after 만큼 제외, 401/403: 사용 중지, 그 외 오류(timeout 포함): 연속 실패 누적
+        """
+        with self.lock:
+            key.in_flight -= 1
+            if status is None:
+                key.failures = 0
+                if used_tokens is not None:
+                    key.stats["tokens"] += used_tokens
+                    if key.tokens:
+                        key.tokens.refund(estimated_tokens - used_tokens)
+                return
+            key.stats["errors"] += 1
+            if status in AUTH_ERROR_STATUS:
+                key.disabled = True
+                print(f"API 키 사용 중지 ({key.name}): 인증 오류 {status}")
+                return
+            if status == 429:
+                key.stats["rate_limited"] += 1
+                # 서버가 알려준 시간만큼만 이 키를 제외 (없으면 동시성 제한기의 감속에 맡김)
+                retry_after = parse_reset((headers or {}).get("retry-after"))
+                if retry_after:
+                    key.cooldown_until = max(key.cooldown_until, time.monotonic() + retry_after)
+                    if key.requests:
+                        key.requests.penalize(retry_after)
+                return
+            key.failures += 1
+            if key.failures >= self.unhealthy_after:
+                key.cooldown_until = time.monotonic() + self.unhealthy_cooldown
+                key.failures = 0
+                print(f"API 키 일시 제외 ({key.name}): 연속 실패 - {self.unhealthy_cooldown:.0f}초")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        with self.lock:
+            now = time.monotonic()
+            return {key.name: dict(key.stats, state="disabled" if key.disabled else
+                                   "cooldown" if now < key.cooldown_until else "ok")
+                    for key in self.keys}
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+실시간 이벤트 기반 집계
+Slack message 이벤트가 도착하는 즉시 추출·매칭하여 일자별 집계를 미리 계산
+"""
+
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from aggregator import DataAggregator
+from slack_records import SlackThread, SlackReply
+
+# 주문 내용으로 처리할 message 이벤트 subtype (None = 일반 메시지)
+HANDLED_SUBTYPES = {None, "file_share", "thread_broadcast"}
+
+
+class LiveAggregator:
+    def __init__(self, aggregator: DataAggregator, fetcher: Optional[Any] = None,
+                 channel_ids: Optional[List[str]] = None, workers: int = 2, seen_limit: int = 10000):
+        """
+        실시간 집계 클래스 초기화
+        fetcher: 첨부 Excel 다운로드용 SlackFetcher (없으면 첨부 파일 무시)
+        channel_ids: 처리할 채널 목록 (없으면 모든 채널)
+        seen_limit: 중복 제거용으로 기억하는 최근 이벤트 수 (넘으면 오래된 것부터 잊음)
+        """
+        self.aggregator = aggregator
+        self.fetcher = fetcher
+        self.channel_ids = set(channel_ids) if channel_ids else None
+        self.queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+        self.lock = threading.Lock()
+        # 날짜 -> {"products": [...], "thread_summaries": {index: summary}, "threads": {thread_ts: index},
+        #         "unresolved": [...], "degraded": bool}
+        self.days: Dict[str, Dict[str, Any]] = {}
+        self.seen: "OrderedDict[tuple, None]" = OrderedDict()
+        self.seen_limit = seen_limit
+        self.stats = {"received": 0, "ignored": 0, "processed": 0, "errors": 0}
+
+        for _ in range(max(1, workers)):
+            worker = threading.Thread(target=self._worker, daemon=True)
+            worker.start()
+
+    def handle_event(self, event: Dict[str, Any]) -> bool:
+        """
+        Slack message 이벤트 접수 (HTTP 수신기/소켓 모드 공용)
+        처리 대상이면 큐에 넣고 True 반환, 즉시 응답할 수 있도록 처리는 워커에서 수행
+        """
+        with self.lock:
+            self.stats["received"] += 1
+
+            if event.get("type") != "message" or event.get("subtype") not in HANDLED_SUBTYPES:
+                self.stats["ignored"] += 1
+                return False
+            if self.channel_ids and event.get("channel") not in self.channel_ids:
+                self.stats["ignored"] += 1
+                return False
+
+            # Slack 재전송 중복 제거 (재전송은 몇 분 안에 오므로 최근 이벤트만 기억)
+            event_key = (event.get("channel"), event.get("ts"))
+            if event_key in self.seen:
+                self.stats["ignored"] += 1
+                return False
+            self.seen[event_key] = None
+            if len(self.seen) > self.seen_limit:
+                self.seen.popitem(last=False)
+
+        self.queue.put(event)
+        return True
+
+    def _worker(self):
+        while True:
+            event = self.queue.get()
+            try:
+                self.ingest(event)
+            except Exception as e:
+                with self.lock:
+                    self.stats["errors"] += 1
+                print(f"실시간 이벤트 처리 오류: {e}")
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    def event_date(ts: str) -> str:
+        """Slack ts 를 집계 날짜(YYYY-MM-DD)로 변환"""
+        return datetime.fromtimestamp(float(ts)).strftime('%Y-%m-%d')
+
+    def build_message_data(self, event: Dict[str, Any]) -> SlackThread:
+        """이벤트를 process_messages_with_threads 와 같은 SlackThread 레코드로 변환"""
+        ts = event["ts"]
+        thread_ts = event.get("thread_ts")
+        is_reply = bool(thread_ts) and thread_ts != ts
+
+        if is_reply:
+            # 댓글은 원본 없이 댓글 하나만 가진 스레드로 처리
+            message_data = SlackThread(ts=thread_ts, user=None, text="", thread_ts=thread_ts,
+                                       replies=[SlackReply.from_slack(event)])
+        else:
+            message_data = SlackThread.from_slack(event)
+
+        if self.fetcher and event.get("files"):
+            for file_info in event["files"]:
+                if file_info.get("filetype") in ["xls", "xlsx"]:
+                    filepath = self.fetcher.download_file(file_info)
+                    if filepath:
+                        message_data.downloaded_files.append({
+                            "name": file_info.get("name"),
+                            "filepath": filepath
+                        })
+
+        return message_data
+
+    def ingest(self, event: Dict[str, Any]):
+        """이벤트 1건을 추출·매칭하여 해당 날짜 집계에 반영"""
+        message_data = self.build_message_data(event)
+        day = self.event_date(message_data.ts)
+
+        with self.lock:
+            state = self.days.setdefault(day, {"products": [], "thread_summaries": {}, "threads": {},
+                                               "unresolved": [], "degraded": False})
+            thread_index = state["threads"].setdefault(message_data.ts, len(state["threads"]))
+
+        # 미확인 항목은 공유 목록(계속 늘어남) 대신 이 이벤트의 목록으로 받아 날짜별로 보관
+        matcher = self.aggregator.gpt_matcher
+        unresolved = []
+        matcher.unresolved_sink.items = unresolved
+        try:
+            products, thread_summary = self.aggregator.process_thread(message_data, thread_index)
+        finally:
+            matcher.unresolved_sink.items = None
+        # 서버가 언제 종료될지 모르므로 이벤트마다 분류 로그를 닫아 압축 파일을 완결
+        classifier = self.aggregator.gpt_matcher.order_classifier
+        if classifier:
+            classifier.close()
+
+        with self.lock:
+            state["products"].extend(products)
+            state["unresolved"].extend(unresolved)
+            state["degraded"] = state["degraded"] or matcher.local_only
+            # 스레드당 요약은 하나만 유지 (원본 메시지 요약 우선)
+            if thread_summary and thread_index not in state["thread_summaries"]:
+                state["thread_summaries"][thread_index] = thread_summary
+            self.stats["processed"] += 1
+
+        print(f"실시간 처리 완료: {day} 스레드 {thread_index} - 제품 {len(products)}개")
+
+    def snapshot(self, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        미리 계산된 결과로 aggregate_products 와 같은 형태의 집계 반환
+        day 가 없으면 오늘 날짜
+        """
+        day = day or datetime.now().strftime('%Y-%m-%d')
+        with self.lock:
+            state = self.days.get(day, {"products": [], "thread_summaries": {}, "unresolved": [], "degraded": False})
+            products = list(state["products"])
+            thread_summaries = [state["thread_summaries"][i] for i in sorted(state["thread_summaries"])]
+            unresolved = list(state["unresolved"])
+        return self.aggregator.build_aggregated_result(products, thread_summaries, unresolved, state["degraded"])
+
+    def get_status(self) -> Dict[str, Any]:
+        """접수/처리 통계와 날짜별 스레드·제품 수"""
+        with self.lock:
+            return {
+                **self.stats,
+                "pending": self.queue.qsize(),
+                "days": {
+                    day: {"threads": len(state["threads"]), "products": len(state["products"])}
+                    for day, state in sorted(self.days.items())
+                }
+            }
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 작업별 JSON 스키마와 응답 검증
+response_format(json_schema, strict) 으로 응답 형태를 고정하고,
+받은 JSON 을 작업별 타입 객체로 검증하여 변환 (검증 실패 시 SchemaValidationError)
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Union
+
+
+class SchemaValidationError(ValueError):
+    """LLM 응답이 작업 스키마와 맞지 않음"""
+
+
+def _nullable(kind: str) -> Dict[str, Any]:
+    return {"type": [kind, "null"]}
+
+
+_ITEM_FIELDS = {
+    "product_name": {"type": "string"},
+    "quantity": {"type": "number"},
+    "unit": {"type": "string"}
+}
+
+
+def _items_schema(extra_fields: Dict[str, Any]) -> Dict[str, Any]:
+    fields = dict(_ITEM_FIELDS, **extra_fields)
+    return {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": fields,
+                    "required": list(fields),
+                    "additionalProperties": False
+                }
+            }
+        },
+        "required": ["items"],
+        "additionalProperties": False
+    }
+
+
+# 작업별 스키마 (strict 모드: 모든 필드 required, 추가 필드 금지)
+SCHEMAS: Dict[str, Dict[str, Any]] = {
+    "extract": _items_schema({}),
+    "match": {
+        "type": "object",
+        "properties": {"code": _nullable("string"), "confidence": {"type": "number"}},
+        "required": ["code", "confidence"],
+        "additionalProperties": False
+    },
+    "combined": _items_schema({"code": _nullable("string"), "confidence": {"type": "number"}}),
+    "thread": _items_schema({"code": _nullable("string"), "confidence": {"type": "number"},
+                             "source_ts": {"type": "string"}})
+}
+
+
+def response_format(task: str) -> Dict[str, Any]:
+    """chat.completions.create 의 response_format 인자"""
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": f"{task}_result", "strict": True, "schema": SCHEMAS[task]}
+    }
+
+
+@dataclass
+class ExtractedItem:
+    product_name: str
+    quantity: Union[int, float]
+    unit: str
+    code: Optional[str] = None
+    confidence: Optional[float] = None
+    source_ts: Optional[str] = None
+
+    def to_product(self) -> Dict[str, Any]:
+        """기존 추출 결과 dict 형태 ({product_name, quantity, unit})"""
+        return {"product_name": self.product_name, "quantity": self.quantity, "unit": self.unit}
+
+
+@dataclass
+class MatchChoice:
+    code: Optional[str]
+    confidence: float
+
+
+def _number(value: Any, field_name: str) -> Union[int, float]:
+    if isinstance(value, bool):
+        raise SchemaValidationError(f"{field_name}: 숫자가 아닙니다 ({value!r})")
+    if isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            raise SchemaValidationError(f"{field_name}: 숫자가 아닙니다 ({value!r})")
+    if not isinstance(value, (int, float)):
+        raise SchemaValidationError(f"{field_name}: 숫자가 아닙니다 ({value!r})")
+    return int(value) if float(value).is_integer() else float(value)
+
+
+def _optional_str(value: Any) -> Optional[str]:
+    if value is None or value == "" or str(value).lower() == "null":
+        return None
+    return str(value)
+
+
+def parse_response(task: str, content: Optional[str]) -> Union[List[ExtractedItem], MatchChoice]:
+    """
+    응답 본문을 작업별 타입 객체로 변환
+    - extract / combined / thread: List[ExtractedItem]
+    - match: MatchChoice
+    """
+    if not content:
+        raise SchemaValidationError("빈 응답")
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise SchemaValidationError(f"JSON 파싱 실패: {e}")
+
+    if task == "match":
+        if not isinstance(data, dict) or "code" not in data:
+            raise SchemaValidationError("match: code 필드가 없습니다")
+        return MatchChoice(code=_optional_str(data.get("code")),
+                           confidence=_number(data.get("confidence", 0), "confidence"))
+
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        raise SchemaValidationError(f"{task}: items 배열이 없습니다")
+    items = []
+    for i, raw in enumerate(data["items"]):
+        if not isinstance(raw, dict):
+            raise SchemaValidationError(f"items[{i}]: 객체가 아닙니다")
+        name = str(raw.get("product_name") or "").strip()
+        if not name:
+            raise SchemaValidationError(f"items[{i}].product_name 이 비어 있습니다")
+        quantity = _number(raw.get("quantity"), f"items[{i}].quantity")
+        if quantity <= 0:
+            raise SchemaValidationError(f"items[{i}].quantity 는 0보다 커야 합니다")
+        items.append(ExtractedItem(
+            product_name=name,
+            quantity=quantity,
+            unit=str(raw.get("unit") or "개"),
+            code=_optional_str(raw.get("code")),
+            confidence=_number(raw["confidence"], f"items[{i}].confidence") if raw.get("confidence") is not None else None,
+            source_ts=_optional_str(raw.get("source_ts"))
+        ))
+    return items
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 from slack_fetcher import SlackFetcher
 from aggregator import DataAggregator
 from excel_generator import ExcelGenerator
+from run_deadline import RunDeadline
 
 def load_config():
     """설정 파일 로드"""
@@ -61,7 +62,12 @@ def main():
         
         # 1. Slack 데이터 수집
         print("\n1️⃣ Slack 데이터 수집 중...")
+        # 실행 마감 (config.json 의 run_deadline / run_budget_minutes)
+        deadline = RunDeadline.from_config(config)
+        if deadline:
+            print(f"실행 마감: {deadline.summary()['deadline']}")
         fetcher = SlackFetcher()
+        fetcher.deadline = deadline
         messages = fetcher.fetch_messages(start_date, end_date)
         
         if not messages:
@@ -77,7 +83,7 @@ def main():
         
         # 2. 데이터 집계
         print("\n2️⃣ 데이터 집계 중...")
-        aggregator = DataAggregator()
+        aggregator = DataAggregator(deadline=deadline)
         aggregated_data = aggregator.aggregate_products(processed_messages)
         
         aggregated_by_brand = aggregated_data.get("aggregated_by_brand", {})
@@ -102,6 +108,8 @@ def main():
         
         # 3. 브랜드별 Excel 생성
         print("\n3️⃣ 브랜드별 Excel 파일 생성 중...")
+        if deadline:
+            deadline.start_stage("excel")
         generator = ExcelGenerator()
         
         # 출력 디렉토리 생성
@@ -14,6 +14,7 @@ try:
     from slack_fetcher import SlackFetcher
     from aggregator import DataAggregator
     from excel_generator import ExcelGenerator
+    from run_deadline import RunDeadline
 except ImportError as e:
     print(f"❌ 모듈 import 오류: {e}")
     print("필요한 파일들이 같은 폴더에 있는지 확인하세요.")
@@ -69,23 +70,24 @@ def main():
         
         # 1. Slack 데이터 수집
         print("\n1. Slack 데이터 수집 중...")
+        # 실행 마감 (config.json 의 run_deadline / run_budget_minutes)
+        deadline = RunDeadline.from_config(config)
+        if deadline:
+            print(f"실행 마감: {deadline.summary()['deadline']}")
         fetcher = SlackFetcher()
-        messages = fetcher.fetch_messages(start_date, end_date)
+        fetcher.deadline = deadline
+        processed_messages = fetcher.fetch_all_channels(start_date, end_date)
         
-        if not messages:
+        if not processed_messages:
             print("해당 기간에 메시지가 없습니다.")
             input("엔터를 눌러 종료하세요...")
             return
         
-        print(f"수집된 메시지: {len(messages)}개")
-        
-        # 메시지 처리
-        processed_messages = fetcher.process_messages_with_threads(messages)
         print(f"처리된 메시지: {len(processed_messages)}개")
         
         # 2. 데이터 집계
         print("\n2. 데이터 집계 중...")
-        aggregator = DataAggregator()
+        aggregator = DataAggregator(deadline=deadline)
         aggregated_data = aggregator.aggregate_products(processed_messages)
         
         aggregated_by_brand = aggregated_data.get("aggregated_by_brand", {})
@@ -110,6 +112,8 @@ def main():
         
         # 3. 브랜드별 Excel 생성
         print("\n3. 브랜드별 Excel 파일 생성 중...")
+        if deadline:
+            deadline.start_stage("excel")
         generator = ExcelGenerator()
         
         # 출력 디렉토리 생성
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+GPT 호출 전 주문 메시지 분류기
+subtype, 길이, 숫자/단위 유무, 확인 답글, 이모지만 있는 메시지, 카탈로그 키워드로
+주문/비주문을 판별하여 비주문 메시지의 추출을 건너뜀
+"""
+
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from jsonl_store import JsonlWriter
+from rule_extractor import QUANTITY_WITH_UNIT, clean_slack_text
+from tfidf_matcher import normalize_name
+
+# 주문 내용이 있을 수 없는 Slack subtype
+NON_ORDER_SUBTYPES = {
+    "channel_join", "channel_leave", "channel_topic", "channel_purpose", "channel_name",
+    "channel_archive", "channel_unarchive", "group_join", "group_leave", "bot_message",
+    "bot_add", "bot_remove", "pinned_item", "unpinned_item", "reminder_add",
+    "message_deleted", "tombstone", "huddle_thread"
+}
+
+# 메시지 전체가 이런 확인/인사 답글이면 비주문
+ACK_PATTERN = re.compile(
+    r"^(?:네+|넵+|넹+|예+|ㅇㅇ|ㅇㅋ|오케이|ok(?:ay)?|확인(?:했습니다|했어요|했습니다요|요|완료)?|알겠습니다|"
+    r"감사합니다|감사해요|고맙습니다|수고하셨습니다|수고하세요|(?:출고|처리|발송|전달)\s*완료(?:했습니다|됐습니다|되었습니다)?|"
+    r"완료(?:했습니다|됐습니다|되었습니다)?|처리했습니다|반영했습니다|좋아요|ㄳ|ㄱㅅ|ㅎㅎ+|ㅋㅋ+)"
+    r"[\s.!~^ㅎㅋ]*(?:감사합니다|감사해요)?[\s.!~^]*$",
+    re.IGNORECASE
+)
+
+_WORD = re.compile(r"[0-9A-Za-z가-힣]+")
+_PARTICLES = ("으로", "에서", "이랑", "랑", "를", "을", "은", "는", "이", "가", "도", "로", "와", "과")
+
+
+@dataclass
+class OrderDecision:
+    """분류 결과 (reason 은 임계값 조정을 위한 판별 근거)"""
+    is_order: bool
+    reason: str
+
+
+class OrderMessageClassifier:
+    def __init__(self, products_db: Optional[Dict[str, Dict[str, str]]] = None, min_length: int = 2,
+                 log_path: Optional[str] = None):
+        """
+        products_db: {브랜드: {품목코드: 제품명}} - 제품명 단어와 브랜드명을 키워드로 사용
+        min_length: 정규화 후 이보다 짧은 메시지는 비주문
+        log_path: 판별 결과를 JSONL 로 기록할 경로 (config.json 의 classifier_log_path)
+                  실행마다 이어서 기록하며, 처음 기록할 때 열고 close() 에서 닫음
+        """
+        self.min_length = min_length
+        self.keywords = set()
+        for brand_name, brand_products in (products_db or {}).items():
+            self.keywords.update(self._words(brand_name))
+            for product_code, product_name in brand_products.items():
+                self.keywords.add(str(product_code))
+                self.keywords.update(self._words(product_name))
+        # 판별 사유별 횟수 (집계 작업 스레드 여러 개가 동시에 판별하므로 stats_lock 으로 보호)
+        self.decisions = Counter()
+        self.stats_lock = threading.Lock()
+        self.log_path = log_path
+        self.log: Optional[JsonlWriter] = None
+        self.log_lock = threading.Lock()
+
+    @staticmethod
+    def _words(text: str) -> Iterable[str]:
+        """키워드로 쓸 만한 단어 (2자 이상, 숫자만으로 된 단어 제외)"""
+        for word in _WORD.findall(text.lower()):
+            if len(word) >= 2 and not word.isdigit():
+                yield word
+
+    def keyword_hit(self, text: str) -> Optional[str]:
+        """카탈로그 단어(조사를 뗀 형태 포함)나 품목코드가 메시지에 있으면 그 단어"""
+        for word in _WORD.findall(text.lower()):
+            if word in self.keywords:
+                return word
+            for particle in _PARTICLES:
+                if word.endswith(particle) and word[:-len(particle)] in self.keywords:
+                    return word[:-len(particle)]
+        return None
+
+    def classify(self, text: str, subtype: Optional[str] = None) -> OrderDecision:
+        """메시지 1개를 주문/비주문으로 판별"""
+        if subtype in NON_ORDER_SUBTYPES:
+            return OrderDecision(False, f"subtype:{subtype}")
+
+        cleaned = clean_slack_text(text).strip()
+        if len(normalize_name(cleaned)) < self.min_length:
+            return OrderDecision(False, "empty_or_emoji")
+        if ACK_PATTERN.match(cleaned):
+            return OrderDecision(False, "acknowledgement")
+        if QUANTITY_WITH_UNIT.search(cleaned):
+            return OrderDecision(True, "quantity_unit")
+
+        hit = self.keyword_hit(cleaned)
+        if hit:
+            return OrderDecision(True, f"catalog_keyword:{hit}")
+        # 단위 없는 숫자("컨실러 10")는 놓치는 비용이 더 크므로 주문으로 취급
+        if re.search(r"\d", cleaned):
+            return OrderDecision(True, "digits")
+        return OrderDecision(False, "no_quantity_or_keyword")
+
+    def decide(self, text: str, subtype: Optional[str] = None) -> OrderDecision:
+        """판별 후 통계/로그를 남기고 판별 결과 반환"""
+        decision = self.classify(text, subtype)
+        with self.stats_lock:
+            self.decisions[decision.reason.split(":")[0]] += 1
+        if self.log_path:
+            with self.log_lock:
+                if self.log is None:
+                    self.log = JsonlWriter(self.log_path, append=True)
+                self.log.write({"text": (text or "")[:200], "subtype": subtype,
+                                "is_order": decision.is_order, "reason": decision.reason})
+        return decision
+
+    def should_extract(self, text: str, subtype: Optional[str] = None) -> bool:
+        """판별 후 통계/로그를 남기고 추출 여부 반환"""
+        decision = self.decide(text, subtype)
+        if not decision.is_order:
+            print(f"비주문 메시지 건너뜀 ({decision.reason}): {(text or '')[:30]}")
+        return decision.is_order
+
+    def close(self):
+        """판별 로그 닫기 (.gz/.zst 는 닫아야 파일이 완결됨, 다음 기록 때 다시 열어 이어 씀)"""
+        with self.log_lock:
+            if self.log:
+                self.log.close()
+                self.log = None
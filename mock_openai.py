@@ -0,0 +1,535 @@
+# -*- coding: utf-8 -*-
+"""
+OpenAI 호환 로컬 스탠드인
+실제 API 없이 LLM 단계를 재현 가능하게 벤치마크하기 위한 모의 클라이언트
+"""
+
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from difflib import SequenceMatcher
+from types import SimpleNamespace
+from typing import Dict, List, Any, Optional
+
+
+def to_namespace(value: Any) -> Any:
+    """dict/list 응답을 openai 응답 객체처럼 속성 접근이 가능하도록 변환"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(v) for v in value]
+    return value
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 근사치 (한글은 글자당 약 1토큰, 영문/숫자는 약 4글자당 1토큰)"""
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) > 0x7f)
+    narrow = len(text) - wide
+    return max(1, wide + math.ceil(narrow / 4))
+
+
+class MockAPIError(Exception):
+    """모의 API 오류 (openai.APIStatusError 와 같은 status_code 속성 제공)"""
+
+    def __init__(self, status_code: int, message: str = "", headers: Optional[Dict[str, str]] = None):
+        super().__init__(message or f"Mock API error {status_code}")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class LatencyModel:
+    """호출 지연시간 분포 (초 단위)"""
+
+    def __init__(self, kind: str = "fixed", seed: Optional[int] = None, **params):
+        """
+        kind: fixed(value), uniform(low, high), normal(mean, std),
+              lognormal(median, sigma)
+        """
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"지원하지 않는 지연 분포: {kind}")
+        self.kind = kind
+        self.params = params
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def sample(self) -> float:
+        """지연시간 1회 샘플링"""
+        p = self.params
+        with self.lock:
+            if self.kind == "fixed":
+                value = p.get("value", 0.0)
+            elif self.kind == "uniform":
+                value = self.rng.uniform(p.get("low", 0.0), p.get("high", 1.0))
+            elif self.kind == "normal":
+                value = self.rng.gauss(p.get("mean", 0.5), p.get("std", 0.1))
+            else:
+                value = p.get("median", 0.5) * math.exp(self.rng.gauss(0, p.get("sigma", 0.5)))
+        return max(0.0, value)
+
+    @classmethod
+    def from_config(cls, spec: Optional[Dict[str, Any]], seed: Optional[int] = None) -> "LatencyModel":
+        """{"kind": "lognormal", "median": 1.2, "sigma": 0.6} 형태의 설정에서 생성"""
+        if not spec:
+            return cls("fixed", seed=seed, value=0.0)
+        spec = dict(spec)
+        kind = spec.pop("kind", "fixed")
+        return cls(kind, seed=seed, **spec)
+
+
+class RuleResponder:
+    """프롬프트를 보고 추출/매칭/적요 작업별 규칙 기반 응답 생성"""
+
+    QUERY_PATTERNS = {
+        "thread": re.compile(r'스레드 \(시간순\):\n(.*?)(?:\n\n|$)', re.S),
+        "combined": re.compile(r'주문 메시지:\s*"(.*?)"\s*(?:\n|$)', re.S),
+        "extract": re.compile(r'텍스트:\s*"(.*?)"\s*(?:\n|$)', re.S),
+        "match": re.compile(r'찾을 제품명:\s*"(.*?)"', re.S),
+        "summary": re.compile(r'메시지:\s*"(.*?)"\s*(?:\n|$)', re.S),
+    }
+    THREAD_LINE = re.compile(r'^\[\d+\] ts=(\S+), 작성자=\S+ \(.*?\): "(.*)"$', re.M)
+    CORRECTION = re.compile(r"(\d+)\s*(?:개|세트|박스|ea)?\s*말고\s*(\d+)")
+    CANDIDATE_LINE = re.compile(r"^([^|\n]+)\|([^|\n]+)\|([^|\n]+)$", re.M)
+    ITEM_PATTERN = re.compile(r"^(.+?)\s*[xX*]?\s*(\d+)\s*(개|세트|박스|ea|EA|Ea)?\s*씩?$")
+    SEPARATORS = re.compile(r"[,\n&/]|\s그리고\s")
+
+    def __init__(self, products_db: Optional[Dict[str, Dict[str, str]]] = None,
+                 canned: Optional[Dict[str, Any]] = None):
+        self.products_db = products_db or {}
+        self.canned = canned or {}
+
+    def detect_task(self, prompt: str) -> Optional[str]:
+        """프롬프트에서 작업 종류 판별"""
+        for task, pattern in self.QUERY_PATTERNS.items():
+            if pattern.search(prompt):
+                return task
+        return None
+
+    def respond(self, messages: List[Dict[str, str]], response_format: Optional[Dict[str, Any]] = None) -> str:
+        """
+        메시지 목록에 대한 응답 본문 생성
+        response_format 이 json_schema 면 스키마 이름({작업}_result)으로 작업을 정하고 그 형태로 응답
+        """
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        schema_task = None
+        if response_format and response_format.get("type") == "json_schema":
+            schema_task = response_format["json_schema"]["name"].rsplit("_result", 1)[0]
+        task = self.detect_task(prompt)
+        query = self.QUERY_PATTERNS[task].search(prompt).group(1) if task else ""
+
+        if query in self.canned:
+            canned = self.canned[query]
+            return canned if isinstance(canned, str) else json.dumps(canned, ensure_ascii=False)
+
+        if schema_task == "extract":
+            return json.dumps({"items": self.extract(query)}, ensure_ascii=False)
+        if schema_task == "match":
+            match = self.match(query)
+            return json.dumps({"code": match["품목코드"] if match else None,
+                               # 매칭이 없으면 "카탈로그에 없음" 판단의 신뢰도
+                               "confidence": match["confidence"] if match else 90}, ensure_ascii=False)
+        if task == "thread":
+            return json.dumps(self.thread(query, prompt), ensure_ascii=False)
+        if task == "combined":
+            return json.dumps(self.combined(query, prompt), ensure_ascii=False)
+        if task == "extract":
+            return json.dumps(self.extract(query), ensure_ascii=False)
+        if task == "match":
+            return json.dumps(self.match(query), ensure_ascii=False)
+        if task == "summary":
+            return "출고 처리"
+        return "[]"
+
+    def extract(self, text: str) -> List[Dict[str, Any]]:
+        """'제품명 10개' 형태의 구간을 제품 목록으로 변환"""
+        products = []
+        for segment in self.SEPARATORS.split(text):
+            segment = segment.strip()
+            match = self.ITEM_PATTERN.match(segment)
+            if not match:
+                continue
+            products.append({
+                "product_name": match.group(1).strip(),
+                "quantity": int(match.group(2)),
+                "unit": match.group(3) or "개"
+            })
+        return products
+
+    def candidates(self, prompt: str) -> Dict[str, Dict[str, str]]:
+        """프롬프트의 후보 목록(품목코드|제품명|브랜드)을 브랜드별 카탈로그로 변환"""
+        candidates: Dict[str, Dict[str, str]] = {}
+        for code, name, brand in self.CANDIDATE_LINE.findall(prompt):
+            candidates.setdefault(brand.strip(), {})[code.strip()] = name.strip()
+        return candidates
+
+    def thread(self, transcript: str, prompt: str) -> Dict[str, Any]:
+        """스레드를 시간순으로 추출하고 "N개 말고 M개" 정정 댓글을 직전 제품에 반영"""
+        candidates = self.candidates(prompt)
+        items = []
+        for ts, text in self.THREAD_LINE.findall(transcript):
+            correction = self.CORRECTION.search(text)
+            if correction and items:
+                old, new = int(correction.group(1)), int(correction.group(2))
+                target = next((item for item in reversed(items) if item["quantity"] == old), items[-1])
+                target["quantity"] = new
+                target["source_ts"] = ts
+                continue
+            for product in self.extract(text):
+                product["source_ts"] = ts
+                product["code"] = None
+                product["confidence"] = 0
+                if candidates:
+                    match = self.match(product["product_name"], candidates)
+                    if match:
+                        product["code"] = match["품목코드"]
+                        product["confidence"] = match["confidence"]
+                items.append(product)
+        return {"items": items}
+
+    def combined(self, text: str, prompt: str) -> Dict[str, Any]:
+        """추출 후 프롬프트의 후보 목록(품목코드|제품명|브랜드) 안에서만 매칭"""
+        candidates = self.candidates(prompt)
+        items = []
+        for product in self.extract(text):
+            match = self.match(product["product_name"], candidates)
+            items.append({
+                "product_name": product["product_name"],
+                "code": match["품목코드"] if match else None,
+                "quantity": product["quantity"],
+                "unit": product["unit"],
+                "confidence": match["confidence"] if match else 0
+            })
+        return {"items": items}
+
+    def match(self, product_name: str, catalog: Optional[Dict[str, Dict[str, str]]] = None) -> Optional[Dict[str, Any]]:
+        """카탈로그(기본: 전체 제품 DB)에서 문자열 유사도가 가장 높은 제품 선택"""
+        target = product_name.replace(" ", "").lower()
+        best = None
+        best_score = 0.0
+        for brand_name, brand_products in (self.products_db if catalog is None else catalog).items():
+            for product_code, product_full_name in brand_products.items():
+                candidate = product_full_name.replace(" ", "").lower()
+                score = SequenceMatcher(None, target, candidate).ratio()
+                if score > best_score:
+                    best_score = score
+                    best = (product_code, product_full_name, brand_name)
+
+        confidence = int(round(best_score * 100))
+        if not best or confidence < 50:
+            return None
+        return {
+            "품목코드": best[0],
+            "제품명": best[1],
+            "브랜드": best[2],
+            "confidence": confidence
+        }
+
+
+class MockRawResponse:
+    """with_raw_response.create 의 반환값 (headers + parse())"""
+
+    def __init__(self, parsed: Any, headers: Dict[str, str]):
+        self.headers = headers
+        self._parsed = parsed
+
+    def parse(self) -> Any:
+        return self._parsed
+
+
+class _RawCompletions:
+    def __init__(self, owner: "MockOpenAIClient"):
+        self.owner = owner
+
+    def create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        self.owner.local.headers = {}
+        parsed = self.owner.complete(model, messages, **kwargs)
+        return MockRawResponse(parsed, self.owner.local.headers)
+
+
+class _Completions:
+    def __init__(self, owner: "MockOpenAIClient"):
+        self.owner = owner
+        self.with_raw_response = _RawCompletions(owner)
+
+    def create(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        return self.owner.complete(model, messages, **kwargs)
+
+
+class _Chat:
+    def __init__(self, owner: "MockOpenAIClient"):
+        self.completions = _Completions(owner)
+
+
+class _Files:
+    """files.create / files.content (배치 입력·출력 파일)"""
+
+    def __init__(self, owner: "MockOpenAIClient"):
+        self.owner = owner
+
+    def create(self, file: Any, purpose: str = "batch") -> Any:
+        if isinstance(file, tuple):
+            file = file[1]
+        data = file.read() if hasattr(file, "read") else file
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        return to_namespace(self.owner.store_file(data, purpose))
+
+    def content(self, file_id: str) -> Any:
+        return SimpleNamespace(text=self.owner.files_store[file_id].decode('utf-8'))
+
+
+class _Batches:
+    """batches.create / retrieve (retrieve 를 batch_polls 번 하면 완료)"""
+
+    def __init__(self, owner: "MockOpenAIClient"):
+        self.owner = owner
+
+    def create(self, input_file_id: str, endpoint: str, completion_window: str = "24h",
+               metadata: Optional[Dict[str, str]] = None) -> Any:
+        batch = {"id": f"batch_mock_{uuid.uuid4().hex[:12]}", "object": "batch", "endpoint": endpoint,
+                 "input_file_id": input_file_id, "completion_window": completion_window,
+                 "status": "validating", "output_file_id": None, "error_file_id": None,
+                 "request_counts": {"total": 0, "completed": 0, "failed": 0}, "metadata": metadata or {},
+                 "polls": 0}
+        with self.owner.lock:
+            self.owner.batches_store[batch["id"]] = batch
+        return to_namespace(batch)
+
+    def retrieve(self, batch_id: str) -> Any:
+        return to_namespace(self.owner.advance_batch(batch_id))
+
+
+class MockOpenAIClient:
+    """
+    openai.OpenAI 대신 GPTMatcher 에 주입하는 로컬 클라이언트
+    - 규칙 기반 또는 고정(canned) 응답
+    - 지연시간 분포, 토큰 집계, 오류 주입
+    """
+
+    def __init__(self, products_db: Optional[Dict[str, Dict[str, str]]] = None,
+                 latency: Optional[Dict[str, Any]] = None,
+                 error_rates: Optional[Dict[int, float]] = None,
+                 canned: Optional[Dict[str, Any]] = None,
+                 seed: Optional[int] = 0,
+                 cache_min_tokens: int = 1024,
+                 rate_limits: Optional[Dict[str, int]] = None,
+                 rate_window: float = 60.0,
+                 batch_polls: int = 1):
+        """
+        latency: LatencyModel 설정 (예: {"kind": "lognormal", "median": 1.5, "sigma": 0.5})
+        error_rates: 상태코드별 오류 확률 (예: {429: 0.02, 500: 0.01})
+        canned: 질의 문자열 -> 고정 응답 (문자열 또는 JSON 직렬화 가능한 값)
+        cache_min_tokens: 프리픽스 캐시 모사 - 마지막 메시지 앞부분이 이전 호출과 같고
+                          이 토큰 수 이상이면 128 토큰 단위로 cached_tokens 에 반영
+        rate_limits: 계정 한도 모사 {"requests": 창당 요청 수, "tokens": 창당 토큰 수}
+                     x-ratelimit-* 헤더를 돌려주고 초과 시 429 (retry-after 포함)
+        rate_window: 한도가 초기화되는 주기(초)
+        batch_polls: 배치가 완료될 때까지의 batches.retrieve 횟수
+        """
+        self.responder = RuleResponder(products_db, canned)
+        self.latency = LatencyModel.from_config(latency, seed=seed)
+        self.error_rates = error_rates or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.chat = _Chat(self)
+        self.files = _Files(self)
+        self.batches = _Batches(self)
+        self.files_store: Dict[str, bytes] = {}
+        self.batches_store: Dict[str, Dict[str, Any]] = {}
+        self.batch_polls = batch_polls
+        self.cache_min_tokens = cache_min_tokens
+        self.seen_prefixes = set()
+        self.rate_limits = rate_limits or {}
+        self.rate_window = rate_window
+        self.window_started = time.monotonic()
+        self.window_used = {"requests": 0, "tokens": 0}
+        self.in_flight = 0
+        self.local = threading.local()
+        self.stats = {
+            "calls": 0,
+            "errors": 0,
+            "rate_limited": 0,
+            "peak_concurrency": 0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+            "completion_tokens": 0,
+            "simulated_latency": 0.0,
+            "batch_requests": 0
+        }
+
+    def _pick_error(self) -> Optional[int]:
+        with self.lock:
+            roll = self.rng.random()
+        threshold = 0.0
+        for status_code, rate in sorted(self.error_rates.items()):
+            threshold += rate
+            if roll < threshold:
+                return int(status_code)
+        return None
+
+    def _cached_prefix_tokens(self, messages: List[Dict[str, str]]) -> int:
+        """마지막 메시지 앞부분(고정 프리픽스)이 이전에 본 것과 같으면 캐시 적중 토큰 수"""
+        prefix = messages[:-1]
+        prefix_tokens = sum(estimate_tokens(m.get("content", "")) for m in prefix)
+        key = json.dumps(prefix, ensure_ascii=False, sort_keys=True)
+        with self.lock:
+            hit = key in self.seen_prefixes
+            self.seen_prefixes.add(key)
+        if not hit or prefix_tokens < self.cache_min_tokens:
+            return 0
+        return prefix_tokens // 128 * 128
+
+    def _rate_limit_headers(self, prompt_tokens: int) -> Dict[str, str]:
+        """한도 창 사용량 반영 후 x-ratelimit-* 헤더 (초과 시 429)"""
+        if not self.rate_limits:
+            return {}
+        with self.lock:
+            now = time.monotonic()
+            if now - self.window_started >= self.rate_window:
+                self.window_started = now
+                self.window_used = {"requests": 0, "tokens": 0}
+            reset = self.rate_window - (now - self.window_started)
+            headers = {}
+            exceeded = False
+            for kind, amount in (("requests", 1), ("tokens", prompt_tokens)):
+                limit = self.rate_limits.get(kind)
+                if limit is None:
+                    continue
+                if self.window_used[kind] + amount > limit:
+                    exceeded = True
+                headers[f"x-ratelimit-limit-{kind}"] = str(limit)
+                headers[f"x-ratelimit-reset-{kind}"] = f"{reset:.3f}s"
+            if exceeded:
+                self.stats["rate_limited"] += 1
+                self.stats["errors"] += 1
+                headers["retry-after"] = f"{reset:.3f}"
+                raise MockAPIError(429, "Rate limit reached", headers)
+            for kind, amount in (("requests", 1), ("tokens", prompt_tokens)):
+                self.window_used[kind] += amount
+                if kind in self.rate_limits:
+                    headers[f"x-ratelimit-remaining-{kind}"] = str(self.rate_limits[kind] - self.window_used[kind])
+            return headers
+
+    def complete(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Any:
+        """chat.completions.create 와 같은 형태의 응답 반환"""
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        self.local.headers = self._rate_limit_headers(prompt_tokens)
+
+        with self.lock:
+            self.in_flight += 1
+            self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self.in_flight)
+        try:
+            delay = self.latency.sample()
+            if delay:
+                time.sleep(delay)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+        error = self._pick_error()
+
+        with self.lock:
+            self.stats["calls"] += 1
+            self.stats["simulated_latency"] += delay
+            if error:
+                self.stats["errors"] += 1
+
+        if error:
+            raise MockAPIError(error)
+        return to_namespace(self.completion_body(model, messages, **kwargs))
+
+    def completion_body(self, model: str, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """응답 본문(dict) 생성 (배치 출력 파일에는 이 형태 그대로 기록)"""
+        prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in messages)
+        cached_tokens = self._cached_prefix_tokens(messages)
+        content = self.responder.respond(messages, kwargs.get("response_format"))
+        completion_tokens = estimate_tokens(content)
+        max_tokens = kwargs.get("max_tokens")
+        if max_tokens and completion_tokens > max_tokens:
+            completion_tokens = max_tokens
+
+        with self.lock:
+            self.stats["prompt_tokens"] += prompt_tokens
+            self.stats["cached_tokens"] += cached_tokens
+            self.stats["completion_tokens"] += completion_tokens
+
+        return {
+            "id": f"chatcmpl-mock-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        }
+
+    def store_file(self, data: bytes, purpose: str) -> Dict[str, Any]:
+        file_id = f"file-mock-{uuid.uuid4().hex[:12]}"
+        with self.lock:
+            self.files_store[file_id] = data
+        return {"id": file_id, "object": "file", "bytes": len(data), "purpose": purpose}
+
+    def advance_batch(self, batch_id: str) -> Dict[str, Any]:
+        """배치 상태 조회 1회 (batch_polls 번째 조회에서 입력 요청을 모두 처리하고 출력/오류 파일 생성)"""
+        with self.lock:
+            batch = self.batches_store[batch_id]
+            batch["polls"] += 1
+            ready = batch["status"] != "completed" and batch["polls"] >= self.batch_polls
+            if not ready and batch["status"] == "validating":
+                batch["status"] = "in_progress"
+        if not ready:
+            return dict(batch)
+
+        outputs, errors = [], []
+        for line in self.files_store[batch["input_file_id"]].decode('utf-8').splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            body = dict(request["body"])
+            try:
+                error = self._pick_error()
+                if error:
+                    raise MockAPIError(error)
+                response = self.completion_body(body.pop("model"), body.pop("messages"), **body)
+                outputs.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"],
+                                "response": {"status_code": 200, "body": response}, "error": None})
+            except MockAPIError as e:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex[:12]}", "custom_id": request["custom_id"],
+                               "response": {"status_code": e.status_code, "body": {"error": {"message": str(e)}}},
+                               "error": None})
+
+        with self.lock:
+            self.stats["batch_requests"] += len(outputs) + len(errors)
+        batch["output_file_id"] = self.store_file(
+            "".join(json.dumps(o, ensure_ascii=False) + "\n" for o in outputs).encode('utf-8'), "batch_output")["id"]
+        if errors:
+            batch["error_file_id"] = self.store_file(
+                "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in errors).encode('utf-8'), "batch_output")["id"]
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs),
+                                   "failed": len(errors)}
+        batch["status"] = "completed"
+        return dict(batch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """누적 호출/토큰 통계"""
+        with self.lock:
+            return dict(self.stats)
+
+    def reset_stats(self):
+        """누적 통계 초기화"""
+        with self.lock:
+            for key in self.stats:
+                self.stats[key] = 0 if key != "simulated_latency" else 0.0
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+작업별 모델 등급(tier) 정책
+단순 추출/적요/후보 선택은 작고 빠른 모델로 처리하고,
+신뢰도가 낮거나 응답 검증에 실패한 경우에만 큰 모델로 올려 재처리
+등급별 호출 수, 지연시간, 토큰 사용량을 기록하여 정책 조정에 사용
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Any, Optional
+
+DEFAULT_TIERS = {"small": "gpt-4o-mini", "large": "gpt-4o"}
+DEFAULT_TASK_TIERS = {
+    "extract": "small",
+    "summary": "small",
+    "combined": "small",
+    "match": "small",
+    "thread": "large"
+}
+
+
+def percentile(values, q: float) -> float:
+    """정렬 후 q 분위수 (값이 없으면 0)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(q * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class TierMetrics:
+    """등급별 호출/지연/토큰 집계 (여러 스레드에서 호출 가능)"""
+
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self.lock = threading.Lock()
+        self.data: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, tier: str, latency: float, usage: Any = None, escalated: bool = False):
+        with self.lock:
+            entry = self.data.setdefault(tier, {
+                "calls": 0, "escalations": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "latencies": deque(maxlen=self.window)
+            })
+            entry["calls"] += 1
+            entry["escalations"] += int(escalated)
+            entry["latencies"].append(latency)
+            if usage is not None:
+                entry["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+                entry["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """등급별 호출 수, 승격 수, 토큰, 지연시간 p50/p95 (초)"""
+        with self.lock:
+            result = {}
+            for tier, entry in self.data.items():
+                latencies = list(entry["latencies"])
+                result[tier] = {
+                    "calls": entry["calls"],
+                    "escalations": entry["escalations"],
+                    "prompt_tokens": entry["prompt_tokens"],
+                    "completion_tokens": entry["completion_tokens"],
+                    "latency_p50": round(percentile(latencies, 0.5), 3),
+                    "latency_p95": round(percentile(latencies, 0.95), 3)
+                }
+            return result
+
+
+class ModelPolicy:
+    def __init__(self, tiers: Optional[Dict[str, str]] = None, task_tiers: Optional[Dict[str, str]] = None,
+                 escalate_below: float = 70):
+        """
+        tiers: {등급: 모델명} (예: {"small": "gpt-4o-mini", "large": "gpt-4o"})
+        task_tiers: {작업: 기본 등급}
+        escalate_below: 이 신뢰도 미만이면 큰 모델로 재처리
+        """
+        self.tiers = dict(DEFAULT_TIERS, **(tiers or {}))
+        self.task_tiers = dict(DEFAULT_TASK_TIERS, **(task_tiers or {}))
+        self.escalate_below = escalate_below
+        self.metrics = TierMetrics()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "ModelPolicy":
+        """config.json 의 model_tiers / task_model_tiers / escalate_below 로 생성"""
+        return cls(config.get('model_tiers'), config.get('task_model_tiers'),
+                   float(config.get('escalate_below', 70)))
+
+    def tier_for(self, task: str) -> str:
+        return self.task_tiers.get(task, "large")
+
+    def model_for(self, tier: str) -> str:
+        return self.tiers.get(tier, self.tiers["large"])
+
+    def can_escalate(self, tier: str) -> bool:
+        """더 큰 모델로 올릴 수 있는 등급인지 (같은 모델이면 승격 의미 없음)"""
+        return tier != "large" and self.model_for(tier) != self.model_for("large")
+
+    def should_escalate(self, tier: str, confidence: Optional[float]) -> bool:
+        """낮은 신뢰도 응답을 큰 모델로 재처리할지"""
+        return self.can_escalate(tier) and confidence is not None and confidence < self.escalate_below
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+카탈로그에 없는 제품명 캐시 (negative cache)
+"쇼핑백", "샘플", "택배" 처럼 매일 추출되지만 카탈로그에 없는 문자열은 GPT 매칭이 매번 실패하므로
+실패 결과를 TTL 동안 기억해 바로 거절
+카탈로그 해시가 바뀌면 전부 무효화하고, 자주 걸린 문자열은 카탈로그/무시 목록 추가용으로 리포트
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+
+def normalize_name(name: str) -> str:
+    """대소문자/공백 차이를 무시한 캐시 키"""
+    return re.sub(r"\s+", " ", (name or "").strip().lower())
+
+
+class NegativeCache:
+    def __init__(self, path: Optional[str] = None, ttl_seconds: float = 7 * 86400,
+                 max_entries: int = 10000, catalog_hash: str = ""):
+        """
+        path: 실행 사이에 유지할 JSON 파일 (없으면 메모리에만)
+        ttl_seconds: 실패 결과를 기억하는 시간 (다시 GPT 로 확인하기까지)
+        max_entries: 넘으면 만료가 가장 이른 항목부터 제거
+        catalog_hash: 현재 카탈로그 해시 (저장된 해시와 다르면 불러오지 않음)
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.catalog_hash = catalog_hash
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"hits": 0, "added": 0, "expired": 0, "invalidations": 0}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            self.load()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], catalog_hash: str = "") -> Optional["NegativeCache"]:
+        """
+        config.json 의 negative_cache ({"ttl_hours": 168, "path": "negative_cache.json", "max_entries": 10000})
+        path 가 없으면 이번 실행 동안만 유지, "negative_cache": false 면 None
+        """
+        options = config.get('negative_cache', {})
+        if options is False:
+            return None
+        options = options or {}
+        return cls(path=options.get('path'),
+                   ttl_seconds=float(options.get('ttl_hours', 168)) * 3600,
+                   max_entries=int(options.get('max_entries', 10000)), catalog_hash=catalog_hash)
+
+    @staticmethod
+    def key(product_name: str, scope: str) -> str:
+        return f"{scope}|{normalize_name(product_name)}"
+
+    def check_catalog(self, catalog_hash: str):
+        """카탈로그가 바뀌었으면 전부 무효화 (새 제품이 추가되었을 수 있음)"""
+        with self.lock:
+            if catalog_hash == self.catalog_hash:
+                return
+            if self.entries:
+                print(f"카탈로그 변경 - 미매칭 캐시 {len(self.entries)}건 무효화")
+                self.stats["invalidations"] += 1
+            self.entries = {}
+            self.catalog_hash = catalog_hash
+
+    def contains(self, product_name: str, scope: str = "*") -> bool:
+        """최근에 매칭에 실패한 문자열이면 True (적중 횟수 누적)"""
+        key = self.key(product_name, scope)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return False
+            if entry["expires"] <= time.time():
+                del self.entries[key]
+                self.stats["expired"] += 1
+                return False
+            entry["hits"] += 1
+            self.stats["hits"] += 1
+            return True
+
+    def add(self, product_name: str, scope: str = "*"):
+        """매칭 실패 기록 (TTL 은 마지막 실패 시각부터)"""
+        key = self.key(product_name, scope)
+        now = time.time()
+        with self.lock:
+            entry = self.entries.setdefault(key, {"product_name": product_name, "scope": scope,
+                                                  "hits": 0, "misses": 0, "first_seen": now})
+            entry["misses"] += 1
+            entry["expires"] = now + self.ttl_seconds
+            self.stats["added"] += 1
+            if len(self.entries) > self.max_entries:
+                oldest = min(self.entries, key=lambda k: self.entries[k]["expires"])
+                del self.entries[oldest]
+
+    def report(self, top: int = 20) -> List[Dict[str, Any]]:
+        """자주 걸린 문자열 순 (GPT 실패 + 캐시 거절 횟수) - 카탈로그나 무시 목록에 추가할 후보"""
+        with self.lock:
+            entries = [dict(entry, count=entry["misses"] + entry["hits"]) for entry in self.entries.values()]
+        entries.sort(key=lambda entry: entry["count"], reverse=True)
+        return [{"product_name": entry["product_name"], "scope": entry["scope"], "count": entry["count"]}
+                for entry in entries[:top]]
+
+    def load(self):
+        """저장된 캐시 로드 (카탈로그 해시가 다르거나 만료된 항목은 버림)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"미매칭 캐시 로드 오류: {e}")
+            return
+        if data.get("catalog_hash") != self.catalog_hash:
+            print("카탈로그 변경 - 저장된 미매칭 캐시 무시")
+            return
+        now = time.time()
+        self.entries = {self.key(entry["product_name"], entry["scope"]): entry
+                        for entry in data.get("entries", []) if entry["expires"] > now}
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            data = {"catalog_hash": self.catalog_hash, "entries": list(self.entries.values())}
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.stats, entries=len(self.entries))
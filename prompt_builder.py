@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+프롬프트 캐시 친화적인 LLM 메시지 구성
+제공자 측 프리픽스 캐시가 적중하도록 변하지 않는 내용(작업 규칙, 브랜드 범위 카탈로그)을 앞에,
+호출마다 바뀌는 질의를 맨 뒤에 배치
+카탈로그 직렬화 결과는 카탈로그 해시 + 브랜드 범위별로 한 번만 만들어 재사용 (바이트 단위로 동일한 프리픽스)
+"""
+
+import hashlib
+import json
+import threading
+from typing import Dict, List, Any, Optional
+
+# 작업별 고정 지침 (system 메시지, 호출 간 동일)
+SYSTEM_PROMPTS = {
+    "extract": """당신은 제품명과 수량을 정확히 추출하는 전문가입니다.
+마지막 사용자 메시지의 텍스트에서 제품명과 수량을 추출하세요.
+
+규칙:
+1. 제품명은 정확하고 완전한 이름으로 추출
+2. 수량은 숫자만 (예: "10개" -> 10)
+3. 단위는 개, 세트, 박스, ea 등
+4. 제품이 없으면 items 를 빈 배열로""",
+
+    "match": """당신은 제품명 매칭 전문가입니다. 정확한 매칭을 우선시하세요.
+아래 제품 데이터베이스에서 마지막 사용자 메시지의 제품명과 가장 유사한 제품의 품목코드를 찾으세요.
+
+규칙:
+1. 정확히 일치하는 제품이 있으면 그것을 선택
+2. 유사한 제품이 있으면 가장 유사한 것을 선택
+3. 해당하는 제품이 없거나 매칭 신뢰도가 50 미만이면 code 는 null
+4. confidence 는 판단의 신뢰도 (0-100): code 가 있으면 매칭 신뢰도, null 이면 데이터베이스에 없다는 판단의 신뢰도""",
+
+    "combined": """당신은 주문 메시지에서 제품을 추출하고 후보 목록에서 정확한 품목을 고르는 전문가입니다.
+마지막 사용자 메시지의 주문 메시지에서 제품과 수량을 추출하고, 함께 주어진 후보 제품 중 해당하는 품목코드를 고르세요.
+
+규칙:
+1. code 는 반드시 후보 제품의 품목코드 중에서만 선택
+2. 해당하는 후보가 없으면 code 는 null
+3. 수량은 숫자만 (예: "10개" -> 10), 단위는 개, 세트, 박스, ea 등
+4. confidence 는 품목코드 선택 신뢰도 (0-100)""",
+
+    "thread": """당신은 주문 스레드에서 정정 내용을 반영해 최종 주문 내역을 정리하는 전문가입니다.
+마지막 사용자 메시지의 Slack 스레드를 시간순으로 읽고 최종 주문 제품과 수량을 정리하세요.
+
+규칙:
+1. 뒤의 댓글이 앞의 수량/제품을 정정하거나 취소하면 최종 결과만 남김 (예: "5개 말고 7개로")
+2. 같은 제품을 중복해서 적지 말 것
+3. 수량은 숫자만, 단위는 개, 세트, 박스, ea 등
+4. source_ts 는 제품이 최종 확정된 메시지의 ts
+5. code 는 후보 제품이 주어진 경우 그중 해당하는 품목코드, 아니면 null
+6. confidence 는 품목코드 선택 신뢰도 (0-100), code 가 null 이면 0""",
+
+    "summary": """당신은 간단한 요약문을 생성하는 전문가입니다.
+마지막 사용자 메시지의 내용을 바탕으로 간단한 적요를 생성하세요.
+
+규칙:
+1. 10자 이내로 간단하게
+2. 출고 관련 내용이면 "출고" 포함
+3. 특별한 내용이 없으면 "출고 처리"
+4. 텍스트만 응답하고 다른 설명은 하지 마세요"""
+}
+
+
+def catalog_hash(products_db: Dict[str, Dict[str, str]]) -> str:
+    """카탈로그 내용 해시 (키 순서와 무관)"""
+    canonical = json.dumps(products_db, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+
+
+def candidate_lines(candidates: List[Dict[str, Any]]) -> str:
+    """후보 목록을 "품목코드|제품명|브랜드" 줄로 (품목코드 순으로 정렬해 같은 후보면 같은 문자열)"""
+    return "\n".join(f'{c["품목코드"]}|{c["제품명"]}|{c["브랜드"]}'
+                     for c in sorted(candidates, key=lambda c: str(c["품목코드"])))
+
+
+class PromptBuilder:
+    def __init__(self, products_db: Dict[str, Dict[str, str]]):
+        self.products_db = products_db
+        self.catalog_hash = catalog_hash(products_db)
+        self._catalog_blocks: Dict[tuple, str] = {}
+        self.lock = threading.Lock()
+
+    def catalog_block(self, scoped_db: Dict[str, Dict[str, str]]) -> str:
+        """브랜드 범위 카탈로그 직렬화 (카탈로그 해시 + 브랜드 목록별로 메모이즈)"""
+        key = (self.catalog_hash, tuple(sorted(scoped_db)))
+        with self.lock:
+            block = self._catalog_blocks.get(key)
+        if block is None:
+            ordered = {brand: dict(sorted(scoped_db[brand].items())) for brand in sorted(scoped_db)}
+            block = ("제품 데이터베이스 (브랜드별 {품목코드: 제품명}):\n" +
+                     json.dumps(ordered, ensure_ascii=False, separators=(',', ':')))
+            with self.lock:
+                self._catalog_blocks[key] = block
+        return block
+
+    @staticmethod
+    def _messages(task: str, query: str, context: Optional[str] = None) -> List[Dict[str, str]]:
+        """[고정 지침(+고정 컨텍스트)] + [질의] 순서의 메시지 목록"""
+        system = SYSTEM_PROMPTS[task] if not context else SYSTEM_PROMPTS[task] + "\n\n" + context
+        return [{"role": "system", "content": system}, {"role": "user", "content": query}]
+
+    def extract(self, text: str) -> List[Dict[str, str]]:
+        return self._messages("extract", f'텍스트: "{text}"')
+
+    def match(self, product_name: str, scoped_db: Dict[str, Dict[str, str]]) -> List[Dict[str, str]]:
+        return self._messages("match", f'찾을 제품명: "{product_name}"', self.catalog_block(scoped_db))
+
+    def combined(self, text: str, candidates: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+        # 후보 목록은 메시지마다 달라지므로 질의와 함께 뒤쪽에 둠
+        query = f'후보 제품 (품목코드|제품명|브랜드):\n{candidate_lines(candidates)}\n\n주문 메시지: "{text}"'
+        return self._messages("combined", query)
+
+    def thread(self, transcript: str, candidates: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, str]]:
+        query = f"스레드 (시간순):\n{transcript}"
+        if candidates:
+            query = f"후보 제품 (품목코드|제품명|브랜드):\n{candidate_lines(candidates)}\n\n" + query
+        return self._messages("thread", query)
+
+    def summary(self, message_text: str, product_count: int) -> List[Dict[str, str]]:
+        return self._messages("summary", f'추출된 제품: {product_count}개\n메시지: "{message_text[:200]}"')
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+스레드 간 공유 가능한 토큰 버킷 속도 제한
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: Optional[float] = None):
+        """
+        rate_per_minute: 분당 충전량 (요청 수 또는 토큰 수)
+        burst: 최대 저장량 (기본값: 분당 충전량의 1/6, 최소 1)
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, rate_per_minute / 6.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, amount: float = 1.0) -> float:
+        """
+        즉시 차감을 시도
+        반환: 0 이면 성공, 아니면 다시 시도하기까지 기다려야 할 시간(초)
+        """
+        with self.lock:
+            self._refill()
+            # 용량보다 큰 요청은 버킷이 가득 찼을 때 통과시킴
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate if self.rate > 0 else 1.0
+
+    def acquire(self, amount: float = 1.0):
+        """차감 가능할 때까지 대기"""
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def penalize(self, seconds: float):
+        """서버가 Retry-After 를 준 경우 그 시간만큼 버킷을 비움"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+    def refund(self, amount: float):
+        """미리 차감한 양 중 쓰지 않은 만큼 되돌림 (음수면 예상보다 더 쓴 만큼 추가 차감)"""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + amount)
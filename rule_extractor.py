@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+규칙 기반 주문 메시지 추출기
+"<제품명> 10개", "세트 1ea & 쇼핑백 1ea", "다섯 박스" 같은 흔한 형식을 로컬에서 바로 해석
+메시지 전체를 설명할 수 있을 때만 결과를 확정하고, 아니면 GPT 추출로 넘김
+"""
+
+import html
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+UNITS = {
+    "개": "개", "ea": "ea", "pcs": "개", "pc": "개", "p": "개",
+    "세트": "세트", "set": "세트", "셋트": "세트",
+    "박스": "박스", "box": "박스", "bx": "박스", "카톤": "박스",
+    "병": "병", "통": "통", "장": "장", "팩": "팩", "매": "장"
+}
+
+NATIVE_UNITS = {
+    "한": 1, "하나": 1, "두": 2, "둘": 2, "세": 3, "셋": 3, "석": 3, "네": 4, "넷": 4, "넉": 4,
+    "다섯": 5, "여섯": 6, "일곱": 7, "여덟": 8, "아홉": 9
+}
+NATIVE_TENS = {"열": 10, "스무": 20, "스물": 20, "서른": 30, "마흔": 40, "쉰": 50}
+SINO_DIGITS = {"일": 1, "이": 2, "삼": 3, "사": 4, "오": 5, "육": 6, "칠": 7, "팔": 8, "구": 9}
+
+_NATIVE_PATTERN = "(?:{tens})?(?:{units})?".format(
+    tens="|".join(sorted(NATIVE_TENS, key=len, reverse=True)),
+    units="|".join(sorted(NATIVE_UNITS, key=len, reverse=True))
+)
+# 비어 있지 않은 고유어 수사 (열, 열두, 다섯)
+_NATIVE_REQUIRED = "(?:{tens})(?:{units})?|(?:{units})".format(
+    tens="|".join(sorted(NATIVE_TENS, key=len, reverse=True)),
+    units="|".join(sorted(NATIVE_UNITS, key=len, reverse=True))
+)
+# 자리수 순서가 맞는 한자어 수사만 (삼십오, 백이십) - "오일" 처럼 숫자 글자가 이어진 단어는 제외
+_SINO_PATTERN = "(?=[일이삼사오육칠팔구십백])(?:[이삼사오육칠팔구]?백)?(?:[이삼사오육칠팔구]?십)?[일이삼사오육칠팔구]?"
+_UNIT_PATTERN = "|".join(sorted(map(re.escape, UNITS), key=len, reverse=True))
+# 다른 모듈에서 수량 표현을 조합할 때 쓰는 패턴 조각
+NUMBER_PATTERN = r"\d{1,6}|" + _NATIVE_REQUIRED + "|" + _SINO_PATTERN
+UNIT_PATTERN = _UNIT_PATTERN
+
+# 구분자: 쉼표, &, +, /, 줄바꿈, 세미콜론, "그리고", "및"
+SEPARATORS = re.compile(r"[,，、&+/;\n]|\s(?:그리고|및)\s")
+BULLET = re.compile(r"^\s*(?:[-•·*▶>]|\d+[.)])\s*")
+SLACK_MARKUP = [
+    (re.compile(r"<[@#!][^>]*>"), " "),                      # 멘션/채널/특수 명령
+    (re.compile(r"<(?:https?|mailto):[^|>]*\|([^>]*)>"), r"\1"),  # 링크 라벨
+    (re.compile(r"<(?:https?|mailto):[^>]*>"), " "),
+    (re.compile(r":[a-z0-9_+\-]+:"), " "),                    # 이모지
+    (re.compile(r"[*_~`]"), "")                                # 서식
+]
+# 수량 표현 없이 주문 메시지에 흔히 붙는 인사/요청 문구
+FILLER = re.compile(r"^(?:안녕하세요|감사합니다|부탁드(?:립니다|려요)|출고\s*(?:요청|부탁)[^\d]*|확인\s*부탁[^\d]*|[^\d]{0,20}부탁드립니다)[.!~\s]*$")
+
+# 한글 수사는 단어 시작에서만 수량으로 인정 ("클렌징 오일" 의 "일" 오인 방지)
+ITEM = re.compile(
+    r"^(?P<name>.*?[가-힣A-Za-z].*?)\s*(?:[xX×*]\s*)?"
+    r"(?P<qty>\d{1,6}|(?<![가-힣A-Za-z])(?:" + _NATIVE_PATTERN + "|" + _SINO_PATTERN + r"))\s*"
+    r"(?P<unit>" + _UNIT_PATTERN + r")?\s*씩?\s*$",
+    re.IGNORECASE
+)
+
+# 텍스트 어디서든 "수량 + 단위" 가 나오는지 (주문 메시지 판별용, 한글 수사는 단어 시작에서만)
+QUANTITY_WITH_UNIT = re.compile(
+    r"(?P<qty>(?<![0-9])\d{1,6}|(?<![가-힣A-Za-z])(?:" + _NATIVE_REQUIRED + "|" + _SINO_PATTERN + r"))"
+    r"\s*(?P<unit>" + UNIT_PATTERN + r")(?![a-z])",
+    re.IGNORECASE
+)
+
+# 정정/취소 표현 ("2개 말고 3개") - 규칙으로 확정하지 않고 GPT 로 넘김
+CORRECTION = re.compile(r"말고|취소|빼고")
+# 호수/용량만 있는 이름 ("02호", "#21", "50ml") - 어떤 제품인지 앞 구간에 의존하므로 규칙으로 확정하지 않음
+VARIANT_ONLY = re.compile(r"#\s*\d{1,3}|\d{1,3}\s*(?:호|번)|\d+(?:\.\d+)?\s*(?:ml|g|l|oz)", re.IGNORECASE)
+# 날짜/출고 일정 단어 ("10월 5일 출고 3박스" 의 "10월", "5일", "출고") - 이름의 대부분이 이런 단어면 제품명이 아님
+SCHEDULE_WORD = re.compile(
+    r"(?:\d{1,2}\s*월|\d{1,2}\s*일|\d{1,2}[/.]\d{1,2}|오늘|내일|모레|금일|익일|출고|출하|배송|발송|입고|택배)+"
+    r"(?:분|건|예정|요청|까지|에|은|는)?"
+)
+
+
+def clean_slack_text(text: str) -> str:
+    """Slack 마크업(멘션, 링크, 이모지, 서식)과 HTML 이스케이프 제거"""
+    text = html.unescape(text or "")
+    for pattern, replacement in SLACK_MARKUP:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def split_segments(text: str) -> List[str]:
+    """메시지를 품목 단위 구간으로 분리 (글머리표, 인사/요청 문구 제외)"""
+    segments = []
+    for segment in SEPARATORS.split(clean_slack_text(text)):
+        segment = BULLET.sub("", segment).strip()
+        if segment and not FILLER.match(segment):
+            segments.append(segment)
+    return segments
+
+
+def normalize_unit(unit: Optional[str]) -> str:
+    """단위 표기 통일 (pcs -> 개, set -> 세트, 없으면 개)"""
+    if not unit:
+        return "개"
+    return UNITS.get(unit.lower(), unit)
+
+
+def parse_korean_number(token: str) -> Optional[int]:
+    """아라비아 숫자, 고유어 수사(열다섯), 한자어 수사(삼십) 를 정수로 변환"""
+    token = token.strip()
+    if not token:
+        return None
+    if token.isdigit():
+        return int(token)
+
+    # 고유어: [열|스물|...][하나|두|...]
+    value = 0
+    rest = token
+    for word, number in sorted(NATIVE_TENS.items(), key=lambda kv: -len(kv[0])):
+        if rest.startswith(word):
+            value += number
+            rest = rest[len(word):]
+            break
+    if rest in NATIVE_UNITS:
+        return value + NATIVE_UNITS[rest]
+    if not rest and value:
+        return value
+
+    # 한자어: 삼십오, 백이십, 십
+    if re.fullmatch(_SINO_PATTERN, token):
+        total = 0
+        current = 0
+        for ch in token:
+            if ch in SINO_DIGITS:
+                current = SINO_DIGITS[ch]
+            elif ch == "십":
+                total += (current or 1) * 10
+                current = 0
+            elif ch == "백":
+                total += (current or 1) * 100
+                current = 0
+        total += current
+        return total or None
+    return None
+
+
+@dataclass
+class RuleExtraction:
+    """규칙 추출 결과 (complete 가 True 면 메시지 전체를 설명함)"""
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    unexplained: List[str] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.items) and not self.unexplained
+
+
+class RuleBasedExtractor:
+    def __init__(self, require_unit: bool = True):
+        """
+        require_unit: 단위가 없는 "제품명 21" 은 호수/용량과 구분할 수 없으므로 기본적으로 불확실 처리
+                      (x, × 같은 수량 표시가 있으면 단위 없이도 인정)
+        """
+        self.require_unit = require_unit
+
+    def parse_segment(self, segment: str) -> Optional[Dict[str, Any]]:
+        """구간 1개를 {product_name, quantity, unit} 으로 해석 (실패 시 None)"""
+        match = ITEM.match(segment)
+        if not match:
+            return None
+
+        name = match.group("name").strip(" :-=")
+        raw_qty = match.group("qty")
+        unit = match.group("unit")
+        has_marker = bool(re.search(r"[xX×*]\s*" + re.escape(raw_qty) + r"\s*\S*$", segment))
+
+        # "각 10개씩" 은 여러 제품을 뜻하므로 규칙만으로는 확정하지 않음
+        if re.search(r"(?:^|\s)각(?:\s|$)", name):
+            return None
+        if not unit and (self.require_unit and not has_marker):
+            return None
+        # 고유어/한자어 수사는 단위가 있어야만 수량으로 인정 ("이" 같은 조사 오인 방지)
+        if not raw_qty.isdigit() and not unit:
+            return None
+        # 수량 앞이 공백/수량표시가 아니면 제품명 일부 (예: "세럼50ml")
+        before = segment[:match.start("qty")]
+        if raw_qty.isdigit() and before and not re.search(r"[\s xX×*]$", before) and not unit:
+            return None
+        if len(name) < 2:
+            return None
+        # 제품명에 수량이 또 있거나 정정 표현이 있으면 잘못 나눈 것 ("컨실러 2개 말고 3개")
+        if QUANTITY_WITH_UNIT.search(name) or CORRECTION.search(name):
+            return None
+        if VARIANT_ONLY.fullmatch(name):
+            return None
+        words = name.split()
+        if sum(1 for word in words if SCHEDULE_WORD.fullmatch(word)) * 2 > len(words):
+            return None
+
+        quantity = parse_korean_number(raw_qty)
+        if not quantity:
+            return None
+        return {
+            "product_name": name,
+            "quantity": quantity,
+            "unit": normalize_unit(unit),
+            "extraction_method": "rule"
+        }
+
+    def extract(self, text: str) -> RuleExtraction:
+        """메시지 전체를 구간별로 해석"""
+        result = RuleExtraction()
+        for segment in split_segments(text):
+            item = self.parse_segment(segment)
+            if item:
+                result.items.append(item)
+            else:
+                result.unexplained.append(segment)
+        return result
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+실행 마감 시각 (ERP 업로드 마감)
+마감 시각에서 단계별(수집/집계/Excel) 예산을 나누고, 모든 네트워크 호출의 timeout 을 남은 시간으로 제한
+시간이 부족하면 집계를 로컬 매칭 전용(degraded) 모드로 전환하여 시트는 항상 마감 전에 생성
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional
+
+# 단계 순서와 전체 시간 중 단계별 몫 (앞 단계가 일찍 끝나면 남은 시간은 뒤 단계로 넘어감)
+STAGES = ("fetch", "aggregate", "excel")
+DEFAULT_STAGE_SHARES = {"fetch": 0.3, "aggregate": 0.6, "excel": 0.1}
+
+
+def parse_deadline(value: Any, now: Optional[datetime] = None) -> Optional[datetime]:
+    """"09:30" (오늘 해당 시각) 또는 ISO 형식 "2024-05-01T09:30" 을 datetime 으로"""
+    if not value:
+        return None
+    now = now or datetime.now()
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        pass
+    parsed = datetime.strptime(text, "%H:%M")
+    return now.replace(hour=parsed.hour, minute=parsed.minute, second=0, microsecond=0)
+
+
+class RunDeadline:
+    def __init__(self, budget_seconds: float, stage_shares: Optional[Dict[str, float]] = None,
+                 min_timeout: float = 1.0, degrade_margin: float = 0.15):
+        """
+        budget_seconds: 지금부터 마감까지 남은 시간(초)
+        stage_shares: 단계별 몫 (합이 1 이 아니면 비율로 정규화)
+        min_timeout: 마감이 지나도 네트워크 호출에 주는 최소 timeout(초)
+        degrade_margin: 단계 예산 중 이 비율 이하만 남으면 degraded 모드
+        """
+        self.started = time.monotonic()
+        self.budget = max(0.0, float(budget_seconds))
+        self.deadline = self.started + self.budget
+        shares = dict(DEFAULT_STAGE_SHARES, **(stage_shares or {}))
+        total_share = sum(shares[stage] for stage in STAGES) or 1.0
+        self.stage_ends = {}
+        cumulative = 0.0
+        for stage in STAGES:
+            cumulative += shares[stage] / total_share
+            self.stage_ends[stage] = self.started + self.budget * cumulative
+        self.stage_starts = {STAGES[0]: self.started}
+        self.min_timeout = min_timeout
+        self.degrade_margin = degrade_margin
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["RunDeadline"]:
+        """
+        config.json 의 run_deadline ("09:30" / ISO) 또는 run_budget_minutes 로 생성 (둘 다 없으면 None)
+        run_stage_shares 로 단계별 몫 조정
+        """
+        budget = None
+        deadline = parse_deadline(config.get('run_deadline'))
+        if deadline is not None:
+            budget = (deadline - datetime.now()).total_seconds()
+        elif config.get('run_budget_minutes'):
+            budget = float(config['run_budget_minutes']) * 60
+        if budget is None:
+            return None
+        return cls(budget, config.get('run_stage_shares'),
+                   degrade_margin=float(config.get('degrade_margin', 0.15)))
+
+    def start_stage(self, stage: str):
+        """단계 시작 시각 기록 (진행 속도로 마감 초과를 예측할 때 사용)"""
+        self.stage_starts[stage] = time.monotonic()
+        print(f"[마감] {stage} 단계 시작 - 단계 남은 시간 {self.remaining(stage):.0f}초, "
+              f"전체 {self.remaining():.0f}초")
+
+    def remaining(self, stage: Optional[str] = None) -> float:
+        """단계(없으면 전체) 마감까지 남은 초 (0 이상)"""
+        end = self.stage_ends[stage] if stage else self.deadline
+        return max(0.0, end - time.monotonic())
+
+    def expired(self, stage: Optional[str] = None) -> bool:
+        return self.remaining(stage) <= 0
+
+    def timeout(self, default: float, stage: Optional[str] = None) -> float:
+        """네트워크 호출 timeout: 기본값과 남은 시간 중 작은 값 (최소 min_timeout)"""
+        return max(self.min_timeout, min(default, self.remaining(stage)))
+
+    def should_degrade(self, stage: str, done: int = 0, total: Optional[int] = None) -> bool:
+        """
+        단계 예산이 거의 소진되었거나, 지금까지의 처리 속도로는 남은 작업이 단계 마감을 넘길 때 True
+        done/total: 처리한 작업 수 / 전체 작업 수 (모르면 None)
+        """
+        remaining = self.remaining(stage)
+        start = self.stage_starts.get(stage, self.started)
+        if remaining <= self.degrade_margin * max(0.0, self.stage_ends[stage] - start):
+            return True
+        if total and done:
+            per_item = (time.monotonic() - start) / done
+            return per_item * (total - done) > remaining
+        return False
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "budget_sec": round(self.budget, 1),
+            "elapsed_sec": round(time.monotonic() - self.started, 1),
+            "remaining_sec": round(self.remaining(), 1),
+            "deadline": (datetime.now() + timedelta(seconds=self.remaining())).strftime("%H:%M:%S")
+        }
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+동시에 들어온 같은 요청 합치기 (singleflight)
+여러 스레드가 같은 제품명 매칭/같은 문장 추출을 동시에 요청하면 첫 요청만 실행하고
+나머지는 그 결과(또는 예외)를 함께 받음 - N개의 동시 요청이 API 호출 1회로 처리됨
+끝난 요청의 결과는 보관하지 않음 (결과 캐시가 아님)
+"""
+
+import copy
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Any, Hashable
+
+
+class SingleFlight:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.in_flight: Dict[Hashable, Future] = {}
+        self.stats = {"calls": 0, "shared": 0}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SingleFlight":
+        """config.json 의 llm_singleflight (기본 true)"""
+        return cls(enabled=bool(config.get('llm_singleflight', True)))
+
+    def do(self, key: Hashable, call: Callable[[], Any]) -> Any:
+        """
+        key 가 같은 요청이 진행 중이면 그 결과를 기다려 받고, 아니면 call() 실행
+        함께 받은 결과는 호출한 쪽이 수정해도 서로 영향이 없도록 복사본
+        """
+        if not self.enabled:
+            return call()
+        with self.lock:
+            self.stats["calls"] += 1
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+            else:
+                self.stats["shared"] += 1
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = call()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def summary(self) -> Dict[str, Any]:
+        with self.lock:
+            return dict(self.stats, in_flight=len(self.in_flight))
@@ -10,6 +10,12 @@ import os
 ACCESS_TOKEN = os.getenv('SLACK_BOT_TOKEN', '')
 CHANNEL_ID = os.getenv('SLACK_CHANNEL_ID', 'C01AA471D46')
 API_URL = "https://slack.com/api/conversations.history"
+# 요청 timeout(초): SLACK_TIMEOUT 환경 변수, 없으면 config.json 의 slack_timeout (기본 30)
+TIMEOUT = 30.0
+if os.path.exists("config.json"):
+    with open("config.json", "r", encoding="utf-8") as f:
+        TIMEOUT = float(json.load(f).get("slack_timeout", TIMEOUT))
+TIMEOUT = float(os.getenv('SLACK_TIMEOUT', TIMEOUT))
 
 # --- Headers for the API Request ---
 headers = {
@@ -24,7 +30,7 @@ params = {
 
 # --- Make the API Request ---
 try:
-    response = requests.get(API_URL, headers=headers, params=params)
+    response = requests.get(API_URL, headers=headers, params=params, timeout=TIMEOUT)
     response.raise_for_status()  # This will raise an exception for HTTP errors (e.g., 401, 404)
     
     data = response.json()
@@ -5,10 +5,21 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import time
+from concurrent.futures import ThreadPoolExecutor
+from jsonl_store import JsonlWriter, is_jsonl_path, write_jsonl, iter_records
+from slack_records import SlackThread, SlackReply
+from rate_limit import TokenBucket
+
+# 스트리밍 저장 기본 경로 (스레드 하나당 한 줄, gzip 압축)
+PROCESSED_DATA_PATH = "processed_slack_data.jsonl.gz"
 
 class SlackFetcher:
-    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None):
-        """Slack 데이터 수집 클래스 초기화"""
+    def __init__(self, config_path: str = "config.json", api_keys: Optional[Dict] = None,
+                 http: Optional[Any] = None):
+        """
+        Slack 데이터 수집 클래스 초기화
+        http: requests 호환 HTTP 클라이언트 주입 (예: traffic_recorder.RecordingHTTP)
+        """
         if api_keys:
             # API 키가 직접 제공된 경우
             self.config = api_keys
@@ -20,8 +31,48 @@ class SlackFetcher:
         self.headers = {
             "Authorization": f"Bearer {self.config['slack_bot_token']}"
         }
-        self.channel_id = self.config['channel_id']
+        # 여러 채널(브랜드/파트너 채널)을 함께 수집하려면 channel_ids 목록 지정
+        self.channel_ids = self.config.get('channel_ids') or [self.config['channel_id']]
+        self.channel_id = self.config.get('channel_id') or self.channel_ids[0]
+        self.http = http if http is not None else requests.Session()
+        # 모든 채널이 공유하는 Slack API 호출 예산
+        self.rate_limiter = TokenBucket(
+            self.config.get('slack_requests_per_minute', 100),
+            self.config.get('slack_request_burst', 10)
+        )
+        # 디버그용: 원본 Slack payload 를 레코드에 함께 보관
+        self.keep_raw_payload = bool(self.config.get('keep_raw_payload', False))
+        # API 제한용 대기 여부 (재생 모드에서는 끔)
+        self.pacing = True
+        # 요청당 timeout(초) - 실행 마감(run_deadline.RunDeadline)이 있으면 남은 수집 시간으로 더 줄임
+        self.request_timeout = float(self.config.get('slack_timeout', 30))
+        self.deadline = None
+        self.deadline_skipped = 0
+    
+    def timeout(self) -> float:
+        """이번 HTTP 요청에 줄 timeout(초)"""
+        if self.deadline is None:
+            return self.request_timeout
+        return self.deadline.timeout(self.request_timeout, "fetch")
         
+    def api_get(self, url: str, params: Dict[str, Any], max_retries: int = 3) -> Any:
+        """
+        공유 호출 예산을 지키며 Slack API GET 호출
+        429 응답이면 Retry-After 만큼 기다린 뒤 재시도
+        """
+        for attempt in range(max_retries + 1):
+            if self.pacing:
+                self.rate_limiter.acquire()
+            response = self.http.get(url, headers=self.headers, params=params, timeout=self.timeout())
+            if response.status_code != 429 or attempt == max_retries:
+                return response
+            
+            retry_after = float(response.headers.get("Retry-After", 1))
+            print(f"Slack API 제한 - {retry_after}초 후 재시도")
+            self.rate_limiter.penalize(retry_after)
+            time.sleep(retry_after)
+        return response
+    
     def get_date_range(self, custom_start: Optional[str] = None, custom_end: Optional[str] = None) -> tuple:
         """
         날짜 범위 계산
@@ -44,11 +95,12 @@ class SlackFetcher:
         
         return start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
     
-    def fetch_messages(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+    def fetch_messages(self, start_date: str, end_date: str, channel_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        지정된 날짜 범위의 메시지들을 가져옴
+        지정된 날짜 범위의 메시지들을 가져옴 (channel_id 생략 시 기본 채널)
         """
-        print(f"메시지 수집 중: {start_date} ~ {end_date}")
+        channel_id = channel_id or self.channel_id
+        print(f"메시지 수집 중: {start_date} ~ {end_date} ({channel_id})")
         
         # Unix timestamp로 변환
         start_ts = int(datetime.strptime(start_date, '%Y-%m-%d').timestamp())
@@ -59,7 +111,7 @@ class SlackFetcher:
         
         while True:
             params = {
-                "channel": self.channel_id,
+                "channel": channel_id,
                 "oldest": start_ts,
                 "latest": end_ts,
                 "limit": 200
@@ -69,11 +121,7 @@ class SlackFetcher:
                 params["cursor"] = cursor
             
             try:
-                response = requests.get(
-                    "https://slack.com/api/conversations.history",
-                    headers=self.headers,
-                    params=params
-                )
+                response = self.api_get("https://slack.com/api/conversations.history", params)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -82,6 +130,8 @@ class SlackFetcher:
                     break
                 
                 messages = data.get("messages", [])
+                for message in messages:
+                    message.setdefault("channel", channel_id)
                 all_messages.extend(messages)
                 
                 print(f"수집된 메시지: {len(messages)}개 (총 {len(all_messages)}개)")
@@ -93,9 +143,6 @@ class SlackFetcher:
                 cursor = data.get("response_metadata", {}).get("next_cursor")
                 if not cursor:
                     break
-                    
-                # API 제한 고려
-                time.sleep(1)
                 
             except requests.exceptions.RequestException as e:
                 print(f"요청 오류: {e}")
@@ -104,21 +151,17 @@ class SlackFetcher:
         print(f"총 {len(all_messages)}개 메시지 수집 완료")
         return all_messages
     
-    def fetch_thread_replies(self, message_ts: str) -> List[Dict[str, Any]]:
+    def fetch_thread_replies(self, message_ts: str, channel_id: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         특정 메시지의 스레드 댓글들을 가져옴
         """
         params = {
-            "channel": self.channel_id,
+            "channel": channel_id or self.channel_id,
             "ts": message_ts
         }
         
         try:
-            response = requests.get(
-                "https://slack.com/api/conversations.replies",
-                headers=self.headers,
-                params=params
-            )
+            response = self.api_get("https://slack.com/api/conversations.replies", params)
             response.raise_for_status()
             data = response.json()
             
@@ -147,10 +190,13 @@ class SlackFetcher:
             return None
         
         filename = file_info.get("name", "unknown_file")
+        # 여러 채널에서 같은 파일명이 동시에 내려올 수 있으므로 파일 ID 를 앞에 붙임
+        if file_info.get("id"):
+            filename = f"{file_info['id']}_{filename}"
         filepath = os.path.join(download_dir, filename)
         
         try:
-            response = requests.get(file_url, headers=self.headers, stream=True)
+            response = self.http.get(file_url, headers=self.headers, stream=True, timeout=self.timeout())
             response.raise_for_status()
             
             with open(filepath, 'wb') as f:
@@ -164,73 +210,111 @@ class SlackFetcher:
             print(f"파일 다운로드 오류: {e}")
             return None
     
-    def process_messages_with_threads(self, messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def process_messages_with_threads(self, messages: List[Dict[str, Any]],
+                                      writer: Optional[JsonlWriter] = None) -> List[SlackThread]:
         """
-        메시지와 스레드 댓글을 함께 처리
+        메시지와 스레드 댓글을 함께 처리하여 경량 레코드(SlackThread) 목록 반환
+        writer: 지정하면 스레드 하나가 처리될 때마다 바로 기록
         """
         processed_messages = []
         
         for i, message in enumerate(messages):
             print(f"메시지 처리 중: {i+1}/{len(messages)}")
             
-            # 원본 메시지 정보
-            message_data = {
-                "ts": message["ts"],
-                "user": message.get("user"),
-                "text": message.get("text", ""),
-                "thread_ts": message.get("thread_ts"),
-                "original_message": message,
-                "thread_replies": [],
-                "downloaded_files": []
-            }
+            # 원본 메시지 정보 (필요한 필드만)
+            message_data = SlackThread.from_slack(message, self.keep_raw_payload)
+            
+            # 수집 예산을 다 쓰면 댓글/첨부 파일 없이 원본 메시지만 넘김
+            if self.deadline is not None and self.deadline.expired("fetch"):
+                if message.get("thread_ts") or message_data.files:
+                    self.deadline_skipped += 1
+                    print("  - 수집 마감 초과: 댓글/첨부 파일 생략")
+                processed_messages.append(message_data)
+                if writer is not None:
+                    writer.write(message_data.to_dict())
+                continue
             
             # 스레드 댓글 수집
             if message.get("thread_ts"):
-                replies = self.fetch_thread_replies(message["thread_ts"])
-                message_data["thread_replies"] = replies
+                replies = self.fetch_thread_replies(message["thread_ts"], message_data.channel)
+                message_data.replies = [SlackReply.from_slack(r, self.keep_raw_payload) for r in replies]
                 print(f"  - 댓글 {len(replies)}개 수집")
             
             # 첨부 파일 다운로드
-            if message.get("files"):
-                for file_info in message["files"]:
-                    if file_info.get("filetype") in ["xls", "xlsx"]:
-                        filepath = self.download_file(file_info)
-                        if filepath:
-                            message_data["downloaded_files"].append({
-                                "file_info": file_info,
-                                "filepath": filepath
-                            })
+            for file_info in message_data.files:
+                if file_info.get("filetype") in ["xls", "xlsx"]:
+                    filepath = self.download_file(file_info)
+                    if filepath:
+                        message_data.downloaded_files.append({
+                            "name": file_info.get("name"),
+                            "filepath": filepath
+                        })
             
             processed_messages.append(message_data)
-            
-            # API 제한 고려
-            time.sleep(0.5)
+            if writer is not None:
+                writer.write(message_data.to_dict())
         
         return processed_messages
     
-    def save_processed_data(self, processed_messages: List[Dict[str, Any]], filename: str = "processed_slack_data.json"):
+    def fetch_channel_threads(self, channel_id: str, start_date: str, end_date: str,
+                              writer: Optional[JsonlWriter] = None) -> List[SlackThread]:
+        """채널 1개의 메시지와 스레드/첨부 파일 수집"""
+        messages = self.fetch_messages(start_date, end_date, channel_id)
+        return self.process_messages_with_threads(messages, writer)
+    
+    def fetch_all_channels(self, start_date: str, end_date: str,
+                           writer: Optional[JsonlWriter] = None) -> List[SlackThread]:
+        """
+        channel_ids 의 모든 채널을 동시에 수집하여 시간순으로 병합
+        호출 예산(rate_limiter)은 모든 채널이 공유하므로 전체 소요 시간은 가장 느린 채널 수준
+        """
+        if len(self.channel_ids) == 1:
+            return self.fetch_channel_threads(self.channel_ids[0], start_date, end_date, writer)
+        
+        with ThreadPoolExecutor(max_workers=len(self.channel_ids)) as executor:
+            futures = [
+                executor.submit(self.fetch_channel_threads, channel_id, start_date, end_date, writer)
+                for channel_id in self.channel_ids
+            ]
+            threads = [thread for future in futures for thread in future.result()]
+        
+        threads.sort(key=lambda thread: float(thread.ts or 0))
+        print(f"{len(self.channel_ids)}개 채널에서 총 {len(threads)}개 스레드 수집 완료")
+        return threads
+    
+    def save_processed_data(self, processed_messages: List[SlackThread], filename: str = "processed_slack_data.json"):
         """
-        처리된 데이터를 JSON 파일로 저장
+        처리된 데이터를 파일로 저장
+        - .jsonl / .jsonl.gz / .jsonl.zst: 스레드당 한 줄
+        - 그 외: 기존 JSON 배열
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(processed_messages, f, ensure_ascii=False, indent=2)
+        processed_messages = [SlackThread.coerce(m).to_dict() for m in processed_messages]
+        if is_jsonl_path(filename):
+            write_jsonl(filename, processed_messages)
+        else:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(processed_messages, f, ensure_ascii=False, indent=2)
         print(f"처리된 데이터 저장: {filename}")
     
-    def fetch_all_data(self, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+    @staticmethod
+    def load_processed_data(filename: str = PROCESSED_DATA_PATH):
+        """
+        저장된 처리 데이터를 스레드 단위(SlackThread)로 지연 로드 (JSON 배열 파일도 지원)
+        """
+        return (SlackThread.from_dict(record) for record in iter_records(filename))
+    
+    def fetch_all_data(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                       output_path: str = PROCESSED_DATA_PATH) -> List[SlackThread]:
         """
-        전체 데이터 수집 프로세스 실행
+        전체 데이터 수집 프로세스 실행 (처리되는 스레드를 바로 output_path 에 기록)
         """
         # 날짜 범위 계산
         start_date, end_date = self.get_date_range(start_date, end_date)
         
-        # 메시지 수집
-        messages = self.fetch_messages(start_date, end_date)
-        
-        # 스레드와 파일 처리
-        processed_messages = self.process_messages_with_threads(messages)
-        
-        # 데이터 저장
-        self.save_processed_data(processed_messages)
+        # 전체 채널 메시지/스레드/파일 수집 + 스트리밍 저장
+        with JsonlWriter(output_path) as writer:
+            processed_messages = self.fetch_all_channels(start_date, end_date, writer)
+        print(f"처리된 데이터 저장: {output_path}")
         
         return processed_messages
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+수집된 Slack 메시지의 경량 레코드
+파이프라인이 실제로 쓰는 필드(ts, user, text, 파일 참조, thread_ts)만 보관하고
+원본 payload(blocks, attachments, reactions 등)는 디버그 옵션일 때만 유지
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional
+
+
+def file_refs(message: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """첨부 파일 정보 중 다운로드/식별에 필요한 필드만 추출"""
+    return [
+        {
+            "id": f.get("id"),
+            "name": f.get("name"),
+            "filetype": f.get("filetype"),
+            "url_private_download": f.get("url_private_download")
+        }
+        for f in message.get("files", [])
+    ]
+
+
+@dataclass(slots=True)
+class SlackReply:
+    """스레드 댓글 1건"""
+    ts: str
+    user: Optional[str]
+    text: str
+    thread_ts: Optional[str] = None
+    subtype: Optional[str] = None
+    files: List[Dict[str, Any]] = field(default_factory=list)
+    raw: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_slack(cls, message: Dict[str, Any], keep_raw: bool = False) -> "SlackReply":
+        """Slack API 메시지 dict 에서 생성"""
+        return cls(
+            ts=message.get("ts", ""),
+            user=message.get("user") or message.get("bot_id"),
+            text=message.get("text", ""),
+            thread_ts=message.get("thread_ts"),
+            subtype=message.get("subtype"),
+            files=file_refs(message),
+            raw=message if keep_raw else None
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "ts": self.ts,
+            "user": self.user,
+            "text": self.text,
+            "thread_ts": self.thread_ts,
+            "subtype": self.subtype,
+            "files": self.files
+        }
+        if self.raw is not None:
+            data["raw"] = self.raw
+        return data
+
+
+@dataclass(slots=True)
+class SlackThread:
+    """원본 메시지 + 댓글 + 다운로드된 첨부 파일"""
+    ts: str
+    user: Optional[str]
+    text: str
+    thread_ts: Optional[str] = None
+    subtype: Optional[str] = None
+    channel: Optional[str] = None
+    files: List[Dict[str, Any]] = field(default_factory=list)
+    replies: List[SlackReply] = field(default_factory=list)
+    downloaded_files: List[Dict[str, Any]] = field(default_factory=list)
+    raw: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_slack(cls, message: Dict[str, Any], keep_raw: bool = False) -> "SlackThread":
+        """Slack API 메시지 dict 에서 생성"""
+        return cls(
+            ts=message.get("ts", ""),
+            user=message.get("user") or message.get("bot_id"),
+            text=message.get("text", ""),
+            thread_ts=message.get("thread_ts"),
+            subtype=message.get("subtype"),
+            channel=message.get("channel"),
+            files=file_refs(message),
+            raw=message if keep_raw else None
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SlackThread":
+        """
+        저장된 dict 에서 복원
+        to_dict() 형태와 기존 형태(original_message / thread_replies) 모두 지원
+        """
+        if "original_message" in data:
+            original = data.get("original_message") or {}
+            thread = cls.from_slack({**original, "ts": data.get("ts", original.get("ts", ""))})
+            thread.text = original.get("text", data.get("text", ""))
+            thread.replies = [SlackReply.from_slack(r) for r in data.get("thread_replies", [])]
+        else:
+            thread = cls(
+                ts=data.get("ts", ""),
+                user=data.get("user"),
+                text=data.get("text", ""),
+                thread_ts=data.get("thread_ts"),
+                subtype=data.get("subtype"),
+                channel=data.get("channel"),
+                files=data.get("files", []),
+                replies=[SlackReply(**{k: v for k, v in r.items() if k in SlackReply.__slots__})
+                         for r in data.get("replies", [])],
+                raw=data.get("raw")
+            )
+        thread.downloaded_files = [
+            {"name": (f.get("file_info") or {}).get("name", f.get("name")), "filepath": f.get("filepath")}
+            for f in data.get("downloaded_files", [])
+        ]
+        return thread
+
+    @classmethod
+    def coerce(cls, value: Any) -> "SlackThread":
+        """SlackThread 또는 dict 를 SlackThread 로 변환"""
+        return value if isinstance(value, cls) else cls.from_dict(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {
+            "ts": self.ts,
+            "user": self.user,
+            "text": self.text,
+            "thread_ts": self.thread_ts,
+            "subtype": self.subtype,
+            "channel": self.channel,
+            "files": self.files,
+            "replies": [reply.to_dict() for reply in self.replies],
+            "downloaded_files": self.downloaded_files
+        }
+        if self.raw is not None:
+            data["raw"] = self.raw
+        return data
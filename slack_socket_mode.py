@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Slack 소켓 모드 수신기
+공개 HTTP 엔드포인트 없이 message 이벤트를 받아 실시간 집계로 전달
+(websocket-client 패키지 필요: pip install websocket-client)
+"""
+
+import json
+import time
+from typing import Dict, Any, Optional
+
+import requests
+
+from live_aggregator import LiveAggregator
+
+
+class SocketModeRunner:
+    def __init__(self, app_token: str, live_aggregator: LiveAggregator, http: Optional[Any] = None):
+        """
+        app_token: connections:write 권한의 앱 수준 토큰 (xapp-...)
+        """
+        self.app_token = app_token
+        self.live = live_aggregator
+        self.http = http if http is not None else requests
+        self.running = False
+
+    def open_connection_url(self) -> str:
+        """apps.connections.open 으로 WebSocket URL 발급"""
+        response = self.http.post(
+            "https://slack.com/api/apps.connections.open",
+            headers={"Authorization": f"Bearer {self.app_token}"},
+            timeout=10
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("ok"):
+            raise RuntimeError(f"소켓 모드 연결 오류: {data.get('error')}")
+        return data["url"]
+
+    def handle_envelope(self, envelope: Dict[str, Any], ws: Any) -> bool:
+        """
+        소켓 모드 메시지 1건 처리
+        반환: 연결을 유지하면 True, 재연결이 필요하면 False
+        """
+        envelope_type = envelope.get("type")
+
+        if envelope_type == "disconnect":
+            print(f"소켓 모드 재연결 요청: {envelope.get('reason')}")
+            return False
+
+        # 이벤트 수신 확인(ack)은 처리 전에 먼저 보냄
+        if envelope.get("envelope_id"):
+            ws.send(json.dumps({"envelope_id": envelope["envelope_id"]}))
+
+        if envelope_type == "events_api":
+            event = envelope.get("payload", {}).get("event", {})
+            if event.get("type") == "message":
+                self.live.handle_event(event)
+
+        return True
+
+    def serve(self, ws: Any, timeout_error: type):
+        """
+        연결 1개에서 이벤트 수신 (연결이 끊기거나 재연결 요청을 받으면 반환)
+        이벤트가 없어 recv 가 시간 초과되면 ping 으로 연결만 확인하고 같은 연결을 계속 사용
+        """
+        while self.running:
+            try:
+                raw = ws.recv()
+            except timeout_error:
+                ws.ping()
+                continue
+            if not raw:
+                return
+            if not self.handle_envelope(json.loads(raw), ws):
+                return
+
+    def run(self):
+        """연결이 끊기면 재연결하며 이벤트 수신"""
+        try:
+            import websocket
+        except ImportError:
+            print("소켓 모드에는 websocket-client 패키지가 필요합니다: pip install websocket-client")
+            return
+
+        self.running = True
+        while self.running:
+            ws = None
+            try:
+                ws = websocket.create_connection(self.open_connection_url(), timeout=60)
+                print("소켓 모드 연결됨")
+                self.serve(ws, websocket.WebSocketTimeoutException)
+            except Exception as e:
+                print(f"소켓 모드 오류: {e}")
+                time.sleep(5)
+            finally:
+                if ws is not None:
+                    ws.close()
+
+    def stop(self):
+        self.running = False
+
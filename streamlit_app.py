@@ -11,6 +11,7 @@ import pandas as pd
 from slack_fetcher import SlackFetcher
 from aggregator import DataAggregator
 from excel_generator import ExcelGenerator
+from run_deadline import RunDeadline
 import io
 
 def check_dependencies():
@@ -37,6 +38,14 @@ def get_api_keys_from_session():
         "warehouse_code": st.session_state.get('warehouse_code', '100')
     }
 
+def get_run_deadline(api_keys):
+    """실행 마감 (세션에는 마감 설정이 없으므로 config.json 의 run_deadline / run_budget_minutes 사용)"""
+    config = {}
+    if os.path.exists("config.json"):
+        with open("config.json", 'r', encoding='utf-8') as f:
+            config = json.load(f)
+    return RunDeadline.from_config({**config, **api_keys})
+
 def check_config():
     """설정 파일 검증 (세션 상태 우선)"""
     import os
@@ -206,8 +215,10 @@ def main():
                     api_keys = get_api_keys_from_session()
                     
                     # 모듈 초기화 (API 키 전달)
+                    deadline = get_run_deadline(api_keys)
                     slack_fetcher = SlackFetcher(api_keys=api_keys)
-                    aggregator = DataAggregator(api_keys=api_keys)
+                    slack_fetcher.deadline = deadline
+                    aggregator = DataAggregator(api_keys=api_keys, deadline=deadline)
                     
                     # 진행률 표시
                     progress_bar = st.progress(0)
@@ -217,8 +228,7 @@ def main():
                     status_text.text("Slack 메시지 수집 중...")
                     progress_bar.progress(20)
                     
-                    messages = slack_fetcher.fetch_messages(start_date, end_date)
-                    processed_messages = slack_fetcher.process_messages_with_threads(messages)
+                    processed_messages = slack_fetcher.fetch_all_channels(start_date, end_date)
                     
                     # 2단계: 데이터 집계
                     status_text.text("데이터 집계 중...")
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+AIMD 동시성 제한기 테스트
+"""
+
+from adaptive_concurrency import AdaptiveConcurrencyLimiter, parse_reset
+from key_pool import KeyPool
+from test_mock_llm import make_matcher
+
+
+def run_saturated(limiter, count, latency=0.1, headers=None):
+    """현재 한도만큼 동시에 들어간 상태에서 성공 응답 count 개 반영"""
+    for _ in range(count):
+        slots = limiter.current_limit
+        for _ in range(slots):
+            limiter.acquire()
+        for _ in range(slots):
+            limiter.release(latency=latency, headers=headers)
+
+
+def test_aimd_limits():
+    """정상이면 천천히 증가, 429/지연 상승/헤더 소진이면 절반으로"""
+    print("=== AIMD 테스트 ===")
+    assert parse_reset("6m0s") == 360 and parse_reset("20ms") == 0.02 and parse_reset("2") == 2.0
+
+    limiter = AdaptiveConcurrencyLimiter(initial=4, max_limit=8, cooldown=0)
+    run_saturated(limiter, 6)
+    assert 5 <= limiter.current_limit <= 8
+    grown = limiter.current_limit
+
+    limiter.acquire()
+    limiter.release(status=429, headers={"retry-after": "0"})
+    assert limiter.current_limit == grown // 2 or limiter.current_limit == int(grown * 0.5)
+    print(f"  증가 후 {grown} -> 429 후 {limiter.current_limit}")
+
+    # 지연시간이 기준의 2배를 넘으면 감소
+    before = limiter.current_limit
+    run_saturated(limiter, 1, latency=1.0)
+    assert limiter.current_limit < before or limiter.current_limit == 1
+
+    # 남은 요청 수가 동시 호출 수보다 적으면 그 이상 늘리지 않음
+    capped = AdaptiveConcurrencyLimiter(initial=2, max_limit=32, cooldown=0)
+    run_saturated(capped, 20, headers={"x-ratelimit-remaining-requests": "3"})
+    assert capped.current_limit <= 4
+    print(f"  남은 요청 3개 기준 한도: {capped.current_limit} ({capped.summary()})")
+
+
+def test_matcher_waits_for_rate_limit_window():
+    """x-ratelimit-remaining 이 바닥나면 초기화 시각까지 기다려 429 없이 결과를 모두 받음"""
+    print("\n=== 한도 창 재시도 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False},
+                                   rate_limits={"requests": 3}, rate_window=0.2)
+    results = [matcher.extract_products_from_text("블루아쿠아마스크 3개") for _ in range(5)]
+    assert all(result and result[0]["quantity"] == 3 for result in results)
+    assert client.get_stats()["rate_limited"] == 0
+    assert client.get_stats()["calls"] == 5
+    assert matcher.concurrency.summary()["decreases"] >= 1
+
+
+
+def test_sdk_retries_disabled():
+    """실제 OpenAI 클라이언트는 SDK 재시도 없이 생성 (재시도는 _complete 한 곳에서만)"""
+    print("\n=== SDK 재시도 비활성화 테스트 ===")
+    matcher, _ = make_matcher()
+    matcher.key_pool = KeyPool.from_config({"openai_api_keys": ["sk-test-aaaa", "sk-test-bbbb"]}, matcher.make_client)
+    assert [key.client.max_retries for key in matcher.key_pool.keys] == [0, 0]
+
+
+if __name__ == "__main__":
+    test_aimd_limits()
+    test_matcher_waits_for_rate_limit_window()
+    test_sdk_retries_disabled()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""
+배치 백필 테스트 (모의 클라이언트의 files/batches 사용)
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from aggregator import DataAggregator
+from batch_backfill import BatchBackfill
+from mock_openai import MockOpenAIClient
+from slack_records import SlackThread, SlackReply
+from test_mock_llm import SAMPLE_DB
+
+THREADS = [
+    SlackThread(ts="1.0", user="U1", text="쌀겨수클렌징 패드 10개, 시그니처 세트 2세트"),
+    SlackThread(ts="2.0", user="U1", text="블루 아쿠아 마스크 5개",
+                replies=[SlackReply(ts="2.1", user="U2", text="클라우드 컨실러 01호 3개 추가")]),
+]
+
+
+def make_aggregator(db_path, **client_kwargs):
+    client = MockOpenAIClient(SAMPLE_DB, **client_kwargs)
+    aggregator = DataAggregator(api_keys={"products_db": db_path, "rule_extraction": False}, client=client)
+    return aggregator, client
+
+
+def quantities(result):
+    return {p["품목코드"]: p["총_수량"] for p in result["aggregated_products"]}
+
+
+def test_backfill_matches_live_run():
+    """배치로 추출 -> 매칭 요청을 단계별로 보내고, 실시간 집계와 같은 결과로 병합"""
+    print("=== 배치 백필 테스트 ===")
+    work_dir = tempfile.mkdtemp()
+    db_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    json.dump(SAMPLE_DB, db_file, ensure_ascii=False)
+    db_file.close()
+    try:
+        live_aggregator, _ = make_aggregator(db_file.name)
+        live = live_aggregator.aggregate_products(THREADS)
+
+        aggregator, client = make_aggregator(db_file.name, batch_polls=2)
+        local_matches = []
+        local_match = aggregator.gpt_matcher.local_match
+        aggregator.gpt_matcher.local_match = lambda *args: local_matches.append(args) or local_match(*args)
+        backfill = BatchBackfill(aggregator, work_dir=work_dir, poll_interval=0)
+        result = backfill.run(THREADS)
+        stats = client.get_stats()
+        print(f"백필 통계: {backfill.stats}, 모의 클라이언트: {stats}")
+        assert quantities(result) == quantities(live)
+        assert quantities(result)["200001"] == 10 and quantities(result)["200002"] == 5
+        assert stats["calls"] == 0 and stats["batch_requests"] == backfill.stats["requests"]
+        assert backfill.stats["rounds"] >= 3 and aggregator.gpt_matcher.batch is None
+        # 수집 회차의 대기 요청은 API 오류로 보고 로컬 매칭하지 않음
+        assert local_matches == []
+
+        # 같은 작업 폴더로 다시 실행하면 저장된 응답만으로 처리 (배치 제출 없음)
+        aggregator, client = make_aggregator(db_file.name)
+        rerun = BatchBackfill(aggregator, work_dir=work_dir, poll_interval=0)
+        assert quantities(rerun.run(THREADS)) == quantities(live)
+        assert rerun.stats["batches"] == 0 and client.get_stats()["batch_requests"] == 0
+    finally:
+        shutil.rmtree(work_dir)
+        os.remove(db_file.name)
+
+
+if __name__ == "__main__":
+    test_backfill_matches_live_run()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+브랜드 감지 및 브랜드 우선 후보 축소 테스트
+"""
+
+from brand_detector import BrandDetector
+from slack_records import SlackThread
+from test_mock_llm import make_matcher
+
+
+def test_brand_detection_variants():
+    """띄어쓰기/영문 별칭/괄호 표기 차이를 같은 브랜드로 인식하는지 확인"""
+    print("=== 브랜드 감지 테스트 ===")
+    detector = BrandDetector(["탐뷰티", "바루랩", "바루랩프로(BARULAB PRO)"], {"탐뷰티": ["TAM BEAUTY"]})
+
+    assert detector.detect("탐 뷰티 더 클라우드 컨실러 10개") == "탐뷰티"
+    assert detector.detect("Tam Beauty concealer") == "탐뷰티"
+    assert detector.detect("barulab pro 세럼") == "바루랩프로(BARULAB PRO)"
+    assert detector.detect("쌀겨수 바루랩 3개") == "바루랩"
+    assert detector.detect_all("탐뷰티 2개, 바루랩 1개") == ["탐뷰티", "바루랩"]
+    assert detector.detect("확인했습니다") is None
+
+    # 별칭은 단어 경계에서만 (조사는 허용, 다른 단어 안의 부분 일치는 제외)
+    detector = BrandDetector(["탐뷰티", "바루랩"], {"탐뷰티": ["TAM"], "바루랩": ["바루"]})
+    assert detector.detect("바루랩에서 온 주문") == "바루랩"
+    assert detector.detect("TAM 컨실러 2개") == "탐뷰티"
+    assert detector.detect("바루는 내일 출고") == "바루랩"
+    assert detector.detect("stamp 2개, 바루다 세트") is None
+
+
+def test_match_prompt_is_brand_scoped():
+    """브랜드가 감지되면 매칭 프롬프트에 해당 브랜드 제품만 들어가는지 확인"""
+    print("\n=== 브랜드 범위 매칭 테스트 ===")
+    matcher, client = make_matcher()
+    prompts = []
+    original = client.complete
+
+    def capture(model, messages, **kwargs):
+        prompts.append("\n".join(m["content"] for m in messages))
+        return original(model, messages, **kwargs)
+
+    client.complete = capture
+    matcher.match_product_to_code("클렌징 패드", brand_hint="바루랩")
+    assert "쌀겨수 클렌징패드" in prompts[0]
+    assert "더 클라우드 컨실러" not in prompts[0]
+
+    # 제품명에서 감지한 브랜드 범위에서 실패해도 전체 카탈로그로 재시도
+    assert matcher.match_scopes("바루랩 클라우드 컨실러 01호") == [{"바루랩": matcher.products_db["바루랩"]},
+                                                                 matcher.products_db]
+    assert matcher.match_product_to_code("바루랩 클라우드 컨실러 01호")["품목코드"] == "100001"
+
+
+
+def test_mixed_brand_message():
+    """브랜드 단어가 한 제품에만 붙은 메시지에서 다른 브랜드 제품도 매칭되는지 확인"""
+    print("\n=== 브랜드 혼합 메시지 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    assert matcher.message_brand("탐뷰티 2개, 바루랩 1개") is None
+    assert matcher.message_brand("탐뷰티 시그니처 세트 1개") == "탐뷰티"
+
+    thread = SlackThread(ts="1.0", user="U1", text="탐뷰티 시그니처 세트 1개, 쌀겨수클렌징 패드 2개")
+    results = matcher.process_message_thread(thread)
+    print(f"  결과: {[(r['product_name'], r['품목코드']) for r in results]}, 미확인: {matcher.unresolved}")
+    assert sorted(r["품목코드"] for r in results) == ["100010", "200001"]
+    assert not matcher.unresolved
+    # 브랜드 범위 실패는 그 범위로만 기억 (전체 카탈로그 결과에는 영향 없음)
+    assert all(miss["scope"] != "*" for miss in matcher.negative_cache.report())
+
+
+if __name__ == "__main__":
+    test_brand_detection_variants()
+    test_match_prompt_is_brand_scoped()
+    test_mixed_brand_message()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+품목코드 직접 인식 테스트
+"""
+
+from catalog_index import CatalogIndex
+from test_mock_llm import SAMPLE_DB, make_matcher
+
+VARIANT_DB = {
+    "탐뷰티": {
+        "100001": "더 클라우드 컨실러 01호",
+        "100002": "더 클라우드 컨실러 02호",
+        "100003": "더 클라우드 컨실러 03호",
+        "100004": "더 클라우드 컨실러 04호",
+        "100010": "시그니처 세트"
+    },
+    "바루랩": {
+        "200003": "수분크림 50ml",
+        "200004": "수분크림 100ml"
+    }
+}
+
+
+def test_code_items():
+    """품목코드 + 수량 구간은 바로 확정하고 나머지 구간만 남기는지 확인"""
+    print("=== 품목코드 인식 테스트 ===")
+    index = CatalogIndex(SAMPLE_DB)
+
+    pairs, remaining = index.extract_code_items("100002 x 10, 쇼핑백(200001) 2ea\n블루아쿠아마스크 2개")
+    print(f"  {pairs}\n  {remaining}")
+    assert [(m["품목코드"], p["quantity"], p["unit"]) for p, m in pairs] == [("100002", 10, "개"), ("200001", 2, "ea")]
+    assert all(m["confidence"] == 100 for _, m in pairs)
+    assert remaining == ["블루아쿠아마스크 2개"]
+
+    # 수량이 없거나 코드가 여러 개인 구간은 확정하지 않음
+    assert index.extract_code_items("100002")[0] == []
+    assert index.extract_code_items("100001 100002 각 10개")[0] == []
+
+
+def test_code_message_skips_gpt():
+    """품목코드만 적힌 메시지는 GPT 호출 없이 처리되는지 확인"""
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    pairs = matcher.extract_matched_products("100010 x 3\n200002 x 5")
+    assert [(m["품목코드"], p["quantity"]) for p, m in pairs] == [("100010", 3), ("200002", 5)]
+    assert client.get_stats()["calls"] == 0
+    assert matcher.match_product_to_code("100001")["제품명"] == "더 클라우드 컨실러 01호"
+
+
+def test_variant_expansion():
+    """"각 N개씩" 주문이 변형 묶음의 구체적인 품목으로 전개되는지 확인"""
+    print("\n=== 변형 묶음 전개 테스트 ===")
+    index = CatalogIndex(VARIANT_DB)
+
+    pairs, rest = index.expand_variant_orders("탐뷰티 더 클라우드 컨실러 4홋수 각 10개씩, 시그니처 세트 1ea")
+    assert [m["품목코드"] for _, m in pairs] == ["100001", "100002", "100003", "100004"]
+    assert all(p["quantity"] == 10 for p, _ in pairs)
+    assert "시그니처 세트 1ea" in rest
+
+    pairs, _ = index.expand_variant_orders("컨실러 01호, 02호 각 10개")
+    assert [(m["품목코드"], m["confidence"]) for _, m in pairs] == [("100001", 100), ("100002", 100)]
+
+    pairs, _ = index.expand_variant_orders("수분크림 50ml/100ml 각각 3세트")
+    assert [(m["품목코드"], p["unit"]) for p, m in pairs] == [("200003", "세트"), ("200004", "세트")]
+
+    # 개수가 맞지 않거나 없는 호수는 전개하지 않음 (GPT 로 넘김)
+    assert index.expand_variant_orders("컨실러 3홋수 각 10개")[0] == []
+    assert index.expand_variant_orders("컨실러 05호, 01호 각 2개")[0] == []
+    # 기본명만 있으면 전체 묶음인지 알 수 없으므로 개수나 "전 호수" 가 있어야 전개
+    assert index.expand_variant_orders("컨실러 각 10개")[0] == []
+    pairs, _ = index.expand_variant_orders("컨실러 전 호수 각 10개")
+    assert [(m["품목코드"], m["confidence"]) for _, m in pairs] == [
+        ("100001", 90), ("100002", 90), ("100003", 90), ("100004", 90)]
+
+    # 규칙 추출과 함께 쓰면 GPT 호출 없이 처리
+    matcher, client = make_matcher()
+    pairs = matcher.extract_matched_products("컨실러 01호, 02호 각 10개씩\n시그니처 세트 1ea")
+    assert [m["품목코드"] for _, m in pairs] == ["100001", "100002", "100010"]
+    assert client.get_stats()["calls"] == 0
+
+
+if __name__ == "__main__":
+    test_code_items()
+    test_code_message_skips_gpt()
+    test_variant_expansion()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+회로 차단기 / 로컬 매칭 대체 테스트
+"""
+
+import time
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from test_mock_llm import make_matcher
+
+
+def test_breaker_states():
+    """연속 실패로 열림 -> reset_timeout 후 반열림 시험 호출 -> 성공하면 닫힘"""
+    print("=== 회로 차단기 상태 테스트 ===")
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_seconds=1.0, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CLOSED and breaker.allow()
+    breaker.record_success(5.0)  # 느린 호출도 실패로 셈
+    assert breaker.state == OPEN and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow() and breaker.state == HALF_OPEN
+    assert not breaker.allow()  # 시험 호출은 1건만
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED
+    summary = breaker.summary()
+    print(f"  통계: {summary}")
+    assert summary["trips"] == 2 and summary["slow_calls"] == 1 and summary["rejected"] == 2
+
+
+def test_outage_falls_back_to_local_matcher():
+    """장애 중에는 몇 번만 실패한 뒤 호출 없이 로컬 매칭 결과를 검토 필요로 반환"""
+    print("\n=== 장애 시 로컬 매칭 테스트 ===")
+    matcher, client = make_matcher(config={"circuit_breaker": {"failure_threshold": 2, "reset_timeout": 60},
+                                           "llm_rate_limit_retries": 0},
+                                   error_rates={500: 1.0})
+    matches = [matcher.match_product_to_code("쌀겨수클렌징 패드") for _ in range(5)]
+    assert client.get_stats()["calls"] == 2
+    assert all(m["품목코드"] == "200001" and m["needs_review"] for m in matches)
+    assert matcher.breaker.summary()["state"] == OPEN
+    assert matcher.llm_stats["match_circuit_open"] == 3
+
+    # 추출도 규칙으로 해석한 부분만 사용
+    products = matcher.extract_products_from_text("블루아쿠아마스크 3개, 그 외 지난번 것들")
+    assert products[0]["product_name"] == "블루아쿠아마스크"
+    assert matcher.unresolved and matcher.unresolved[-1]["reason"] == "not_extracted"
+
+
+if __name__ == "__main__":
+    test_breaker_states()
+    test_outage_falls_back_to_local_matcher()
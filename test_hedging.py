@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 호출 헤징 테스트
+"""
+
+import itertools
+import time
+
+from hedging import HedgeCancelled, RequestHedger
+
+
+def slow_then_fast():
+    """첫 호출만 느린 호출 함수"""
+    counter = itertools.count()
+
+    def call(sent):
+        n = next(counter)
+        sent()
+        time.sleep(0.5 if n == 0 else 0.01)
+        return f"응답{n}"
+    return call
+
+
+def test_hedge_after_p95():
+    """p95 를 넘긴 호출은 중복 요청하고 먼저 끝난 응답을 사용"""
+    print("=== 헤징 테스트 ===")
+    hedger = RequestHedger(enabled=True, max_rate=1.0, min_samples=3)
+    for _ in range(3):
+        hedger.record("extract", 0.02)
+    assert hedger.hedge_delay("extract") == 0.02
+    assert hedger.hedge_delay("match") is None
+
+    started = time.perf_counter()
+    assert hedger.run("extract", slow_then_fast()) == "응답1"
+    assert time.perf_counter() - started < 0.4
+    summary = hedger.summary()
+    print(f"  통계: {summary}")
+    assert summary["hedged"] == 1 and summary["hedge_wins"] == 1 and summary["hedge_rate"] == 1.0
+
+
+def test_hedge_rate_cap():
+    """중복 요청 비율 상한을 넘으면 원래 호출만 기다림"""
+    print("\n=== 헤징 상한 테스트 ===")
+    hedger = RequestHedger(enabled=True, max_rate=0.0, min_samples=3)
+    for _ in range(3):
+        hedger.record("extract", 0.02)
+    assert hedger.run("extract", slow_then_fast()) == "응답0"
+    assert hedger.summary()["hedged"] == 0
+
+    disabled = RequestHedger(enabled=False, min_samples=0)
+    assert disabled.run("extract", lambda sent: "ok") == "ok"
+    assert disabled.summary()["calls"] == 1
+
+
+def test_queue_wait_not_hedged():
+    """키/동시성 자리 대기 시간은 헤징 타이머와 지연시간 표본에 들어가지 않음"""
+    print("\n=== 대기 시간 제외 테스트 ===")
+    hedger = RequestHedger(enabled=True, max_rate=1.0, min_samples=3)
+    for _ in range(3):
+        hedger.record("extract", 0.05)
+    calls = []
+
+    def queued_call(sent):
+        calls.append(1)
+        time.sleep(0.3)  # 자리 대기
+        sent()
+        time.sleep(0.01)
+        return "ok"
+
+    assert hedger.run("extract", queued_call) == "ok"
+    assert len(calls) == 1 and hedger.summary()["hedged"] == 0
+    assert max(hedger.latencies["extract"]) < 0.2
+
+
+def test_hedge_winner_clock_and_cancel():
+    """이긴 쪽 지연시간은 자기 전송 시각부터, 전송 전인 진 쪽은 취소, close 후에도 다시 사용 가능"""
+    print("\n=== 헤징 승자 지연시간/취소 테스트 ===")
+    hedger = RequestHedger(enabled=True, max_rate=1.0, min_samples=3)
+    for _ in range(3):
+        hedger.record("extract", 0.02)
+    counter = itertools.count()
+
+    def queued_hedge(sent):
+        # 첫 호출은 전송 후 느리고, 중복 요청은 자리 대기 후 빠르게 끝남
+        n = next(counter)
+        if n == 0:
+            sent()
+            time.sleep(0.5)
+        else:
+            time.sleep(0.1)
+            sent()
+            time.sleep(0.01)
+        return f"응답{n}"
+
+    assert hedger.run("extract", queued_hedge) == "응답1"
+    assert hedger.latencies["extract"][-1] < 0.08
+
+    counter = itertools.count()
+    sent_calls, cancelled = [], []
+
+    def slow_slot(sent):
+        # 중복 요청이 자리를 얻기 전에 첫 호출이 끝남
+        n = next(counter)
+        if n == 1:
+            time.sleep(0.2)
+        try:
+            sent()
+        except HedgeCancelled:
+            cancelled.append(n)
+            raise
+        sent_calls.append(n)
+        time.sleep(0.1 if n == 0 else 0.01)
+        return f"응답{n}"
+
+    assert hedger.run("extract", slow_slot) == "응답0"
+    time.sleep(0.3)
+    assert sent_calls == [0] and cancelled == [1]
+
+    hedger.close()
+    assert hedger._executor is None
+    assert hedger.run("extract", slow_then_fast()) == "응답1"
+
+
+if __name__ == "__main__":
+    test_hedge_after_p95()
+    test_hedge_rate_cap()
+    test_queue_wait_not_hedged()
+    test_hedge_winner_clock_and_cancel()
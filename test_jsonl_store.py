@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+JSONL 스트리밍 저장/로드 테스트
+"""
+
+import os
+import tempfile
+
+from jsonl_store import JsonlWriter, iter_records, write_jsonl
+from aggregator import DataAggregator
+
+
+def test_jsonl_roundtrip():
+    """gzip JSONL 로 저장한 스레드가 순서대로 지연 로드되는지 확인"""
+    print("=== JSONL 저장/로드 테스트 ===")
+    path = os.path.join(tempfile.mkdtemp(), "processed.jsonl.gz")
+    threads = [{"ts": f"{i}.0", "text": f"블루아쿠아마스크 {i}개"} for i in range(3)]
+
+    with JsonlWriter(path) as writer:
+        for thread in threads:
+            writer.write(thread)
+    assert writer.count == 3
+
+    records = iter_records(path)
+    assert not isinstance(records, list)
+    assert list(records) == threads
+
+
+def test_aggregated_jsonl_roundtrip():
+    """집계 결과를 JSONL 로 저장 후 같은 형태로 복원되는지 확인"""
+    print("\n=== 집계 데이터 JSONL 테스트 ===")
+    path = os.path.join(tempfile.mkdtemp(), "aggregated.jsonl")
+    aggregated_data = {
+        "aggregated_by_brand": {
+            "바루랩": [{"품목코드": "200001", "제품명": "쌀겨수 클렌징패드", "총_수량": 5}]
+        },
+        "thread_summaries": [{"thread_index": 0, "summary": "출고 처리", "product_count": 1}],
+        "total_products": 1,
+        "unique_products": 1,
+        "brands": ["바루랩"]
+    }
+    aggregated_data["aggregated_products"] = aggregated_data["aggregated_by_brand"]["바루랩"]
+
+    aggregator = DataAggregator.__new__(DataAggregator)
+    aggregator.save_aggregated_data(aggregated_data, path)
+    assert aggregator.load_aggregated_data(path) == aggregated_data
+    assert [p["품목코드"] for p in DataAggregator.iter_aggregated_products(path)] == ["200001"]
+
+
+if __name__ == "__main__":
+    test_jsonl_roundtrip()
+    test_aggregated_jsonl_roundtrip()
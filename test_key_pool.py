@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+API 키 풀 테스트
+"""
+
+from key_pool import KeyPool, PooledKey, estimate_request_tokens
+from mock_openai import MockAPIError, MockOpenAIClient
+from test_mock_llm import SAMPLE_DB, make_matcher
+
+
+def test_requests_spread_across_keys():
+    """요청을 여러 키에 나눠 보내고, 인증 오류 키는 제외"""
+    print("=== 키 풀 분산 테스트 ===")
+    matcher, _ = make_matcher(config={"rule_extraction": False})
+    first, second = MockOpenAIClient(SAMPLE_DB), MockOpenAIClient(SAMPLE_DB)
+    matcher.key_pool = KeyPool([PooledKey("a", first, requests_per_minute=600),
+                                PooledKey("b", second, requests_per_minute=600)])
+    for _ in range(4):
+        assert matcher.extract_products_from_text("블루아쿠아마스크 3개")
+    assert first.get_stats()["calls"] == 2 and second.get_stats()["calls"] == 2
+
+    def unauthorized(model, messages, **kwargs):
+        raise MockAPIError(401, "invalid api key")
+
+    second.complete = unauthorized
+    results = [matcher.extract_products_from_text("블루아쿠아마스크 3개") for _ in range(4)]
+    summary = matcher.key_pool.summary()
+    print(f"  키별 통계: {summary}")
+    assert summary["b"]["state"] == "disabled"
+    assert sum(1 for result in results if result) >= 3
+    assert first.get_stats()["calls"] >= 5
+
+
+def test_token_bucket_settlement():
+    """예상 토큰으로 먼저 차감하고 실제 사용량으로 정산"""
+    print("\n=== 토큰 정산 테스트 ===")
+    messages = [{"role": "user", "content": "블루아쿠아마스크 3개"}]
+    estimated = estimate_request_tokens(messages, 100)
+    assert estimated > 100
+
+    key = PooledKey("a", object(), tokens_per_minute=6000)
+    pool = KeyPool([key])
+    before = key.tokens.tokens
+    assert pool.acquire(estimated) is key
+    pool.release(key, estimated, used_tokens=20)
+    assert abs(key.tokens.tokens - (before - 20)) < 1
+    assert key.stats["tokens"] == 20 and key.in_flight == 0
+
+    pool = KeyPool.from_config({"openai_api_keys": ["sk-aaaa1111", {"api_key": "sk-bbbb2222", "project": "p1"}]},
+                               lambda entry: entry["api_key"])
+    assert [key.client for key in pool.keys] == ["sk-aaaa1111", "sk-bbbb2222"]
+    assert list(pool.summary()) == ["key1(sk-...1111)", "key2(sk-...2222/p1)"]
+
+
+if __name__ == "__main__":
+    test_requests_spread_across_keys()
+    test_token_bucket_settlement()
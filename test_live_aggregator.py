@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+실시간 이벤트 집계 / Slack 이벤트 수신기 테스트
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+
+import flask_app
+from aggregator import DataAggregator
+from live_aggregator import LiveAggregator
+from mock_openai import MockOpenAIClient
+from slack_socket_mode import SocketModeRunner
+from test_mock_llm import SAMPLE_DB
+
+SECRET = "test-signing-secret"
+
+
+def make_live(db_path, **kwargs):
+    aggregator = DataAggregator(api_keys={"products_db": db_path}, client=MockOpenAIClient(SAMPLE_DB))
+    return LiveAggregator(aggregator, channel_ids=["C1"], **kwargs)
+
+
+def write_db():
+    db_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    json.dump(SAMPLE_DB, db_file, ensure_ascii=False)
+    db_file.close()
+    return db_file.name
+
+
+def test_live_aggregation():
+    """원본/댓글 이벤트를 스레드별로 집계하고, 재전송·다른 채널·기타 subtype 은 무시"""
+    print("=== 실시간 집계 테스트 ===")
+    db_path = write_db()
+    try:
+        live = make_live(db_path)
+        ts = f"{time.time():.6f}"
+        events = [
+            {"type": "message", "channel": "C1", "ts": ts, "user": "U1", "text": "블루아쿠아마스크 5개"},
+            {"type": "message", "channel": "C1", "ts": ts, "user": "U1", "text": "블루아쿠아마스크 5개"},
+            {"type": "message", "channel": "C1", "ts": f"{float(ts) + 1:.6f}", "thread_ts": ts,
+             "user": "U2", "text": "쌀겨수 클렌징패드 3개"},
+            {"type": "message", "channel": "C2", "ts": ts, "user": "U1", "text": "블루아쿠아마스크 9개"},
+            {"type": "message", "channel": "C1", "ts": ts, "subtype": "message_changed"},
+        ]
+        accepted = [live.handle_event(event) for event in events]
+        assert accepted == [True, False, True, False, False]
+        live.queue.join()
+
+        status = live.get_status()
+        print(f"  상태: {status}")
+        assert status["processed"] == 2 and status["ignored"] == 3 and status["errors"] == 0
+        day = live.event_date(ts)
+        assert status["days"][day]["threads"] == 1
+
+        result = live.snapshot(day)
+        assert {p["품목코드"]: p["총_수량"] for p in result["aggregated_products"]} == {"200002": 5, "200001": 3}
+        assert live.snapshot("2000-01-01")["total_products"] == 0
+    finally:
+        os.unlink(db_path)
+
+
+def test_seen_is_bounded():
+    """중복 제거용 이벤트 기록은 seen_limit 을 넘지 않음 (오래된 것부터 잊음)"""
+    db_path = write_db()
+    try:
+        live = make_live(db_path, seen_limit=3)
+        for i in range(5):
+            assert live.handle_event({"type": "message", "channel": "C1", "ts": f"{i}.0", "text": ""})
+        live.queue.join()
+        assert list(live.seen) == [("C1", "2.0"), ("C1", "3.0"), ("C1", "4.0")]
+        assert not live.handle_event({"type": "message", "channel": "C1", "ts": "4.0", "text": ""})
+    finally:
+        os.unlink(db_path)
+
+
+def test_unresolved_kept_per_day():
+    """미확인 항목은 날짜별로 따로 보관하고 공유 목록에는 쌓지 않음"""
+    print("\n=== 날짜별 미확인 항목 테스트 ===")
+    db_path = write_db()
+    try:
+        live = make_live(db_path)
+        today = time.time()
+        yesterday = today - 86400
+        live.handle_event({"type": "message", "channel": "C1", "ts": f"{yesterday:.6f}", "text": "쇼핑백 3개"})
+        live.handle_event({"type": "message", "channel": "C1", "ts": f"{today:.6f}", "text": "블루아쿠아마스크 5개"})
+        live.queue.join()
+
+        old = live.snapshot(live.event_date(f"{yesterday:.6f}"))
+        new = live.snapshot(live.event_date(f"{today:.6f}"))
+        assert [item["product_name"] for item in old["unresolved_items"]] == ["쇼핑백"]
+        assert new["unresolved_items"] == [] and new["unique_products"] == 1
+        assert live.aggregator.gpt_matcher.unresolved == []
+    finally:
+        os.unlink(db_path)
+
+
+def signed_headers(body, timestamp=None, secret=SECRET):
+    timestamp = str(int(time.time()) if timestamp is None else timestamp)
+    basestring = f"v0:{timestamp}:".encode('utf-8') + body
+    signature = "v0=" + hmac.new(secret.encode('utf-8'), basestring, hashlib.sha256).hexdigest()
+    return {"X-Slack-Request-Timestamp": timestamp, "X-Slack-Signature": signature,
+            "Content-Type": "application/json"}
+
+
+def post_event(client, payload, config, headers=None):
+    original = flask_app.load_config
+    flask_app.load_config = lambda: config
+    try:
+        body = json.dumps(payload).encode('utf-8')
+        return client.post('/slack/events', data=body,
+                           headers=signed_headers(body) if headers is None else headers(body))
+    finally:
+        flask_app.load_config = original
+
+
+def test_slack_events_endpoint():
+    """서명 검증 (정상/위조/오래된 요청), 서명 키 미설정 거부, url_verification 응답"""
+    print("\n=== Slack 이벤트 수신기 테스트 ===")
+    client = flask_app.app.test_client()
+    config = {"slack_signing_secret": SECRET, "channel_id": "C1"}
+    challenge = {"type": "url_verification", "challenge": "abc123"}
+
+    response = post_event(client, challenge, config)
+    assert response.status_code == 200 and response.get_json() == {"challenge": "abc123"}
+
+    response = post_event(client, challenge, config, lambda body: signed_headers(body, secret="wrong"))
+    assert response.status_code == 401
+    response = post_event(client, challenge, config, lambda body: signed_headers(body, time.time() - 600))
+    assert response.status_code == 401
+    response = post_event(client, challenge, config, lambda body: {"Content-Type": "application/json"})
+    assert response.status_code == 401
+
+    # 서명 키가 없으면 서명 없는 요청도 받지 않음
+    response = post_event(client, challenge, {"channel_id": "C1"}, lambda body: {"Content-Type": "application/json"})
+    assert response.status_code == 403
+
+    # 서명이 맞는 message 이벤트는 실시간 집계로 전달
+    db_path = write_db()
+    live = make_live(db_path)
+    flask_app.live_state['aggregator'] = live
+    try:
+        event = {"type": "message", "channel": "C1", "ts": f"{time.time():.6f}", "user": "U1",
+                 "text": "블루아쿠아마스크 5개"}
+        response = post_event(client, {"type": "event_callback", "event": event}, config)
+        assert response.status_code == 200
+        live.queue.join()
+        assert live.get_status()["processed"] == 1
+    finally:
+        flask_app.live_state['aggregator'] = None
+        os.unlink(db_path)
+
+
+def test_events_before_aggregator_ready():
+    """집계기가 준비되기 전 이벤트는 요청 안에서 집계기를 만들지 않고 보관했다가 생성 후 전달"""
+    client = flask_app.app.test_client()
+    config = {"slack_signing_secret": SECRET, "channel_id": "C1"}
+    db_path = write_db()
+    originals = (flask_app.load_config, flask_app.DataAggregator, flask_app.SlackFetcher)
+    flask_app.live_state['starting'] = True  # 백그라운드에서 생성 중
+    try:
+        event = {"type": "message", "channel": "C1", "ts": f"{time.time():.6f}", "user": "U1",
+                 "text": "블루아쿠아마스크 5개"}
+        response = post_event(client, {"type": "event_callback", "event": event}, config)
+        assert response.status_code == 200
+        assert flask_app.live_state['aggregator'] is None and flask_app.live_state['pending'] == [event]
+
+        flask_app.load_config = lambda: config
+        flask_app.DataAggregator = lambda: DataAggregator(api_keys={"products_db": db_path},
+                                                          client=MockOpenAIClient(SAMPLE_DB))
+        flask_app.SlackFetcher = lambda: None
+        live = flask_app.get_live_aggregator()
+        live.queue.join()
+        assert live.get_status()["processed"] == 1 and flask_app.live_state['pending'] == []
+    finally:
+        flask_app.load_config, flask_app.DataAggregator, flask_app.SlackFetcher = originals
+        flask_app.live_state.update(aggregator=None, pending=[], starting=False)
+        os.unlink(db_path)
+
+
+class RecvTimeout(Exception):
+    pass
+
+
+class FakeSocket:
+    def __init__(self, frames):
+        self.frames = list(frames)
+        self.sent = []
+        self.pings = 0
+
+    def recv(self):
+        frame = self.frames.pop(0)
+        if isinstance(frame, Exception):
+            raise frame
+        return frame
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def ping(self):
+        self.pings += 1
+
+
+class FakeLive:
+    def __init__(self):
+        self.events = []
+
+    def handle_event(self, event):
+        self.events.append(event)
+
+
+def test_socket_mode_keeps_connection_on_timeout():
+    """조용한 구간의 recv 시간 초과는 재연결 없이 같은 연결에서 계속 수신"""
+    print("\n=== 소켓 모드 시간 초과 테스트 ===")
+    live = FakeLive()
+    runner = SocketModeRunner("xapp-test", live, http=object())
+    runner.running = True
+    envelope = {"type": "events_api", "envelope_id": "E1",
+                "payload": {"event": {"type": "message", "channel": "C1", "ts": "1.0", "text": "마스크 1개"}}}
+    ws = FakeSocket([RecvTimeout(), json.dumps(envelope), RecvTimeout(),
+                     json.dumps({"type": "disconnect", "reason": "refresh_requested"})])
+    runner.serve(ws, RecvTimeout)
+    assert ws.pings == 2 and not ws.frames
+    assert ws.sent == [{"envelope_id": "E1"}]
+    assert [event["ts"] for event in live.events] == ["1.0"]
+
+
+if __name__ == "__main__":
+    test_live_aggregation()
+    test_seen_is_bounded()
+    test_unresolved_kept_per_day()
+    test_slack_events_endpoint()
+    test_events_before_aggregator_ready()
+    test_socket_mode_keeps_connection_on_timeout()
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+구조화 출력 스키마 검증 및 단일 재시도 테스트
+"""
+
+from llm_schemas import SchemaValidationError, parse_response, response_format
+from mock_openai import to_namespace
+from test_mock_llm import make_matcher
+
+
+def fake_response(content):
+    return to_namespace({"choices": [{"message": {"role": "assistant", "content": content}}],
+                         "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}})
+
+
+def test_parse_response():
+    """스키마에 맞는 응답은 타입 객체로, 맞지 않으면 SchemaValidationError"""
+    print("=== 응답 검증 테스트 ===")
+    items = parse_response("extract", '{"items":[{"product_name":"블루아쿠아마스크","quantity":"3","unit":"개"}]}')
+    assert items[0].quantity == 3 and items[0].product_name == "블루아쿠아마스크"
+
+    choice = parse_response("match", '{"code":null,"confidence":20}')
+    assert choice.code is None
+
+    for bad in ['```json\n[]\n```', '{"items":[{"product_name":"","quantity":1,"unit":"개"}]}',
+                '{"items":[{"product_name":"x","quantity":"많이","unit":"개"}]}']:
+        try:
+            parse_response("extract", bad)
+            raise AssertionError(f"검증 실패해야 합니다: {bad}")
+        except SchemaValidationError as e:
+            print(f"  거부: {e}")
+
+    schema = response_format("combined")["json_schema"]
+    assert schema["strict"] and "code" in schema["schema"]["properties"]["items"]["items"]["required"]
+
+
+def test_single_targeted_retry():
+    """검증 실패 시 해당 요청만 1회 재시도하고, 두 번 실패하면 빈 결과"""
+    print("\n=== 단일 재시도 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    replies = ["잠시만요, 확인해볼게요",
+               '{"items":[{"product_name":"블루아쿠아마스크","quantity":3,"unit":"개"}]}']
+    requests = []
+
+    def complete(model, messages, **kwargs):
+        requests.append(messages)
+        return fake_response(replies.pop(0))
+
+    client.complete = complete
+    products = matcher.extract_products_from_text("블루아쿠아마스크 3개요")
+    assert products == [{"product_name": "블루아쿠아마스크", "quantity": 3, "unit": "개"}]
+    assert len(requests) == 2
+    assert "스키마와 맞지 않습니다" in requests[1][-1]["content"]
+    assert matcher.llm_stats["extract_retries"] == 1
+
+    client.complete = lambda model, messages, **kwargs: fake_response("not json")
+    assert matcher.extract_products_from_text("블루아쿠아마스크 3개요") == []
+    assert matcher.llm_stats["extract_invalid"] == 3
+
+
+if __name__ == "__main__":
+    test_parse_response()
+    test_single_targeted_retry()
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+주문 메시지 분류기 테스트
+"""
+
+import os
+import tempfile
+import threading
+
+from jsonl_store import iter_jsonl
+from message_classifier import OrderMessageClassifier
+from slack_records import SlackThread, SlackReply
+from test_mock_llm import SAMPLE_DB, make_matcher
+
+
+def test_classifier_decisions():
+    """확인 답글/이모지/채널 이벤트는 비주문, 수량이나 카탈로그 단어가 있으면 주문"""
+    print("=== 주문 메시지 분류 테스트 ===")
+    classifier = OrderMessageClassifier(SAMPLE_DB)
+
+    cases = [
+        ("확인했습니다", None, False),
+        ("넵 감사합니다!", None, False),
+        (":thumbsup: :pray:", None, False),
+        ("<@U123> 님이 채널에 참여함", "channel_join", False),
+        ("오늘 점심 뭐 먹죠", None, False),
+        ("컨실러 01호 10개", None, True),
+        ("시그니처 세트 보내주세요", None, True),
+        ("컨실러를 더 보내주세요", None, True),
+    ]
+    for text, subtype, expected in cases:
+        decision = classifier.classify(text, subtype)
+        print(f"  {text} -> {decision}")
+        assert decision.is_order == expected
+
+
+def test_thread_skips_acknowledgements():
+    """확인 답글에는 GPT 호출이 발생하지 않는지 확인"""
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    thread = SlackThread(ts="1", user="U1", text="블루아쿠아마스크 3개", replies=[
+        SlackReply(ts="2", user="U2", text="확인했습니다"),
+        SlackReply(ts="3", user="U2", text=":white_check_mark:"),
+    ])
+    results = matcher.process_message_thread(thread)
+
+    assert [r["품목코드"] for r in results] == ["200002"]
+    # 원본 추출 1회 + 적요 1회 (정확히 일치하여 매칭 호출 없음, 댓글 2개는 건너뜀)
+    assert client.get_stats()["calls"] == 2
+    assert matcher.order_classifier.decisions["acknowledgement"] == 1
+    assert matcher.order_classifier.decisions["empty_or_emoji"] == 1
+
+
+def test_log_appends_across_runs():
+    """판별 로그는 실행마다 이어 쓰고, 닫힌 .gz 로그는 처음부터 끝까지 읽을 수 있음"""
+    path = os.path.join(tempfile.mkdtemp(), "classifier_log.jsonl.gz")
+    for run in range(2):
+        classifier = OrderMessageClassifier(SAMPLE_DB, log_path=path)
+        classifier.should_extract("확인했습니다")
+        classifier.close()
+        classifier.should_extract("블루아쿠아마스크 3개")
+        classifier.close()
+    assert [r["reason"] for r in iter_jsonl(path)] == ["acknowledgement", "quantity_unit"] * 2
+
+
+def test_decisions_across_threads():
+    """여러 작업 스레드가 동시에 판별해도 사유별 횟수가 빠지지 않음"""
+    classifier = OrderMessageClassifier(SAMPLE_DB)
+
+    def work():
+        for _ in range(500):
+            classifier.decide("확인했습니다")
+            classifier.decide("블루아쿠아마스크 3개")
+
+    workers = [threading.Thread(target=work) for _ in range(8)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert classifier.decisions == {"acknowledgement": 4000, "quantity_unit": 4000}
+
+
+if __name__ == "__main__":
+    test_classifier_decisions()
+    test_thread_skips_acknowledgements()
+    test_log_appends_across_runs()
+    test_decisions_across_threads()
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+로컬 OpenAI 스탠드인으로 GPT 매칭 오프라인 테스트
+"""
+
+import json
+import os
+import tempfile
+
+from gpt_matcher import GPTMatcher
+from slack_records import SlackThread, SlackReply
+from mock_openai import MockOpenAIClient, MockAPIError, LatencyModel
+
+SAMPLE_DB = {
+    "탐뷰티": {
+        "100001": "더 클라우드 컨실러 01호",
+        "100002": "더 클라우드 컨실러 02호",
+        "100010": "시그니처 세트"
+    },
+    "바루랩": {
+        "200001": "쌀겨수 클렌징패드",
+        "200002": "블루아쿠아마스크"
+    }
+}
+
+
+def make_matcher(config=None, **client_kwargs):
+    """
+    임시 제품 DB 와 모의 클라이언트로 GPTMatcher 생성
+    config: GPTMatcher 에 넘길 추가 설정 (예: {"rule_extraction": False})
+    """
+    db_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    json.dump(SAMPLE_DB, db_file, ensure_ascii=False)
+    db_file.close()
+    client = MockOpenAIClient(SAMPLE_DB, **client_kwargs)
+    matcher = GPTMatcher(api_keys={"products_db": db_file.name, **(config or {})}, client=client)
+    os.remove(db_file.name)
+    return matcher, client
+
+
+def test_mock_extract_and_match():
+    """규칙 기반 응답으로 추출/매칭 흐름 확인"""
+    print("=== 모의 클라이언트 추출/매칭 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+
+    products = matcher.extract_products_from_text("쌀겨수 클렌징패드 10개, 시그니처 세트 2세트")
+    print(f"추출된 제품: {products}")
+    assert [p["quantity"] for p in products] == [10, 2]
+
+    match = matcher.match_product_to_code("쌀겨수클렌징 패드")
+    print(f"매칭 결과: {match}")
+    assert match["품목코드"] == "200001"
+
+    stats = client.get_stats()
+    print(f"호출 통계: {stats}")
+    assert stats["calls"] == 2
+    assert stats["prompt_tokens"] > 0
+
+
+def test_mock_error_injection():
+    """오류 주입 시 GPTMatcher 가 빈 결과로 처리하는지 확인"""
+    print("\n=== 오류 주입 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False, "llm_concurrency": {"cooldown": 0}},
+                                   error_rates={429: 1.0})
+    assert matcher.extract_products_from_text("블루아쿠아마스크 3개") == []
+    # 429 는 llm_rate_limit_retries(기본 2)회 재시도 후 포기
+    assert client.get_stats()["errors"] == 3
+    assert matcher.llm_stats["rate_limit_retries"] == 2
+
+    try:
+        client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "x"}])
+        raise AssertionError("오류가 발생해야 합니다")
+    except MockAPIError as e:
+        assert e.status_code == 429
+
+
+def test_combined_mode_single_call():
+    """combined 모드는 메시지당 1회 호출하고 프롬프트에 후보 목록만 넣는지 확인"""
+    print("\n=== 통합 추출/매칭 테스트 ===")
+    matcher, client = make_matcher(config={"match_mode": "combined", "shortlist_size": 1})
+    prompts = []
+    original = client.complete
+
+    def capture(model, messages, **kwargs):
+        prompts.append("\n".join(m["content"] for m in messages))
+        return original(model, messages, **kwargs)
+
+    client.complete = capture
+    pairs = matcher.extract_matched_products("쌀겨수클렌징 패드 10개, 블루 아쿠아 마스크 2개")
+    assert [(m["품목코드"], p["quantity"]) for p, m in pairs] == [("200001", 10), ("200002", 2)]
+    assert len(prompts) == 1
+    assert "더 클라우드 컨실러" not in prompts[0]
+
+
+def test_thread_scope_applies_corrections():
+    """thread 모드는 스레드당 1회 추출하고 정정 댓글을 반영하는지 확인"""
+    print("\n=== 스레드 단위 추출 테스트 ===")
+    matcher, client = make_matcher(config={"extraction_scope": "thread"})
+    thread = SlackThread(ts="1.0", user="U1", text="블루아쿠아마스크 5개, 시그니처 세트 2세트", replies=[
+        SlackReply(ts="2.0", user="U2", text="확인했습니다"),
+        SlackReply(ts="3.0", user="U1", text="아 5개 말고 7개로 부탁해요"),
+    ])
+    results = matcher.process_message_thread(thread)
+
+    print(f"결과: {[(r['품목코드'], r['quantity'], r['source_ts']) for r in results]}")
+    assert [(r["품목코드"], r["quantity"], r["source_ts"]) for r in results] == [
+        ("200002", 7, "3.0"), ("100010", 2, "1.0")]
+    assert results[0]["source"] == "reply"
+    # 스레드 추출 1회 + 적요 1회
+    assert client.get_stats()["calls"] == 2
+
+
+def test_thread_scope_fallbacks():
+    """thread 모드: 호출 오류는 메시지별 처리로 대체, 변형 묶음 전개, 분류 결과 집계"""
+    print("\n=== 스레드 단위 대체 경로 테스트 ===")
+    matcher, client = make_matcher(config={"extraction_scope": "thread"})
+    original = client.complete
+
+    def fail_thread(model, messages, **kwargs):
+        if any("스레드 (시간순)" in m["content"] for m in messages):
+            raise MockAPIError(400)
+        return original(model, messages, **kwargs)
+
+    client.complete = fail_thread
+    thread = SlackThread(ts="1.0", user="U1", text="블루아쿠아마스크 5개", replies=[
+        SlackReply(ts="2.0", user="U2", text="확인했습니다")])
+    results = matcher.process_message_thread(thread)
+    assert [(r["품목코드"], r["quantity"]) for r in results] == [("200002", 5)]
+
+    client.complete = original
+    thread = SlackThread(ts="1.0", user="U1", text="컨실러 전 호수 각 2개", replies=[
+        SlackReply(ts="2.0", user="U2", text="확인했습니다")])
+    results = matcher.process_message_thread(thread)
+    assert [(r["품목코드"], r["quantity"]) for r in results] == [("100001", 2), ("100002", 2)]
+    # 스레드 모드 판별도 분류기 통계에 남음 (대체 경로에서 1회 + 스레드 모드 2회)
+    assert matcher.order_classifier.decisions["acknowledgement"] == 3
+
+
+def test_latency_model_is_reproducible():
+    """같은 시드의 지연 분포가 동일한 값을 내는지 확인"""
+    print("\n=== 지연 분포 재현성 테스트 ===")
+    first = LatencyModel("lognormal", seed=7, median=1.0, sigma=0.5)
+    second = LatencyModel("lognormal", seed=7, median=1.0, sigma=0.5)
+    assert [first.sample() for _ in range(5)] == [second.sample() for _ in range(5)]
+
+
+if __name__ == "__main__":
+    test_mock_extract_and_match()
+    test_mock_error_injection()
+    test_combined_mode_single_call()
+    test_thread_scope_applies_corrections()
+    test_thread_scope_fallbacks()
+    test_latency_model_is_reproducible()
+    print("\n모든 테스트 통과")
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+모델 등급 정책 테스트 (작은 모델 우선, 낮은 신뢰도/검증 실패 시 큰 모델로 승격)
+"""
+
+from mock_openai import MockAPIError
+from model_policy import ModelPolicy, percentile
+from test_llm_schemas import fake_response
+from test_mock_llm import make_matcher
+
+
+def test_policy_from_config():
+    """설정으로 등급/모델/승격 기준 변경"""
+    print("=== 모델 정책 설정 테스트 ===")
+    policy = ModelPolicy.from_config({"model_tiers": {"small": "mini"}, "escalate_below": 80})
+    assert policy.model_for(policy.tier_for("extract")) == "mini"
+    assert policy.model_for(policy.tier_for("thread")) == "gpt-4o"
+    assert policy.should_escalate("small", 79) and not policy.should_escalate("small", 80)
+    assert not policy.should_escalate("large", 10)
+    assert not policy.should_escalate("small", None)
+
+    # 두 등급이 같은 모델이면 승격하지 않음
+    same = ModelPolicy({"small": "gpt-4o"})
+    assert not same.can_escalate("small")
+    assert percentile([3, 1, 2], 0.5) == 2 and percentile([], 0.95) == 0.0
+
+
+def test_match_escalation():
+    """작은 모델의 신뢰도가 기준 미만이면 같은 요청을 큰 모델로 재처리"""
+    print("\n=== 매칭 승격 테스트 ===")
+    matcher, client = make_matcher()
+    replies = {"gpt-4o-mini": '{"code":"100001","confidence":55}',
+               "gpt-4o": '{"code":"100002","confidence":95}'}
+    models = []
+
+    def complete(model, messages, **kwargs):
+        models.append(model)
+        return fake_response(replies[model])
+
+    client.complete = complete
+    match = matcher.match_product_to_code("아쿠아 마스크 비슷한거")
+    assert models == ["gpt-4o-mini", "gpt-4o"]
+    assert match["품목코드"] == "100002" and match["confidence"] == 95
+    assert matcher.llm_stats["match_escalations"] == 1
+
+    summary = matcher.model_policy.metrics.summary()
+    assert summary["small"]["calls"] == 1 and summary["large"]["escalations"] == 1
+    print(f"  등급별 통계: {summary}")
+
+    # 신뢰도가 충분하면 작은 모델 결과 그대로
+    models.clear()
+    replies["gpt-4o-mini"] = '{"code":"100001","confidence":90}'
+    assert matcher.match_product_to_code("아쿠아 마스크 비슷한거")["품목코드"] == "100001"
+    assert models == ["gpt-4o-mini"]
+
+    # 카탈로그에 없다고 확신하면 승격 없이 1회, 확신이 낮을 때만 큰 모델 확인
+    models.clear()
+    replies["gpt-4o-mini"] = '{"code":null,"confidence":90}'
+    assert matcher.match_product_to_code("택배 박스") is None
+    assert models == ["gpt-4o-mini"]
+    models.clear()
+    replies["gpt-4o-mini"] = '{"code":null,"confidence":20}'
+    assert matcher.match_product_to_code("택배 상자")["품목코드"] == "100002"
+    assert models == ["gpt-4o-mini", "gpt-4o"]
+
+
+def test_escalation_error_keeps_result():
+    """큰 모델 호출이 API 오류로 실패해도 작은 모델의 검증된 결과를 사용"""
+    print("\n=== 승격 호출 실패 테스트 ===")
+    matcher, client = make_matcher()
+
+    def complete(model, messages, **kwargs):
+        if model == "gpt-4o":
+            raise MockAPIError(400)
+        return fake_response('{"code":"200002","confidence":55}')
+
+    client.complete = complete
+    match = matcher.match_product_to_code("아쿠아 마스크 비슷한거")
+    assert match["품목코드"] == "200002" and match["confidence"] == 55
+    assert "needs_review" not in match
+    assert matcher.llm_stats["match_escalation_errors"] == 1
+
+
+def test_retry_escalates():
+    """스키마 검증 실패 후 재시도는 큰 모델로"""
+    print("\n=== 재시도 승격 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    models = []
+
+    def complete(model, messages, **kwargs):
+        models.append(model)
+        if model == "gpt-4o-mini":
+            return fake_response("not json")
+        return fake_response('{"items":[{"product_name":"블루아쿠아마스크","quantity":3,"unit":"개"}]}')
+
+    client.complete = complete
+    products = matcher.extract_products_from_text("블루아쿠아마스크 3개요")
+    assert products[0]["quantity"] == 3
+    assert models == ["gpt-4o-mini", "gpt-4o"]
+
+
+if __name__ == "__main__":
+    test_policy_from_config()
+    test_match_escalation()
+    test_retry_escalates()
+    test_escalation_error_keeps_result()
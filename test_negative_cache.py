@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+카탈로그에 없는 제품명 캐시 테스트
+"""
+
+import os
+import tempfile
+import time
+
+from negative_cache import NegativeCache
+from test_llm_schemas import fake_response
+from test_mock_llm import make_matcher
+
+
+def test_known_misses_skip_gpt():
+    """한 번 매칭에 실패한 문자열은 GPT 없이 거절, 카탈로그가 바뀌면 다시 확인"""
+    print("=== 미매칭 캐시 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    for name in ["쇼핑백", "쇼핑백 ", "샘플", "쇼핑백"]:
+        assert matcher.match_product_to_code(name) is None
+    # 처음 보는 문자열만 호출 ("카탈로그에 없음" 을 확신하면 큰 모델로 승격하지 않음)
+    print(f"  호출 {client.get_stats()['calls']}회, {matcher.negative_cache.summary()}")
+    assert client.get_stats()["calls"] == 2
+    assert matcher.llm_stats["match_negative_hits"] == 2
+    assert matcher.negative_cache.report()[0] == {"product_name": "쇼핑백", "scope": "*", "count": 3}
+
+    # 카탈로그 해시가 바뀌면 무효화
+    matcher.prompts.catalog_hash = "changed"
+    assert matcher.match_product_to_code("쇼핑백") is None
+    assert client.get_stats()["calls"] == 3
+    assert matcher.negative_cache.summary()["invalidations"] == 1
+
+
+def test_only_misses_are_cached():
+    """카탈로그 밖 코드 응답은 캐시하고, 실제 코드를 낮은 신뢰도로 고른 응답은 캐시하지 않음"""
+    print("\n=== 미매칭 캐시 대상 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False})
+    replies = {"클렌징 세트": '{"code":"999999","confidence":90}',
+               "아쿠아 비슷한거": '{"code":"200002","confidence":40}'}
+
+    def complete(model, messages, **kwargs):
+        name = next(n for n in replies if f'"{n}"' in messages[-1]["content"])
+        return fake_response(replies[name])
+
+    client.complete = complete
+    for name in replies:
+        assert matcher.match_product_to_code(name) is None
+    assert matcher.negative_cache.contains("클렌징 세트")
+    assert not matcher.negative_cache.contains("아쿠아 비슷한거")
+
+
+def test_ttl_and_persistence():
+    """TTL 이 지나면 만료, 파일에는 같은 카탈로그 해시일 때만 다시 로드"""
+    print("\n=== TTL / 저장 테스트 ===")
+    path = os.path.join(tempfile.mkdtemp(), "negative_cache.json")
+    cache = NegativeCache(path, ttl_seconds=0.05, catalog_hash="v1")
+    cache.add("택배")
+    assert cache.contains("택배")
+    time.sleep(0.06)
+    assert not cache.contains("택배") and cache.summary()["expired"] == 1
+
+    cache = NegativeCache(path, ttl_seconds=3600, catalog_hash="v1")
+    cache.add("택배", "바루랩")
+    cache.save()
+    assert NegativeCache(path, catalog_hash="v1").contains("택배", "바루랩")
+    assert not NegativeCache(path, catalog_hash="v1").contains("택배")
+    assert not NegativeCache(path, catalog_hash="v2").contains("택배", "바루랩")
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    test_known_misses_skip_gpt()
+    test_only_misses_are_cached()
+    test_ttl_and_persistence()
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+프롬프트 캐시 친화적 구성 테스트
+"""
+
+from prompt_builder import PromptBuilder
+from test_mock_llm import SAMPLE_DB, make_matcher
+
+
+def test_stable_prefix_and_memoized_catalog():
+    """질의만 바뀌면 앞부분(고정 지침 + 카탈로그)은 바이트 단위로 같고, 질의는 맨 뒤에 오는지 확인"""
+    print("=== 프롬프트 구성 테스트 ===")
+    builder = PromptBuilder(SAMPLE_DB)
+    scoped = {"바루랩": SAMPLE_DB["바루랩"]}
+
+    first = builder.match("클렌징 패드", scoped)
+    second = builder.match("아쿠아 마스크", dict(reversed(list(scoped.items()))))
+    assert first[:-1] == second[:-1]
+    assert "쌀겨수 클렌징패드" in first[0]["content"]
+    assert first[-1]["content"] == '찾을 제품명: "클렌징 패드"'
+    assert builder.catalog_block(scoped) is builder.catalog_block(dict(scoped))
+
+    assert builder.extract("a")[0] == builder.extract("b")[0]
+
+
+def test_cached_token_report():
+    """반복 호출의 캐시 적중 토큰이 usage 에서 집계되는지 확인"""
+    matcher, client = make_matcher(config={"rule_extraction": False}, cache_min_tokens=64)
+    matcher.match_product_to_code("클렌징 패드", brand_hint="바루랩")
+    matcher.match_product_to_code("아쿠아 마스크", brand_hint="바루랩")
+
+    print(f"캐시 적중률: {matcher.cache_hit_ratio():.1%}")
+    assert matcher.llm_stats["cached_tokens"] > 0
+    assert matcher.llm_stats["cached_tokens"] == client.get_stats()["cached_tokens"]
+    assert 0 < matcher.cache_hit_ratio() < 1
+
+
+if __name__ == "__main__":
+    test_stable_prefix_and_memoized_catalog()
+    test_cached_token_report()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+토큰 버킷 속도 제한 테스트
+"""
+
+import threading
+import time
+
+from rate_limit import TokenBucket
+
+
+def test_refill_and_wait_time():
+    """버스트만큼 바로 통과하고, 이후에는 충전 속도에 맞춘 대기 시간을 알려줌"""
+    print("=== 토큰 버킷 충전 테스트 ===")
+    bucket = TokenBucket(600, burst=2)  # 초당 10개
+    assert bucket.try_acquire() == 0 and bucket.try_acquire() == 0
+    wait = bucket.try_acquire()
+    print(f"  버스트 소진 후 대기: {wait:.3f}초")
+    assert 0.05 < wait <= 0.1
+
+    time.sleep(0.12)
+    assert bucket.try_acquire() == 0
+    # 오래 쉬어도 버스트 이상 쌓이지 않음
+    time.sleep(0.5)
+    assert [bucket.try_acquire() == 0 for _ in range(3)] == [True, True, False]
+
+
+def test_acquire_blocks_across_threads():
+    """여러 스레드가 한 버킷을 나눠 쓰면 전체 처리량이 충전 속도를 넘지 않음"""
+    print("\n=== 토큰 버킷 공유 대기 테스트 ===")
+    bucket = TokenBucket(1200, burst=1)  # 초당 20개
+    start = time.monotonic()
+
+    def work():
+        for _ in range(3):
+            bucket.acquire()
+
+    workers = [threading.Thread(target=work) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.monotonic() - start
+    print(f"  요청 9건: {elapsed:.3f}초")
+    # 첫 요청은 버스트로 통과, 나머지 8건은 0.05초 간격
+    assert elapsed >= 0.35
+
+
+def test_penalize_and_refund():
+    """Retry-After 만큼 버킷을 비우고, 되돌린 양은 용량을 넘지 않음"""
+    bucket = TokenBucket(600, burst=2)
+    bucket.penalize(0.5)
+    assert bucket.try_acquire() >= 0.5
+    bucket.refund(100)
+    assert bucket.tokens == bucket.capacity
+
+
+if __name__ == "__main__":
+    test_refill_and_wait_time()
+    test_acquire_blocks_across_threads()
+    test_penalize_and_refund()
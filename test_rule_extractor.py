@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+규칙 기반 추출기 테스트
+"""
+
+from rule_extractor import RuleBasedExtractor, parse_korean_number
+from test_mock_llm import make_matcher
+
+
+def test_rule_extraction_formats():
+    """흔한 주문 형식을 규칙만으로 완전히 해석하는지 확인"""
+    print("=== 규칙 추출 테스트 ===")
+    extractor = RuleBasedExtractor()
+
+    result = extractor.extract("시그니처 세트 1ea &amp; 쇼핑백 1ea")
+    assert result.complete
+    assert [(i["product_name"], i["quantity"], i["unit"]) for i in result.items] == [
+        ("시그니처 세트", 1, "ea"), ("쇼핑백", 1, "ea")]
+
+    result = extractor.extract("안녕하세요\n- 블루아쿠아마스크 다섯 박스\n- 쌀겨수 클렌징패드 x 3\n출고 부탁드립니다 :pray:")
+    assert result.complete
+    assert [(i["quantity"], i["unit"]) for i in result.items] == [(5, "박스"), (3, "개")]
+
+    assert parse_korean_number("열두") == 12
+    assert parse_korean_number("스물다섯") == 25
+    assert parse_korean_number("백이십") == 120
+
+
+def test_rule_extraction_defers_to_gpt():
+    """규칙으로 확정할 수 없는 메시지는 GPT 추출로 넘어가는지 확인"""
+    extractor = RuleBasedExtractor()
+    assert not extractor.extract("01호, 02호 각 10개씩").complete
+    assert not extractor.extract("컨실러 21").complete
+    assert not extractor.extract("오늘 회의 어때요?").complete
+
+    # 오탐: 제품명 속 한자어 수사, 정정 표현, 호수만 남은 구간
+    assert not extractor.extract("클렌징 오일 세트").complete
+    assert not extractor.extract("컨실러 2개 말고 3개").complete
+    result = extractor.extract("컨실러 01호 10개, 02호 5개")
+    assert not result.complete and result.unexplained == ["02호 5개"]
+    assert not extractor.extract("마스크팩 20ml 3개 빼고").complete
+    # 날짜/출고 일정이 대부분인 이름은 제품명으로 보지 않음
+    result = extractor.extract("10월 5일 출고 3박스\n컨실러 01호 2개")
+    assert [i["product_name"] for i in result.items] == ["컨실러 01호"]
+    assert result.unexplained == ["10월 5일 출고 3박스"]
+    assert not extractor.extract("10/5 오늘 출고분 2개").complete
+    assert extractor.extract("택배 박스 3개").complete
+    result = extractor.extract("클렌징 오일 세트 2개")
+    assert [(i["product_name"], i["quantity"]) for i in result.items] == [("클렌징 오일 세트", 2)]
+    assert parse_korean_number("오일") is None
+
+    matcher, client = make_matcher()
+    products = matcher.extract_products_from_text("더 클라우드 컨실러 01호 10개")
+    assert products[0]["quantity"] == 10
+    assert client.get_stats()["calls"] == 0
+
+    matcher.extract_products_from_text("컨실러 01호랑 02호 열 개씩 보내주세요")
+    assert client.get_stats()["calls"] == 1
+
+
+if __name__ == "__main__":
+    test_rule_extraction_formats()
+    test_rule_extraction_defers_to_gpt()
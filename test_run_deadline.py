@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+실행 마감 / 로컬 매칭 전용 모드 테스트
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from aggregator import DataAggregator
+from mock_openai import MockOpenAIClient
+from run_deadline import RunDeadline, parse_deadline
+from slack_fetcher import SlackFetcher
+from slack_records import SlackThread
+from test_mock_llm import SAMPLE_DB
+from test_traffic_recorder import FakeHTTP
+
+
+def test_stage_budgets():
+    """단계별 마감, timeout 상한, 진행 속도 기반 전환 판단"""
+    print("=== 단계 예산 테스트 ===")
+    deadline = RunDeadline(100, min_timeout=2.0)
+    assert 29 < deadline.remaining("fetch") <= 30
+    assert 89 < deadline.remaining("aggregate") <= 90
+    assert deadline.timeout(60, "fetch") <= 30 and deadline.timeout(10, "fetch") == 10
+    assert not deadline.should_degrade("aggregate")
+
+    # 스레드 1개에 0.05초 -> 남은 10만 개는 예산 초과
+    deadline.start_stage("aggregate")
+    time.sleep(0.05)
+    assert deadline.should_degrade("aggregate", done=1, total=100001)
+    assert not deadline.should_degrade("aggregate", done=1, total=2)
+
+    expired = RunDeadline(0, min_timeout=2.0)
+    assert expired.expired("fetch") and expired.timeout(30, "fetch") == 2.0
+    assert parse_deadline("09:30").hour == 9
+    assert RunDeadline.from_config({}) is None
+    assert RunDeadline.from_config({"run_budget_minutes": 10}).budget == 600
+
+
+def test_degraded_aggregation():
+    """마감이 지나면 LLM 없이 로컬 매칭만, 적요 생략, 해결 못 한 항목은 미확인으로 표시"""
+    print("\n=== 로컬 매칭 전용 집계 테스트 ===")
+    db_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    json.dump(SAMPLE_DB, db_file, ensure_ascii=False)
+    db_file.close()
+    client = MockOpenAIClient(SAMPLE_DB)
+    aggregator = DataAggregator(api_keys={"products_db": db_file.name}, client=client,
+                                deadline=RunDeadline(0))
+    os.remove(db_file.name)
+
+    threads = [
+        SlackThread(ts="1.0", user="U1", text="블루아쿠아마스크 3개, 쌀겨수 클렌징 패드 2개"),
+        SlackThread(ts="2.0", user="U1", text="지난번 그거 조금 더 보내주세요 5")
+    ]
+    result = aggregator.aggregate_products(threads)
+    print(f"  미확인: {result['unresolved_items']}")
+    assert result["degraded"]
+    assert client.get_stats()["calls"] == 0
+
+    products = {p["품목코드"]: p for p in result["aggregated_products"]}
+    assert products["200002"]["총_수량"] == 3 and not products["200002"]["검토_필요"]
+    assert products["200001"]["검토_필요"]
+    assert result["unresolved_items"] and result["unresolved_items"][0]["reason"] == "not_extracted"
+    assert all(s["summary"] == "출고 처리" for s in result["thread_summaries"])
+    assert "미확인 항목: 1개" in aggregator.get_summary_report(result)
+
+    # 같은 집계기를 다시 쓰면 (GUI) 새 실행의 마감만 적용되고 이전 전환은 이어지지 않음
+    aggregator.set_deadline(RunDeadline(600))
+    result = aggregator.aggregate_products(threads[:1])
+    assert not result["degraded"] and client.get_stats()["calls"] > 0
+
+
+def test_fetcher_timeouts():
+    """Slack 요청에 항상 timeout 을 주고, 수집 예산이 끝나면 댓글/첨부 수집 생략"""
+    print("\n=== Slack timeout 테스트 ===")
+    http = FakeHTTP()
+    seen = []
+    original = http.get
+
+    def get(url, headers=None, params=None, **kwargs):
+        seen.append(kwargs.get("timeout"))
+        return original(url, headers=headers, params=params, **kwargs)
+
+    http.get = get
+    fetcher = SlackFetcher(api_keys={"slack_bot_token": "x", "channel_id": "C1", "slack_timeout": 15}, http=http)
+    fetcher.pacing = False
+    fetcher.api_get("https://slack.com/api/conversations.history", {"channel": "C1"})
+    assert seen == [15.0]
+
+    fetcher.deadline = RunDeadline(0, min_timeout=1.0)
+    fetcher.api_get("https://slack.com/api/conversations.history", {"channel": "C1"})
+    assert seen[-1] == 1.0
+    threads = fetcher.process_messages_with_threads([{"ts": "1.0", "text": "x", "thread_ts": "1.0"}])
+    assert len(threads) == 1 and fetcher.deadline_skipped == 1 and len(seen) == 2
+
+
+if __name__ == "__main__":
+    test_stage_budgets()
+    test_degraded_aggregation()
+    test_fetcher_timeouts()
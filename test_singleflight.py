@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+동시 요청 합치기(singleflight) 테스트
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from singleflight import SingleFlight
+from test_mock_llm import make_matcher
+
+
+def test_identical_calls_share_one_execution():
+    """같은 키의 동시 요청은 1회만 실행, 예외도 함께 전달"""
+    print("=== singleflight 테스트 ===")
+    flight = SingleFlight()
+    executed = []
+
+    def slow_call():
+        executed.append(1)
+        time.sleep(0.2)
+        return {"품목코드": "200001"}
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda _: flight.do("쌀겨수 패드", slow_call), range(8)))
+    print(f"  통계: {flight.summary()}")
+    assert len(executed) == 1 and flight.summary() == {"calls": 8, "shared": 7, "in_flight": 0}
+    assert all(result == {"품목코드": "200001"} for result in results)
+    assert len({id(result) for result in results}) == 8
+
+    started = threading.Event()
+
+    def failing_call():
+        started.set()
+        time.sleep(0.2)
+        raise RuntimeError("API 오류")
+
+    def call():
+        try:
+            flight.do("오류", failing_call)
+        except RuntimeError as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(call)
+        started.wait()
+        errors = [first] + [executor.submit(call) for _ in range(3)]
+    assert [future.result() for future in errors] == ["API 오류"] * 4
+    assert flight.summary()["shared"] == 10
+
+
+def test_concurrent_matches_cost_one_call():
+    """여러 스레드가 같은 제품명을 동시에 매칭해도 API 호출은 1회"""
+    print("\n=== 동시 매칭 합치기 테스트 ===")
+    matcher, client = make_matcher(config={"rule_extraction": False}, latency={"kind": "fixed", "value": 0.2})
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        matches = list(executor.map(lambda _: matcher.match_product_to_code("쌀겨수클렌징 패드"), range(6)))
+    print(f"  호출 통계: {client.get_stats()['calls']}회, {matcher.inflight.summary()}")
+    assert client.get_stats()["calls"] == 1
+    assert all(match["품목코드"] == "200001" for match in matches)
+
+
+if __name__ == "__main__":
+    test_identical_calls_share_one_execution()
+    test_concurrent_matches_cost_one_call()
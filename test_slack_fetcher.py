@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+여러 채널 동시 수집 테스트 (페이지네이션, 공유 호출 예산, 채널별 실패)
+"""
+
+import threading
+import time
+
+import requests
+
+from rate_limit import TokenBucket
+from slack_fetcher import SlackFetcher
+
+# 채널 -> 페이지 목록 (페이지마다 메시지 ts 목록), None 이면 HTTP 500
+PAGES = {
+    "C1": [["10.0", "11.0"], ["12.0"], ["13.0"]],
+    "C2": [["20.5"], ["21.5"]],
+    "C3": None,
+}
+
+
+class FakeSlackResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data or {}
+        self.headers = {}
+
+    def json(self):
+        return self.data
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Server Error")
+
+
+class FakeSlackHTTP:
+    """conversations.history 만 흉내 (cursor 는 다음 페이지 번호)"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        channel = params["channel"]
+        with self.lock:
+            self.calls.append((channel, params.get("cursor"), time.monotonic()))
+        pages = self.pages[channel]
+        if pages is None:
+            return FakeSlackResponse(500)
+        index = int(params.get("cursor") or 0)
+        has_more = index + 1 < len(pages)
+        return FakeSlackResponse(200, {
+            "ok": True,
+            "messages": [{"ts": ts, "user": "U1", "text": f"{channel} 메시지 {ts}"} for ts in pages[index]],
+            "has_more": has_more,
+            "response_metadata": {"next_cursor": str(index + 1) if has_more else ""}
+        })
+
+
+def make_fetcher(pages, **config):
+    http = FakeSlackHTTP(pages)
+    fetcher = SlackFetcher(api_keys={"slack_bot_token": "xoxb-test", "channel_ids": list(pages), **config},
+                           http=http)
+    return fetcher, http
+
+
+def test_fetch_all_channels():
+    """모든 채널의 모든 페이지를 수집하고, 레코드마다 채널을 기록하며, 실패한 채널만 빠짐"""
+    print("=== 여러 채널 수집 테스트 ===")
+    fetcher, http = make_fetcher(PAGES)
+    threads = fetcher.fetch_all_channels("2024-01-01", "2024-01-01")
+
+    assert [(t.channel, t.ts) for t in threads] == [
+        ("C1", "10.0"), ("C1", "11.0"), ("C1", "12.0"), ("C1", "13.0"), ("C2", "20.5"), ("C2", "21.5")]
+    assert all(t.text.startswith(t.channel) for t in threads)
+    # 페이지마다 이전 응답의 cursor 로 이어서 요청
+    cursors = {channel: [cursor for c, cursor, _ in http.calls if c == channel] for channel in PAGES}
+    assert cursors == {"C1": [None, "1", "2"], "C2": [None, "1"], "C3": [None]}
+
+
+def test_channels_share_rate_limit():
+    """채널을 동시에 수집해도 전체 호출 속도는 공유 버킷 하나를 따름"""
+    print("\n=== 채널 공유 호출 예산 테스트 ===")
+    fetcher, http = make_fetcher(PAGES)
+    fetcher.rate_limiter = TokenBucket(1200, burst=1)  # 초당 20회
+    start = time.monotonic()
+    fetcher.fetch_all_channels("2024-01-01", "2024-01-01")
+    elapsed = time.monotonic() - start
+
+    times = sorted(t for _, _, t in http.calls)
+    print(f"  호출 {len(times)}회: {elapsed:.3f}초")
+    assert len(times) == 6
+    # 버스트 1회 이후 5회는 0.05초 간격 (채널별 버킷이었다면 거의 동시에 끝남)
+    assert times[-1] - times[0] >= 0.2
+
+
+if __name__ == "__main__":
+    test_fetch_all_channels()
+    test_channels_share_rate_limit()
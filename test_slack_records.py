@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+Slack 경량 레코드 테스트 (변환/복원, 집계 연동, 메모리 사용량)
+"""
+
+import copy
+import json
+import os
+import tempfile
+import tracemalloc
+
+from aggregator import DataAggregator
+from mock_openai import MockOpenAIClient
+from slack_records import SlackThread, SlackReply
+from test_mock_llm import SAMPLE_DB
+
+
+def slack_message(ts, text, **extra):
+    """Slack conversations.history 응답과 비슷한 메시지 (blocks, reactions, 사용자 프로필 포함)"""
+    message = {
+        "type": "message", "ts": ts, "user": "U1", "text": text, "team": "T1", "client_msg_id": f"id-{ts}",
+        "blocks": [{"type": "rich_text", "block_id": f"b{ts}", "elements": [
+            {"type": "rich_text_section", "elements": [{"type": "text", "text": text}]}]}],
+        "reactions": [{"name": "white_check_mark", "users": ["U2", "U3"], "count": 2}],
+        "user_profile": {"display_name": "담당자", "real_name": "주문 담당자", "team": "T1",
+                         "image_72": "https://avatars.slack-edge.com/2024-01-01/1234_72.jpg"}
+    }
+    message.update(extra)
+    return message
+
+
+FILE = {"id": "F1", "name": "order.xlsx", "filetype": "xlsx", "size": 10240, "mimetype": "application/vnd.ms-excel",
+        "url_private": "https://files.slack.com/files-pri/T1-F1/order.xlsx",
+        "url_private_download": "https://files.slack.com/files-pri/T1-F1/download/order.xlsx",
+        "permalink": "https://example.slack.com/files/U1/F1/order.xlsx", "thumb_pdf": "https://files.slack.com/t.png"}
+
+
+def test_round_trip():
+    """Slack dict -> SlackThread -> dict -> SlackThread 가 같은 레코드로 복원되는지 (기존 저장 형식 포함)"""
+    print("=== 경량 레코드 변환/복원 테스트 ===")
+    message = slack_message("1.0", "블루 아쿠아 마스크 5개", thread_ts="1.0", channel="C1", files=[FILE])
+    reply = slack_message("1.1", "클라우드 컨실러 01호 3개 추가", thread_ts="1.0")
+
+    thread = SlackThread.from_slack(message)
+    thread.replies = [SlackReply.from_slack(reply)]
+    thread.downloaded_files = [{"name": "order.xlsx", "filepath": "/tmp/order.xlsx"}]
+    assert thread.raw is None and thread.replies[0].raw is None
+    assert thread.files == [{"id": "F1", "name": "order.xlsx", "filetype": "xlsx",
+                             "url_private_download": FILE["url_private_download"]}]
+
+    data = json.loads(json.dumps(thread.to_dict(), ensure_ascii=False))
+    assert SlackThread.from_dict(data) == thread
+    assert SlackThread.coerce(thread) is thread
+
+    # 기존 형식 (original_message / thread_replies / file_info)
+    legacy = {"ts": "1.0", "original_message": message, "thread_replies": [reply],
+              "downloaded_files": [{"file_info": {"name": "order.xlsx"}, "filepath": "/tmp/order.xlsx"}]}
+    assert SlackThread.coerce(legacy) == thread
+
+    # 디버그 옵션이면 원본 payload 유지
+    assert SlackThread.from_slack(message, keep_raw=True).to_dict()["raw"] is message
+
+
+def test_aggregate_threads_and_dicts():
+    """SlackThread 와 저장된 dict 를 집계기에 넣어도 같은 결과인지"""
+    print("\n=== 경량 레코드 집계 테스트 ===")
+    db_file = tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8')
+    json.dump(SAMPLE_DB, db_file, ensure_ascii=False)
+    db_file.close()
+    try:
+        thread = SlackThread.from_slack(slack_message("2.0", "블루아쿠아마스크 5개", thread_ts="2.0"))
+        thread.replies = [SlackReply.from_slack(slack_message("2.1", "쌀겨수 클렌징패드 3개", thread_ts="2.0"))]
+
+        results = []
+        for records in ([thread], [thread.to_dict()]):
+            aggregator = DataAggregator(api_keys={"products_db": db_file.name}, client=MockOpenAIClient(SAMPLE_DB))
+            result = aggregator.aggregate_products(records)
+            results.append({p["품목코드"]: p["총_수량"] for p in result["aggregated_products"]})
+        print(f"  집계: {results[0]}")
+        assert results[0] == results[1] == {"200002": 5, "200001": 3}
+    finally:
+        os.unlink(db_file.name)
+
+
+def allocated(build):
+    """build() 결과를 유지하는 동안 늘어난 메모리(바이트)"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del kept
+    return size
+
+
+def test_memory_footprint():
+    """원본 payload 대신 경량 레코드를 보관할 때 메모리가 실제로 줄어드는지 측정"""
+    print("\n=== 경량 레코드 메모리 측정 ===")
+    count = 2000
+    payload = json.dumps(slack_message("3.0", "블루아쿠아마스크 5개, 쌀겨수 클렌징패드 3개",
+                                       thread_ts="3.0", files=[FILE]), ensure_ascii=False)
+
+    raw_size = allocated(lambda: [json.loads(payload) for _ in range(count)])
+    slim_size = allocated(lambda: [SlackThread.from_slack(json.loads(payload)) for _ in range(count)])
+    raw_kept_size = allocated(lambda: [SlackThread.from_slack(json.loads(payload), keep_raw=True)
+                                       for _ in range(count)])
+    print(f"  메시지 {count}건: 원본 dict {raw_size / 1024:.0f}KB, 경량 레코드 {slim_size / 1024:.0f}KB "
+          f"({slim_size / raw_size:.0%}), 원본 유지 {raw_kept_size / 1024:.0f}KB")
+    assert slim_size < raw_size * 0.5
+    assert raw_kept_size > raw_size
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_aggregate_threads_and_dicts()
+    test_memory_footprint()
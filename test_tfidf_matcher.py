@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+TF-IDF 배치 매처 테스트
+"""
+
+import random
+import time
+
+from tfidf_matcher import TfidfCatalogMatcher, normalize_name
+from test_mock_llm import SAMPLE_DB
+
+
+def test_tfidf_match_batch():
+    """띄어쓰기/표기 차이가 있어도 올바른 품목코드가 1순위인지 확인"""
+    print("=== TF-IDF 배치 매칭 테스트 ===")
+    matcher = TfidfCatalogMatcher(SAMPLE_DB)
+    results = matcher.match_batch(["쌀겨수클렌징 패드", "더클라우드 컨실러 02호", "블루 아쿠아 마스크"], top_k=2)
+
+    for row in results:
+        print(f"  {row}")
+    assert [row[0]["품목코드"] for row in results] == ["200001", "100002", "200002"]
+    assert results[0][0]["score"] > 0.9
+    assert len(results[1]) == 2
+
+
+def test_tfidf_brand_scope():
+    """브랜드를 지정하면 다른 브랜드 제품이 후보에서 빠지는지 확인"""
+    matcher = TfidfCatalogMatcher(SAMPLE_DB)
+    candidates = matcher.match_batch(["마스크"], top_k=5, brand="탐뷰티")[0]
+    assert all(c["브랜드"] == "탐뷰티" for c in candidates)
+    # 카탈로그에 없는 브랜드(별칭 설정에만 있는 이름)는 무시하고 전체 카탈로그에서 찾음
+    assert matcher.match_batch(["블루 아쿠아 마스크"], top_k=1, brands=["바루랩 공식몰"])[0][0]["품목코드"] == "200002"
+    assert normalize_name("Blue Aqua-Mask") == "blueaquamask"
+
+
+def test_tfidf_large_sheet():
+    """1,000행 시트를 한 번에 점수화"""
+    rng = random.Random(0)
+    catalog = {f"브랜드{b}": {f"{b}{i:04d}": f"브랜드{b} 제품 {i}호 {rng.choice(['크림', '세럼', '마스크'])}"
+                             for i in range(200)} for b in range(10)}
+    matcher = TfidfCatalogMatcher(catalog)
+    names = [name for products in catalog.values() for name in products.values()][:1000]
+
+    started = time.perf_counter()
+    results = matcher.match_batch(names, top_k=3)
+    elapsed = time.perf_counter() - started
+    print(f"1,000행 매칭: {elapsed * 1000:.1f}ms")
+    assert len(results) == 1000
+    assert all(row[0]["제품명"] == name for row, name in zip(results, names))
+
+
+if __name__ == "__main__":
+    test_tfidf_match_batch()
+    test_tfidf_brand_scope()
+    test_tfidf_large_sheet()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+트래픽 기록·재생 오프라인 테스트
+"""
+
+import os
+import tempfile
+
+from mock_openai import MockOpenAIClient
+from traffic_recorder import TrafficArchive, RecordingOpenAIClient, RecordingHTTP, ReplayMissError
+from test_mock_llm import SAMPLE_DB
+
+
+class FakeResponse:
+    """requests.Response 대용"""
+
+    def __init__(self, content: bytes):
+        self.status_code = 200
+        self.content = content
+        self.headers = {"Content-Type": "application/json"}
+
+
+class FakeHTTP:
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, headers=None, params=None, **kwargs):
+        self.calls += 1
+        return FakeResponse(b'{"ok": true, "messages": [{"ts": "1.0", "text": "\xec\x83\x98\xed\x94\x8c 1\xea\xb0\x9c"}]}')
+
+
+def test_record_and_replay():
+    """기록한 OpenAI/Slack 응답이 재생 모드에서 그대로 반환되는지 확인"""
+    print("=== 트래픽 기록·재생 테스트 ===")
+    archive_path = os.path.join(tempfile.mkdtemp(), "traffic.zip")
+    messages = [{"role": "user", "content": '찾을 제품명: "블루아쿠아마스크"'}]
+    params = {"channel": "C1", "oldest": 0}
+
+    with TrafficArchive(archive_path, "record") as archive:
+        client = RecordingOpenAIClient(archive, MockOpenAIClient(SAMPLE_DB))
+        recorded = client.chat.completions.create(model="gpt-4o", messages=messages)
+        http = RecordingHTTP(archive, FakeHTTP())
+        recorded_slack = http.get("https://slack.com/api/conversations.history", params=params).content
+
+    with TrafficArchive(archive_path, "replay") as archive:
+        client = RecordingOpenAIClient(archive)
+        replayed = client.chat.completions.create(model="gpt-4o", messages=messages)
+        assert replayed.choices[0].message.content == recorded.choices[0].message.content
+        assert replayed.usage.prompt_tokens == recorded.usage.prompt_tokens
+
+        http = RecordingHTTP(archive, FakeHTTP())
+        response = http.get("https://slack.com/api/conversations.history", params=params)
+        assert response.content == recorded_slack
+        assert response.json()["ok"] is True
+        assert http.inner.calls == 0
+
+        try:
+            client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+            raise AssertionError("기록되지 않은 요청은 실패해야 합니다")
+        except ReplayMissError:
+            pass
+    print("기록·재생 일치 확인")
+
+
+if __name__ == "__main__":
+    test_record_and_replay()
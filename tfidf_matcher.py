@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+NumPy 문자 n-gram TF-IDF 배치 매처
+카탈로그 행렬을 한 번 만들어 두고, 첨부 시트의 제품명 전체를
+희소 행렬 곱 한 번으로 점수화하여 행별 상위 k개 후보를 반환 (네트워크 호출 없음)
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def normalize_name(text: str) -> str:
+    """소문자화하고 공백/구두점을 제거 (띄어쓰기 차이 무시)"""
+    return _NON_WORD.sub("", str(text).lower())
+
+
+def char_ngrams(text: str, ngram_range: Tuple[int, int] = (2, 3)) -> List[str]:
+    """정규화된 문자열의 문자 n-gram 목록 (양 끝 경계 표시 포함)"""
+    normalized = normalize_name(text)
+    if not normalized:
+        return []
+    padded = f"^{normalized}$"
+    low, high = ngram_range
+    grams = []
+    for n in range(low, high + 1):
+        grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+class TfidfCatalogMatcher:
+    def __init__(self, products_db: Dict[str, Dict[str, str]], ngram_range: Tuple[int, int] = (2, 3),
+                 chunk_size: int = 256, max_df: float = 0.3):
+        """
+        products_db: {브랜드: {품목코드: 제품명}}
+        chunk_size: 한 번에 점수화할 질의 행 수 (점수 행렬 메모리 상한)
+        max_df: 이 비율보다 많은 제품에 나오는 n-gram 은 제외
+                (변별력이 거의 없으면서 포스팅이 길어 곱셈 비용만 키움)
+        """
+        self.ngram_range = ngram_range
+        self.chunk_size = chunk_size
+        self.max_df = max_df
+        self.entries: List[Tuple[str, str, str]] = [
+            (product_code, product_name, brand_name)
+            for brand_name, brand_products in products_db.items()
+            for product_code, product_name in brand_products.items()
+        ]
+        self.brand_of = np.array([entry[2] for entry in self.entries], dtype=object)
+        self._build()
+
+    def _build(self):
+        """카탈로그 TF-IDF 행렬을 용어(열) 기준 압축 형태(CSC)로 구성"""
+        doc_grams = [Counter(char_ngrams(name, self.ngram_range)) for _, name, _ in self.entries]
+
+        df = Counter()
+        for grams in doc_grams:
+            df.update(grams.keys())
+
+        n_docs = len(self.entries)
+        max_count = max(1, int(self.max_df * n_docs)) if n_docs >= 20 else n_docs
+        self.stop_grams = {gram for gram, count in df.items() if count > max_count}
+        self.vocab: Dict[str, int] = {}
+        for grams in doc_grams:
+            for gram in grams:
+                if gram not in self.vocab and gram not in self.stop_grams:
+                    self.vocab[gram] = len(self.vocab)
+        doc_grams = [Counter({g: c for g, c in grams.items() if g in self.vocab}) for grams in doc_grams]
+
+        self.idf = np.ones(len(self.vocab), dtype=np.float64)
+        for gram, idx in self.vocab.items():
+            self.idf[idx] = math.log((1 + n_docs) / (1 + df[gram])) + 1.0
+        # 카탈로그에 없는 n-gram 의 가중치 (질의 벡터 정규화에만 사용)
+        self.unknown_idf = math.log(1 + n_docs) + 1.0
+
+        rows, cols, vals = [], [], []
+        for row, grams in enumerate(doc_grams):
+            if not grams:
+                continue
+            idx = np.fromiter((self.vocab[g] for g in grams), dtype=np.int64, count=len(grams))
+            weights = np.fromiter(grams.values(), dtype=np.float64, count=len(grams)) * self.idf[idx]
+            weights /= np.linalg.norm(weights)
+            rows.append(np.full(len(idx), row, dtype=np.int64))
+            cols.append(idx)
+            vals.append(weights)
+
+        if rows:
+            rows = np.concatenate(rows)
+            cols = np.concatenate(cols)
+            vals = np.concatenate(vals)
+        else:
+            rows = cols = np.zeros(0, dtype=np.int64)
+            vals = np.zeros(0, dtype=np.float64)
+
+        order = np.argsort(cols, kind="stable")
+        self.post_rows = rows[order]
+        self.post_vals = vals[order]
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.add.at(self.indptr, cols + 1, 1)
+        self.indptr = np.cumsum(self.indptr)
+
+    def _query_coo(self, names: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """질의 제품명들을 L2 정규화된 TF-IDF 희소 행렬(COO)로 변환"""
+        rows, cols, vals = [], [], []
+        for row, name in enumerate(names):
+            grams = Counter(g for g in char_ngrams(name, self.ngram_range) if g not in self.stop_grams)
+            if not grams:
+                continue
+            known = [(self.vocab[g], c) for g, c in grams.items() if g in self.vocab]
+            unknown_sq = sum((c * self.unknown_idf) ** 2 for g, c in grams.items() if g not in self.vocab)
+            if not known:
+                continue
+            idx = np.array([k for k, _ in known], dtype=np.int64)
+            weights = np.array([c for _, c in known], dtype=np.float64) * self.idf[idx]
+            weights /= math.sqrt(float(np.dot(weights, weights)) + unknown_sq)
+            rows.append(np.full(len(idx), row, dtype=np.int64))
+            cols.append(idx)
+            vals.append(weights)
+        if not rows:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0, dtype=np.float64)
+        return np.concatenate(rows), np.concatenate(cols), np.concatenate(vals)
+
+    def score_batch(self, names: List[str]) -> np.ndarray:
+        """
+        질의 × 카탈로그 코사인 유사도 행렬 (희소 × 희소 곱)
+        질의의 각 n-gram 에 대해 카탈로그 포스팅을 펼쳐 bincount 로 누적
+        """
+        n_catalog = len(self.entries)
+        q_rows, q_cols, q_vals = self._query_coo(names)
+        if len(q_rows) == 0 or n_catalog == 0:
+            return np.zeros((len(names), n_catalog), dtype=np.float64)
+
+        starts = self.indptr[q_cols]
+        lengths = self.indptr[q_cols + 1] - starts
+        total = int(lengths.sum())
+        offsets = np.arange(total) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        postings = np.repeat(starts, lengths) + offsets
+
+        out_rows = np.repeat(q_rows, lengths)
+        out_cols = self.post_rows[postings]
+        weights = np.repeat(q_vals, lengths) * self.post_vals[postings]
+
+        scores = np.bincount(out_rows * n_catalog + out_cols, weights=weights,
+                             minlength=len(names) * n_catalog)
+        return scores.reshape(len(names), n_catalog)
+
+    def brand_mask(self, brand: str) -> np.ndarray:
+        """해당 브랜드 제품 열만 True 인 마스크 (브랜드별로 캐시)"""
+        if not hasattr(self, "_brand_masks"):
+            self._brand_masks: Dict[str, np.ndarray] = {}
+        if brand not in self._brand_masks:
+            self._brand_masks[brand] = self.brand_of == brand
+        return self._brand_masks[brand]
+
+    def match_batch(self, names: List[str], top_k: int = 3, brand: Optional[str] = None,
+                    brands: Optional[List[Optional[str]]] = None) -> List[List[Dict[str, Any]]]:
+        """
+        제품명 목록 전체를 한 번에 매칭
+        반환: 행마다 점수 내림차순 상위 top_k 후보 [{품목코드, 제품명, 브랜드, score}]
+        brand: 지정하면 모든 행에서 해당 브랜드 제품만 후보로 사용
+        brands: 행별 브랜드 (None 이거나 카탈로그에 없는 브랜드인 행은 전체 카탈로그)
+        """
+        results: List[List[Dict[str, Any]]] = []
+        if not self.entries:
+            return [[] for _ in names]
+
+        if brands is None:
+            brands = [brand] * len(names)
+        k = min(top_k, len(self.entries))
+
+        for start in range(0, len(names), self.chunk_size):
+            scores = self.score_batch(names[start:start + self.chunk_size])
+            for row, row_brand in enumerate(brands[start:start + self.chunk_size]):
+                # 카탈로그에 제품이 없는 브랜드(별칭 설정에만 있는 이름 등)는 무시하고 전체 카탈로그 사용
+                if row_brand and self.brand_mask(row_brand).any():
+                    scores[row, ~self.brand_mask(row_brand)] = 0.0
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            for row in range(scores.shape[0]):
+                candidates = sorted(top[row], key=lambda col: -scores[row, col])
+                results.append([
+                    {
+                        "품목코드": self.entries[col][0],
+                        "제품명": self.entries[col][1],
+                        "브랜드": self.entries[col][2],
+                        "score": round(float(scores[row, col]), 4)
+                    }
+                    for col in candidates if scores[row, col] > 0
+                ])
+        return results
+
+    def match(self, name: str, brand: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """제품명 1개의 최상위 후보 (없으면 None)"""
+        candidates = self.match_batch([name], top_k=1, brand=brand)[0]
+        return candidates[0] if candidates else None
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+"""
+Slack / OpenAI 트래픽 기록·재생
+운영 하루치 요청과 응답을 압축된 색인 아카이브(zip)에 저장하고,
+실제 서비스 없이 그대로(또는 기록된 지연시간대로) 재생
+"""
+
+import hashlib
+import json
+import threading
+import time
+import zipfile
+from typing import Dict, List, Any, Optional
+
+import requests
+
+from mock_openai import to_namespace
+
+INDEX_NAME = "index.json"
+
+
+def request_key(service: str, payload: Dict[str, Any]) -> str:
+    """요청 내용으로 결정적인 키 생성"""
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(f"{service}:{canonical}".encode('utf-8')).hexdigest()
+
+
+def to_plain(value: Any) -> Any:
+    """openai 응답 객체(pydantic 또는 SimpleNamespace)를 JSON 직렬화 가능한 값으로 변환"""
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(v) for v in value]
+    if hasattr(value, "__dict__"):
+        return {k: to_plain(v) for k, v in vars(value).items()}
+    return value
+
+
+class ReplayMissError(Exception):
+    """재생 모드에서 아카이브에 없는 요청"""
+
+
+class ReplayedAPIError(Exception):
+    """기록 당시 발생했던 API 오류를 재생"""
+
+    def __init__(self, status_code: Optional[int], message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class TrafficArchive:
+    """
+    zip(deflate) 기반 아카이브
+    - 항목: {service}/{key}/{n}.json (+ 바이너리 본문 {n}.body)
+    - index.json: 기록 순서, 키, 지연시간
+    """
+
+    def __init__(self, path: str, mode: str = "replay"):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"지원하지 않는 모드: {mode}")
+        self.path = path
+        self.mode = mode
+        self.lock = threading.Lock()
+        self.index: List[Dict[str, Any]] = []
+        self.counts: Dict[str, int] = {}
+        self.cursors: Dict[str, int] = {}
+
+        if mode == "record":
+            self.zip = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9)
+        else:
+            self.zip = zipfile.ZipFile(path, "r")
+            self.index = json.loads(self.zip.read(INDEX_NAME).decode('utf-8'))
+            self.names = set(self.zip.namelist())
+            for entry in self.index:
+                self.counts[entry["key"]] = self.counts.get(entry["key"], 0) + 1
+
+    def add(self, service: str, key: str, meta: Dict[str, Any], body: Optional[bytes] = None):
+        """요청/응답 1건 기록"""
+        with self.lock:
+            n = self.counts.get(key, 0)
+            self.counts[key] = n + 1
+            name = f"{service}/{key}/{n}"
+            self.zip.writestr(f"{name}.json", json.dumps(meta, ensure_ascii=False, separators=(',', ':')))
+            if body is not None:
+                self.zip.writestr(f"{name}.body", body)
+            self.index.append({
+                "service": service,
+                "key": key,
+                "n": n,
+                "has_body": body is not None,
+                "elapsed": meta.get("elapsed", 0.0)
+            })
+
+    def get(self, service: str, key: str) -> tuple:
+        """
+        기록된 응답 조회
+        같은 요청이 여러 번 기록된 경우 순서대로 반환하고, 소진되면 마지막 응답을 반복
+        """
+        with self.lock:
+            total = self.counts.get(key)
+            if not total:
+                raise ReplayMissError(f"아카이브에 없는 요청: {service}/{key}")
+            n = min(self.cursors.get(key, 0), total - 1)
+            self.cursors[key] = n + 1
+            name = f"{service}/{key}/{n}"
+            meta = json.loads(self.zip.read(f"{name}.json").decode('utf-8'))
+            body = self.zip.read(f"{name}.body") if f"{name}.body" in self.names else None
+        return meta, body
+
+    def close(self):
+        """아카이브 닫기 (기록 모드면 색인 저장)"""
+        with self.lock:
+            if self.mode == "record":
+                self.zip.writestr(INDEX_NAME, json.dumps(self.index, ensure_ascii=False, separators=(',', ':')))
+            self.zip.close()
+        print(f"트래픽 아카이브 {'저장' if self.mode == 'record' else '닫기'}: {self.path} ({len(self.index)}건)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ReplayResponse:
+    """requests.Response 중 SlackFetcher 가 사용하는 부분만 재현"""
+
+    def __init__(self, status_code: int, content: bytes, headers: Dict[str, str], url: str):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self) -> Any:
+        return json.loads(self.content.decode('utf-8'))
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error (replay): {self.url}", response=self)
+
+    def iter_content(self, chunk_size: int = 8192):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class RecordingHTTP:
+    """SlackFetcher.http 대체 - requests.get 호출을 기록하거나 재생"""
+
+    def __init__(self, archive: TrafficArchive, inner: Optional[Any] = None, realtime: bool = False):
+        self.archive = archive
+        self.inner = inner if inner is not None else requests
+        self.realtime = realtime
+
+    def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None, **kwargs) -> Any:
+        # 인증 헤더는 키와 아카이브에서 제외
+        key = request_key("slack", {"url": url, "params": params or {}})
+
+        if self.archive.mode == "replay":
+            meta, body = self.archive.get("slack", key)
+            if self.realtime:
+                time.sleep(meta.get("elapsed", 0.0))
+            return ReplayResponse(meta["status_code"], body or b"", meta.get("headers", {}), url)
+
+        started = time.perf_counter()
+        response = self.inner.get(url, headers=headers, params=params, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - started
+        self.archive.add("slack", key, {
+            "url": url,
+            "params": params or {},
+            "status_code": response.status_code,
+            "headers": {"Content-Type": response.headers.get("Content-Type", "")},
+            "elapsed": round(elapsed, 4)
+        }, content)
+        return response
+
+
+class _RecordingCompletions:
+    def __init__(self, owner: "RecordingOpenAIClient"):
+        self.owner = owner
+
+    def create(self, **kwargs) -> Any:
+        return self.owner.create(**kwargs)
+
+
+class _RecordingChat:
+    def __init__(self, owner: "RecordingOpenAIClient"):
+        self.completions = _RecordingCompletions(owner)
+
+
+class RecordingOpenAIClient:
+    """GPTMatcher.client 대체 - chat.completions.create 호출을 기록하거나 재생"""
+
+    def __init__(self, archive: TrafficArchive, inner: Optional[Any] = None, realtime: bool = False):
+        if archive.mode == "record" and inner is None:
+            raise ValueError("기록 모드에는 실제 OpenAI 클라이언트가 필요합니다")
+        self.archive = archive
+        self.inner = inner
+        self.realtime = realtime
+        self.chat = _RecordingChat(self)
+
+    def create(self, **kwargs) -> Any:
+        payload = {k: v for k, v in kwargs.items() if k != "timeout"}
+        key = request_key("openai", payload)
+
+        if self.archive.mode == "replay":
+            meta, _ = self.archive.get("openai", key)
+            if self.realtime:
+                time.sleep(meta.get("elapsed", 0.0))
+            if "error" in meta:
+                raise ReplayedAPIError(meta["error"].get("status_code"), meta["error"].get("message", ""))
+            return to_namespace(meta["response"])
+
+        started = time.perf_counter()
+        try:
+            response = self.inner.chat.completions.create(**kwargs)
+        except Exception as e:
+            self.archive.add("openai", key, {
+                "request": payload,
+                "error": {"status_code": getattr(e, "status_code", None), "message": str(e)},
+                "elapsed": round(time.perf_counter() - started, 4)
+            })
+            raise
+        self.archive.add("openai", key, {
+            "request": payload,
+            "response": to_plain(response),
+            "elapsed": round(time.perf_counter() - started, 4)
+        })
+        return response
+
+
+def attach(archive: TrafficArchive, fetcher: Optional[Any] = None, matcher: Optional[Any] = None,
+           realtime: bool = False):
+    """SlackFetcher / GPTMatcher 의 HTTP·LLM 클라이언트를 아카이브로 감싸기"""
+    if fetcher is not None:
+        fetcher.http = RecordingHTTP(archive, fetcher.http, realtime)
+        if archive.mode == "replay" and not realtime:
+            # 전속력 재생: API 제한용 대기 생략
+            fetcher.pacing = False
+    if matcher is not None:
+        inner = matcher.client if archive.mode == "record" else None
+        matcher.client = RecordingOpenAIClient(archive, inner, realtime)
+
+
+if __name__ == "__main__":
+    import argparse
+    from slack_fetcher import SlackFetcher
+    from aggregator import DataAggregator
+
+    parser = argparse.ArgumentParser(description="Slack/OpenAI 트래픽 기록·재생")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("archive", help="아카이브 경로 (예: traffic_20251016.zip)")
+    parser.add_argument("--start", help="시작일 YYYY-MM-DD")
+    parser.add_argument("--end", help="종료일 YYYY-MM-DD")
+    parser.add_argument("--realtime", action="store_true", help="기록된 지연시간대로 재생")
+    args = parser.parse_args()
+
+    # 채널 ID 가 요청 키에 포함되므로 재생도 같은 config.json 을 사용 (OpenAI 키는 불필요)
+    fetcher = SlackFetcher()
+    aggregator = DataAggregator(client=object()) if args.mode == "replay" else DataAggregator()
+
+    started = time.perf_counter()
+    with TrafficArchive(args.archive, args.mode) as archive:
+        attach(archive, fetcher, aggregator.gpt_matcher, args.realtime)
+        start_date, end_date = fetcher.get_date_range(args.start, args.end)
+        processed_messages = fetcher.fetch_all_channels(start_date, end_date)
+        aggregated_data = aggregator.aggregate_products(processed_messages)
+    print(aggregator.get_summary_report(aggregated_data))
+    print(f"소요 시간: {time.perf_counter() - started:.2f}초")